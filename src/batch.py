@@ -0,0 +1,364 @@
+"""
+Batch Upload Module
+Loads upload manifests and drives many uploads through one browser session.
+"""
+
+import csv
+import glob
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import yaml
+from loguru import logger
+
+from jobstore import JobStore, default_worker_id
+from preflight import VIDEO_EXTENSIONS
+from pool import BrowserPool
+from uploader import TikTokUploader
+
+
+# BatchResult.error of an upload whose Post click TikTok never confirmed;
+# counted as uploaded, since retrying could post the video twice
+UNCONFIRMED = "post not confirmed"
+
+
+def upload_error(success: bool, stages: List[str]) -> str:
+    """
+    Error text for a BatchResult.
+
+    Args:
+        success: What upload_video returned
+        stages: Stages reported to its on_stage callback
+
+    Returns:
+        "upload failed", UNCONFIRMED, or "" for a confirmed post
+    """
+    if not success:
+        return "upload failed"
+    return "" if "verified" in stages else UNCONFIRMED
+
+
+@dataclass
+class BatchItem:
+    """A single video to upload in a batch."""
+
+    path: str
+    title: str = ""
+    tags: List[str] = field(default_factory=list)
+    account: str = ""
+
+
+@dataclass
+class BatchResult:
+    """Outcome of uploading a single batch item."""
+
+    path: str
+    success: bool
+    duration: float
+    error: str = ""
+    account: str = ""
+
+
+def _parse_tags(value: Any) -> List[str]:
+    """Normalize tags given as a list or a comma/space separated string."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.replace(",", " ").split()
+    return [str(tag).strip().lstrip("#") for tag in value if str(tag).strip()]
+
+
+def _make_item(entry: Dict[str, Any], base_dir: Path) -> BatchItem:
+    """Build a BatchItem from a manifest entry, resolving relative paths."""
+    raw_path = entry.get("path") or entry.get("video")
+    if not raw_path:
+        raise ValueError(f"Manifest entry has no 'path': {entry}")
+
+    path = Path(raw_path)
+    if not path.is_absolute() and not path.exists():
+        path = base_dir / path
+
+    return BatchItem(
+        path=str(path),
+        title=str(entry.get("title") or ""),
+        tags=_parse_tags(entry.get("tags")),
+        account=str(entry.get("account") or ""),
+    )
+
+
+def load_manifest(manifest_path: str) -> List[BatchItem]:
+    """
+    Load batch items from a JSONL, CSV or YAML manifest.
+
+    Each entry needs a ``path`` (or ``video``) and may have ``title``,
+    ``tags`` and ``account``. Relative paths are resolved against the
+    manifest directory.
+
+    Args:
+        manifest_path: Path to manifest file
+
+    Returns:
+        List of batch items in manifest order
+    """
+    path = Path(manifest_path)
+    base_dir = path.parent
+    suffix = path.suffix.lower()
+
+    with open(path, "r", encoding="utf-8") as f:
+        if suffix in (".jsonl", ".ndjson"):
+            entries = [json.loads(line) for line in f if line.strip()]
+        elif suffix == ".csv":
+            entries = list(csv.DictReader(f))
+        elif suffix in (".yaml", ".yml"):
+            data = yaml.safe_load(f) or []
+            entries = data.get("videos", []) if isinstance(data, dict) else data
+        else:
+            raise ValueError(f"Unsupported manifest format: {suffix}")
+
+    items = [_make_item(entry, base_dir) for entry in entries]
+    logger.info(f"Loaded {len(items)} items from manifest {path}")
+    return items
+
+
+def items_from_glob(pattern: str, title: str = "", tags: Optional[List[str]] = None) -> List[BatchItem]:
+    """
+    Build batch items from a glob pattern or a directory of videos.
+
+    Args:
+        pattern: Glob pattern, or a directory to scan for video files
+        title: Title applied to every item
+        tags: Tags applied to every item
+
+    Returns:
+        List of batch items sorted by path
+    """
+    if Path(pattern).is_dir():
+        paths = [p for p in Path(pattern).iterdir() if p.suffix.lower() in VIDEO_EXTENSIONS]
+    else:
+        paths = [Path(p) for p in glob.glob(pattern, recursive=True)]
+
+    items = [
+        BatchItem(path=str(p), title=title, tags=list(tags or []))
+        for p in sorted(paths) if p.is_file()
+    ]
+    logger.info(f"Found {len(items)} videos matching {pattern}")
+    return items
+
+
+class BatchRunner:
+    """Uploads a list of videos through a single uploader or a browser pool."""
+
+    def __init__(self, uploader: Optional[TikTokUploader] = None, pool: Optional[BrowserPool] = None):
+        """
+        Initialize BatchRunner.
+
+        Args:
+            uploader: Uploader bound to an already created driver
+            pool: Started browser pool; items are spread across its browsers
+        """
+        if not uploader and not pool:
+            raise ValueError("BatchRunner needs an uploader or a pool")
+        self.uploader = uploader
+        self.pool = pool
+        self.results: List[BatchResult] = []
+
+    def run(self, items: List[BatchItem]) -> List[BatchResult]:
+        """
+        Upload every item, logging in once up front.
+
+        The login check is only repeated after a failed upload, in case the
+        failure was caused by the session expiring mid-batch.
+
+        Args:
+            items: Videos to upload
+
+        Returns:
+            Per-item results in input order
+        """
+        self.results = []
+
+        if self.pool:
+            return self._run_pool(items)
+
+        if not self.uploader.login_manager.ensure_logged_in():
+            logger.error("Cannot run batch: not logged in")
+            for item in items:
+                self.results.append(BatchResult(item.path, False, 0.0, "not logged in"))
+            return self.results
+
+        check_login = False
+        for index, item in enumerate(items, start=1):
+            logger.info(f"[{index}/{len(items)}] {item.path}")
+            start_time = time.time()
+            stages: List[str] = []
+            try:
+                success = self.uploader.upload_video(
+                    video_path=item.path,
+                    title=item.title,
+                    tags=item.tags,
+                    check_login=check_login,
+                    on_stage=stages.append
+                )
+                error = upload_error(success, stages)
+            except Exception as e:
+                logger.exception(f"Unexpected error uploading {item.path}: {e}")
+                success = False
+                error = str(e)
+
+            self.results.append(BatchResult(item.path, success, time.time() - start_time, error))
+            check_login = not success
+
+        self.log_summary()
+        return self.results
+
+    def _run_pool(self, items: List[BatchItem]) -> List[BatchResult]:
+        """Upload items concurrently, one per warm pool browser."""
+        def upload(item: BatchItem) -> BatchResult:
+            start_time = time.time()
+            stages: List[str] = []
+            try:
+                success = self.pool.upload(item.path, item.title, item.tags, on_stage=stages.append)
+                error = upload_error(success, stages)
+            except Exception as e:
+                logger.exception(f"Unexpected error uploading {item.path}: {e}")
+                success, error = False, str(e)
+            return BatchResult(item.path, success, time.time() - start_time, error)
+
+        with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+            self.results = list(executor.map(upload, items))
+
+        self.log_summary()
+        return self.results
+
+    def run_queue(self, store: JobStore) -> List[BatchResult]:
+        """
+        Drain the durable job queue, recording each job's progress.
+
+        Jobs are claimed one at a time, so several processes can work the same
+        queue. Interrupted jobs from a killed run are picked up again; jobs
+        that were already posted are never re-uploaded.
+
+        Args:
+            store: Job store to claim from
+
+        Returns:
+            Per-job results (in completion order)
+        """
+        self.results = []
+        store.release_dead_workers()
+
+        if self.pool:
+            def work(index: int) -> List[BatchResult]:
+                worker_id = f"{default_worker_id()}:{index}"
+                results = []
+                while True:
+                    job = store.claim(worker_id)
+                    if job is None:
+                        return results
+                    results.append(self._run_job(store, job, lambda on_stage: self.pool.upload(
+                        job["path"], job["title"], job["tags"], on_stage=on_stage
+                    )))
+
+            with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+                for results in executor.map(work, range(self.pool.size)):
+                    self.results.extend(results)
+        else:
+            if not self.uploader.login_manager.ensure_logged_in():
+                logger.error("Cannot run queue: not logged in")
+                pending = sum(store.pending_counts().values())
+                self.results = [
+                    BatchResult(str(store.db_path), False, 0.0, f"not logged in ({pending} jobs left queued)")
+                ]
+                return self.results
+
+            check_login = False
+            while True:
+                job = store.claim()
+                if job is None:
+                    break
+                logger.info(f"[job {job['id']}, attempt {job['attempts']}] {job['path']}")
+                result = self._run_job(store, job, lambda on_stage: self.uploader.upload_video(
+                    video_path=job["path"],
+                    title=job["title"],
+                    tags=job["tags"],
+                    check_login=check_login,
+                    on_stage=on_stage
+                ))
+                self.results.append(result)
+                check_login = not result.success
+
+        self.log_summary()
+        logger.info(f"Queue state: {store.summary()}")
+        return self.results
+
+    def _run_job(self, store: JobStore, job: Dict[str, Any], upload: Callable) -> BatchResult:
+        """Run one claimed job, persisting every stage transition."""
+        start_time = time.time()
+        stages: List[str] = []
+
+        def on_stage(stage: str):
+            store.set_state(job["id"], stage)
+            stages.append(stage)
+
+        try:
+            success = upload(on_stage)
+            error = upload_error(success, stages)
+        except Exception as e:
+            logger.exception(f"Unexpected error uploading {job['path']}: {e}")
+            success = False
+            error = str(e)
+
+        store.finish(job["id"], success, error)
+        return BatchResult(job["path"], success, time.time() - start_time, error, job["account"])
+
+    def log_summary(self):
+        """Log a per-item result table and totals."""
+        log_results(self.results)
+
+    def write_report(self, report_path: str):
+        """
+        Write per-item results to a JSON file.
+
+        Args:
+            report_path: Path to report file
+        """
+        write_results(self.results, report_path)
+
+
+def log_results(results: List[BatchResult]):
+    """
+    Log a per-item result table and totals.
+
+    Args:
+        results: Batch results to summarize
+    """
+    succeeded = sum(1 for r in results if r.success)
+    logger.info("=" * 60)
+    for result in results:
+        status = "OK  " if result.success else "FAIL"
+        suffix = f" ({result.error})" if result.error else ""
+        account = f"[{result.account}] " if result.account else ""
+        logger.info(f"{status} {result.duration:7.1f}s  {account}{result.path}{suffix}")
+    logger.info("=" * 60)
+    unconfirmed = sum(1 for r in results if r.success and r.error == UNCONFIRMED)
+    note = f" ({unconfirmed} not confirmed, check the profile)" if unconfirmed else ""
+    logger.info(f"Batch finished: {succeeded}/{len(results)} uploaded{note}")
+
+
+def write_results(results: List[BatchResult], report_path: str):
+    """
+    Write per-item results to a JSON file.
+
+    Args:
+        results: Batch results to write
+        report_path: Path to report file
+    """
+    path = Path(report_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([asdict(r) for r in results], f, indent=2)
+    logger.info(f"Batch report written to {path}")
@@ -0,0 +1,283 @@
+"""
+Benchmark Module
+Runs uploads against the mock TikTok and reports per-stage latency percentiles.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+from loguru import logger
+
+from mock_tiktok import mock_config, start as start_mock
+
+
+STAGES = [
+    "driver_startup", "login_check", "navigation", "file_transfer",
+    "upload_wait", "caption_fill", "post_click", "post_confirmation",
+]
+
+RESULTS_DIR = "data/benchmarks"
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linearly interpolated percentile (q in 0-100) of a non-empty list."""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Count, mean, min/max and p50/p95/p99 of a list of samples."""
+    if not values:
+        return {"n": 0}
+    return {
+        "n": len(values),
+        "mean": round(sum(values) / len(values), 4),
+        "p50": round(percentile(values, 50), 4),
+        "p95": round(percentile(values, 95), 4),
+        "p99": round(percentile(values, 99), 4),
+        "min": round(min(values), 4),
+        "max": round(max(values), 4),
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Short hash of the checked-out commit, if this is a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Benchmark:
+    """
+    Uploads videos to the mock TikTok through TikTokUploader and collects
+    per-stage timings and WebDriver command counts (from the driver's
+    CommandMonitor, by command and by call site).
+
+    Runs call TikTokUploader.upload_video directly, the same call main.py
+    makes for a single video, so stage timings and command counts can be
+    read off the uploader. By default one browser serves every run, so
+    driver startup is sampled once; with ``fresh_browser`` every run starts
+    its own browser. A browser that fails to start counts as a failed run.
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        videos: List[str],
+        runs: int = 10,
+        fresh_browser: bool = False,
+        mock_url: Optional[str] = None,
+    ):
+        """
+        Initialize Benchmark.
+
+        Args:
+            config: Application configuration
+            videos: Videos to upload, used in turn
+            runs: Number of uploads
+            fresh_browser: Start a new browser for every upload
+            mock_url: Use a running mock server instead of starting one
+        """
+        self.config = config
+        self.videos = videos
+        self.runs = runs
+        self.fresh_browser = fresh_browser
+        self.mock_url = mock_url
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run the uploads.
+
+        Returns:
+            Report with per-run records and per-stage summaries
+        """
+        from browser import BrowserManager
+        from uploader import TikTokUploader
+
+        server = None
+        url = self.mock_url
+        if not url:
+            server, url = start_mock(self.config, port=0)
+        config = mock_config(self.config, url)
+
+        records = []
+        manager = None
+        started = time.time()
+        try:
+            for index in range(self.runs):
+                video = self.videos[index % len(self.videos)]
+                record: Dict[str, Any] = {"run": index + 1, "video": video, "stages": {}}
+
+                if manager is None or self.fresh_browser:
+                    if manager:
+                        manager.close()
+                    manager = BrowserManager(config["browser"])
+                    start_time = time.time()
+                    try:
+                        driver = manager.create_driver()
+                    except Exception as e:
+                        # Counted as a failed run; the next run starts a new browser
+                        logger.error(f"Benchmark run {index + 1}: browser failed to start: {e}")
+                        manager.close()
+                        manager = None
+                        record.update(success=False, error=f"driver startup: {e}", commands={}, command_sites={})
+                        records.append(record)
+                        continue
+                    record["stages"]["driver_startup"] = time.time() - start_time
+                    uploader = TikTokUploader(driver, config)
+
+                logger.info(f"Benchmark run {index + 1}/{self.runs}: {Path(video).name}")
+                start_time = time.time()
+                try:
+                    record["success"] = uploader.upload_video(
+                        video, title=f"Benchmark run {index + 1}", tags=["benchmark"]
+                    )
+                except Exception as e:
+                    logger.error(f"Benchmark run {index + 1} failed: {e}")
+                    record.update(success=False, error=str(e))
+                record["total_s"] = round(time.time() - start_time, 4)
+                record["stages"].update(uploader.timings)
+                record["stages"] = {stage: round(value, 4) for stage, value in record["stages"].items()}
+                commands = uploader.command_report or {}
+                record["commands"] = {
+                    command: entry["count"] for command, entry in commands.get("by_command", {}).items()
+                }
+                record["command_sites"] = {
+                    site: entry["count"] for site, entry in commands.get("by_site", {}).items()
+                }
+                records.append(record)
+        finally:
+            if manager:
+                manager.close()
+            posted = self._posted(url)
+            if server:
+                server.shutdown()
+                server.server_close()
+
+        return self._report(records, posted, time.time() - started)
+
+    @staticmethod
+    def _posted(url: str) -> Optional[int]:
+        """Number of posts the mock received."""
+        try:
+            return len(requests.get(f"{url}/api/posts", timeout=5).json())
+        except (requests.RequestException, ValueError):
+            return None
+
+    def _report(self, records: List[Dict[str, Any]], posted: Optional[int], elapsed: float) -> Dict[str, Any]:
+        """Aggregate the per-run records."""
+        command_totals = [sum(record["commands"].values()) for record in records if "total_s" in record]
+        by_type: Counter = Counter()
+        by_site: Counter = Counter()
+        for record in records:
+            by_type.update(record["commands"])
+            by_site.update(record["command_sites"])
+
+        return {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "runs": len(records),
+            "fresh_browser": self.fresh_browser,
+            "succeeded": sum(1 for record in records if record["success"]),
+            "mock_posts": posted,
+            "elapsed_s": round(elapsed, 2),
+            "mock": self.config.get("mock", {}),
+            "stages": {
+                stage: summarize([r["stages"][stage] for r in records if stage in r["stages"]])
+                for stage in STAGES
+            },
+            "total": summarize([record["total_s"] for record in records if "total_s" in record]),
+            "commands": {
+                "per_upload": summarize(command_totals),
+                "by_type": dict(by_type.most_common()),
+                "by_site": dict(by_site.most_common()),
+            },
+            "records": records,
+        }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> str:
+    """
+    Table of p50/p95 per stage against a baseline report.
+
+    Args:
+        report: Current report
+        baseline: Earlier report (e.g. from the previous commit)
+
+    Returns:
+        Printable table
+    """
+    lines = [f"{'stage':<20}{'p50 before':>12}{'p50 now':>10}{'p95 before':>12}{'p95 now':>10}{'p50 change':>12}"]
+    rows = [(stage, baseline["stages"].get(stage, {}), report["stages"].get(stage, {})) for stage in STAGES]
+    rows.append(("total", baseline.get("total", {}), report.get("total", {})))
+    rows.append(("commands/upload", baseline["commands"]["per_upload"], report["commands"]["per_upload"]))
+    for name, before, now in rows:
+        if not before.get("n") or not now.get("n"):
+            continue
+        change = (now["p50"] - before["p50"]) / before["p50"] * 100 if before["p50"] else 0.0
+        lines.append(
+            f"{name:<20}{before['p50']:>12.3f}{now['p50']:>10.3f}"
+            f"{before['p95']:>12.3f}{now['p95']:>10.3f}{change:>11.1f}%"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    from tracing import setup_tracing
+    from utils import load_config, setup_logging
+
+    parser = argparse.ArgumentParser(description="Benchmark uploads against the mock TikTok")
+    parser.add_argument("videos", nargs="+", help="Videos to upload (used in turn)")
+    parser.add_argument("-n", "--runs", type=int, default=10, help="Number of uploads")
+    parser.add_argument("--fresh-browser", action="store_true", help="Start a new browser for every upload")
+    parser.add_argument("--mock", type=str, default=None, metavar="URL", help="Use a running mock server")
+    parser.add_argument("--headed", action="store_true", help="Show the browser window")
+    parser.add_argument("-o", "--output", type=str, default=None, help="Report path (default: data/benchmarks/)")
+    parser.add_argument("--compare", type=str, default=None, metavar="REPORT", help="Baseline report to compare with")
+    parser.add_argument("-c", "--config", type=str, default="config/config.yaml", help="Path to config file")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    setup_logging(config.get("logging", {}))
+    setup_tracing(config.get("tracing", {}))
+    config["browser"]["headless"] = not args.headed
+
+    missing = [video for video in args.videos if not Path(video).exists()]
+    if missing:
+        logger.error(f"Video file not found: {', '.join(missing)}")
+        sys.exit(1)
+
+    report = Benchmark(config, args.videos, args.runs, args.fresh_browser, args.mock).run()
+
+    output = Path(args.output or Path(RESULTS_DIR) / (
+        f"bench-{datetime.now():%Y%m%d-%H%M%S}-{report['commit'] or 'nogit'}.json"
+    ))
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    for stage in STAGES + ["total"]:
+        summary = report["total"] if stage == "total" else report["stages"][stage]
+        if summary.get("n"):
+            logger.info(f"{stage:<18} p50 {summary['p50']:.3f}s  p95 {summary['p95']:.3f}s  p99 {summary['p99']:.3f}s")
+    logger.info(f"Commands per upload: p50 {report['commands']['per_upload'].get('p50', 0):.0f}")
+    for site, count in list(report["commands"]["by_site"].items())[:5]:
+        logger.info(f"  {count / max(1, report['runs']):>7.1f}/upload  {site}")
+    logger.info(f"{report['succeeded']}/{report['runs']} uploads succeeded; report written to {output}")
+
+    if args.compare:
+        print(compare(report, json.loads(Path(args.compare).read_text())))
+    sys.exit(0 if report["succeeded"] == report["runs"] else 1)
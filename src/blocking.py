@@ -0,0 +1,187 @@
+"""
+Resource Blocking Module
+Blocks page resources the automation never looks at, per named profile.
+"""
+
+import json
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from selenium.webdriver.remote.webdriver import WebDriver
+from loguru import logger
+
+from utils import update_json
+
+
+# URL pattern groups for Network.setBlockedURLs ('*' is the only wildcard)
+PATTERN_GROUPS: Dict[str, List[str]] = {
+    "images": ["*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.avif*", "*.heic*", "*.ico*"],
+    "fonts": ["*.woff*", "*.woff2*", "*.ttf*", "*.otf*", "*fonts.googleapis.com*", "*fonts.gstatic.com*"],
+    # Feed autoplay videos; never the upload itself, which goes through XHR
+    # from a local blob
+    "media": ["*mime_type=video_*", "*.m3u8*", "*/video/tos/*"],
+    "analytics": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+        "*analytics.tiktok.com*", "*mon.tiktokv.com*", "*mon-va.byteoversea.com*",
+        "*mcs.tiktokw.us*", "*mcs-va.tiktokv.com*", "*/slardar/*", "*sentry.io*",
+    ],
+}
+
+DEFAULT_PROFILES: Dict[str, List[str]] = {
+    "login-check": ["images", "fonts", "media", "analytics"],
+    "upload": ["images", "fonts", "media", "analytics"],
+}
+
+# Returns what the page loaded, from the Resource Timing API
+PAGE_STATS_JS = """
+var nav = performance.getEntriesByType('navigation')[0];
+var entries = performance.getEntriesByType('resource');
+var out = [];
+for (var i = 0; i < entries.length; i++) {
+    out.push([entries[i].name, entries[i].transferSize || 0, entries[i].responseStatus || 0]);
+}
+return {
+    resources: out,
+    document: nav ? (nav.transferSize || 0) : 0,
+    load_ms: nav ? (nav.loadEventEnd || nav.domContentLoadedEventEnd || 0) - nav.startTime : 0
+};
+"""
+
+
+class ResourceBlocker:
+    """
+    Switches Network.setBlockedURLs between named blocking profiles.
+
+    Each profile is a list of pattern groups (see PATTERN_GROUPS) or raw URL
+    patterns. Per-page stats (bytes, requests, load time) are compared with
+    an unblocked baseline, recorded whenever blocking is disabled, to report
+    what each profile saves.
+    """
+
+    BASELINE_FILE = "data/cache/page_baselines.json"
+
+    def __init__(self, driver: WebDriver, config: dict):
+        """
+        Initialize ResourceBlocker.
+
+        Args:
+            driver: Selenium WebDriver instance
+            config: Browser configuration dictionary
+        """
+        blocking_config = config.get("blocking", {})
+        self.driver = driver
+        self.supported = hasattr(driver, "execute_cdp_cmd")
+        self.enabled = blocking_config.get("enabled", True) and self.supported
+        self.profiles = {
+            name: self._expand(entries)
+            for name, entries in (blocking_config.get("profiles") or DEFAULT_PROFILES).items()
+        }
+        self.baseline_file = Path(blocking_config.get("baseline_file") or self.BASELINE_FILE)
+        self.current: Optional[str] = None
+        self._network_enabled = False
+
+    @staticmethod
+    def _expand(entries: List[str]) -> List[str]:
+        """Replace group names with their patterns."""
+        patterns: List[str] = []
+        for entry in entries:
+            patterns.extend(PATTERN_GROUPS.get(entry, [entry]))
+        return patterns
+
+    def use(self, profile: Optional[str]):
+        """
+        Activate a blocking profile for the following page loads.
+
+        Args:
+            profile: Profile name, or None to stop blocking
+        """
+        if not self.enabled or profile == self.current:
+            return
+        patterns = self.profiles.get(profile, []) if profile else []
+        if profile and profile not in self.profiles:
+            logger.warning(f"Unknown blocking profile '{profile}', not blocking")
+
+        try:
+            if not self._network_enabled:
+                self.driver.execute_cdp_cmd("Network.enable", {})
+                self._network_enabled = True
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+            self.current = profile
+            logger.debug(f"Blocking profile '{profile}' active ({len(patterns)} patterns)")
+        except Exception as e:
+            logger.warning(f"Could not set blocked URLs: {e}")
+            self.enabled = False
+
+    def report(self, page: str) -> Optional[Dict[str, float]]:
+        """
+        Log what the current page loaded and what blocking saved.
+
+        Args:
+            page: Page name used to match the baseline (e.g. "home", "upload")
+
+        Returns:
+            Page stats, or None if they could not be read
+        """
+        if not self.supported:
+            return None
+        try:
+            raw = self.driver.execute_script(PAGE_STATS_JS) or {}
+        except Exception as e:
+            logger.debug(f"Could not read page stats: {e}")
+            return None
+
+        patterns = self.profiles.get(self.current, []) if self.enabled and self.current else []
+        loaded = [r for r in raw.get("resources", []) if r[1] or r[2]]
+        blocked = [r for r in raw.get("resources", []) if not (r[1] or r[2]) and
+                   any(fnmatch(r[0], p) for p in patterns)]
+        stats = {
+            "bytes": raw.get("document", 0) + sum(r[1] for r in loaded),
+            "requests": len(loaded),
+            "blocked": len(blocked),
+            "load_s": round((raw.get("load_ms") or 0) / 1000, 3),
+        }
+
+        baselines = self._load_baselines()
+        message = (
+            f"Page '{page}' [{self.current if patterns else 'unblocked'}]: "
+            f"{stats['bytes'] / (1024 * 1024):.2f} MB in {stats['requests']} requests, "
+            f"{stats['blocked']} blocked, load {stats['load_s']:.2f}s"
+        )
+        if patterns and page in baselines:
+            base = baselines[page]
+            message += (
+                f" (saved {(base['bytes'] - stats['bytes']) / (1024 * 1024):.2f} MB, "
+                f"{base['load_s'] - stats['load_s']:.2f}s vs unblocked)"
+            )
+        elif not patterns:
+            self._save_baseline(page, stats)
+        logger.info(message)
+        return stats
+
+    def _load_baselines(self) -> Dict[str, Dict[str, float]]:
+        try:
+            return json.loads(self.baseline_file.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save_baseline(self, page: str, stats: Dict[str, float]):
+        """Merge one page's baseline into the file shared by all workers."""
+        try:
+            update_json(self.baseline_file, lambda baselines: dict(baselines, **{page: stats}))
+        except OSError as e:
+            logger.debug(f"Could not save page baselines: {e}")
+
+
+def use_profile(driver: WebDriver, profile: Optional[str]):
+    """Activate a blocking profile on a driver created by BrowserManager (no-op otherwise)."""
+    blocker = getattr(driver, "resource_blocker", None)
+    if blocker:
+        blocker.use(profile)
+
+
+def report_page(driver: WebDriver, page: str):
+    """Log page stats on a driver created by BrowserManager (no-op otherwise)."""
+    blocker = getattr(driver, "resource_blocker", None)
+    if blocker:
+        blocker.report(page)
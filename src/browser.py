@@ -3,7 +3,10 @@ Browser Management Module
 Handles browser initialization and configuration with anti-detection features.
 """
 
+import json
 import os
+import shutil
+import time
 from pathlib import Path
 from typing import Optional, Union
 
@@ -15,6 +18,12 @@ from selenium.webdriver.remote.file_detector import LocalFileDetector
 from loguru import logger
 from dotenv import load_dotenv
 
+from blocking import ResourceBlocker
+from commands import CommandMonitor
+from profiles import clone_profile, prune_profile
+from tracing import current_span, traced
+from utils import get_process_tree_rss_mb
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -22,16 +31,32 @@ load_dotenv()
 class BrowserManager:
     """Manages browser instance with anti-detection capabilities."""
     
-    def __init__(self, config: dict):
+    def __init__(
+        self,
+        config: dict,
+        user_data_dir: Optional[str] = None,
+        template_dir: Optional[str] = None,
+        discard_profile: bool = False
+    ):
         """
         Initialize BrowserManager.
         
         Args:
             config: Browser configuration dictionary
+            user_data_dir: Profile directory overriding env/config (needed
+                when several browsers run side by side)
+            template_dir: Golden profile to clone into user_data_dir before
+                each launch (see profiles.ProfileCloner)
+            discard_profile: Delete the profile directory on close
         """
         self.config = config
+        self.user_data_dir = user_data_dir
+        self.template_dir = template_dir
+        self.discard_profile = discard_profile
         self.driver: Optional[Union[uc.Chrome, webdriver.Chrome]] = None
+        self.is_remote = False
         
+    @traced()
     def create_driver(self) -> Union[uc.Chrome, webdriver.Chrome]:
         """
         Create and configure Chrome driver with anti-detection.
@@ -40,6 +65,8 @@ class BrowserManager:
             Configured Chrome WebDriver instance
         """
         logger.info("Initializing Chrome browser...")
+        start_time = time.time()
+        pruned = 0
         
         options = uc.ChromeOptions()
         
@@ -62,13 +89,18 @@ class BrowserManager:
             logger.info("Running in headless mode")
         
         # User data directory for persistent login (REQUIRED for session persistence)
-        # Priority: environment variable > config file > default path
+        # Priority: explicit override > environment variable > config file > default path
         user_data_dir = (
+            self.user_data_dir or
             os.environ.get("CHROME_USER_DATA_DIR") or 
             self.config.get("user_data_dir") or 
             "./chrome_data"
         )
         user_data_path = Path(user_data_dir).resolve()
+        if self.template_dir and Path(self.template_dir).resolve() != user_data_path:
+            clone_profile(self.template_dir, str(user_data_path))
+        elif self.config.get("prune_on_launch", True):
+            pruned = prune_profile(str(user_data_path), self.config.get("cache_limits_mb", {}))
         user_data_path.mkdir(parents=True, exist_ok=True)
         options.add_argument(f"--user-data-dir={user_data_path}")
         logger.info(f"Using user data directory: {user_data_path}")
@@ -79,6 +111,12 @@ class BrowserManager:
         options.add_argument("--disable-gpu")
         options.add_argument("--disable-blink-features=AutomationControlled")
         
+        # Return from get() at DOMContentLoaded ("eager") or right away ("none");
+        # callers wait for a named readiness check (see readiness.py) instead
+        # of the full load event
+        page_load_strategy = self.config.get("page_load_strategy", "eager")
+        options.page_load_strategy = page_load_strategy
+        
         # Create driver
         # Check if using remote Selenium (Docker with selenium/standalone-chrome)
         selenium_url = os.environ.get("SELENIUM_REMOTE_URL")
@@ -89,9 +127,9 @@ class BrowserManager:
             chrome_options.add_argument("--no-sandbox")
             chrome_options.add_argument("--disable-dev-shm-usage")
             chrome_options.add_argument(f"--window-size={width},{height}")
+            chrome_options.page_load_strategy = page_load_strategy
             
             # Retry connection (Selenium container may need time to start)
-            import time
             max_retries = 30
             for attempt in range(max_retries):
                 try:
@@ -115,13 +153,69 @@ class BrowserManager:
             self.driver = uc.Chrome(options=options)
             self.is_remote = False
         
-        # Set timeouts
-        self.driver.implicitly_wait(self.config.get("implicit_wait", 10))
+        # Resource blocking profiles (used via blocking.use_profile)
+        self.driver.resource_blocker = ResourceBlocker(self.driver, self.config)
+        # Per-upload WebDriver command counts (via commands.report_commands)
+        if self.config.get("commands", {}).get("enabled", True):
+            self.driver.command_monitor = CommandMonitor(self.driver, self.config)
+        
+        # Set timeouts (no implicit wait: see waits.WaitPolicy)
+        self.driver.implicitly_wait(self.config.get("implicit_wait", 0))
         self.driver.set_page_load_timeout(self.config.get("page_load_timeout", 60))
         
+        current_span().set_attributes(
+            remote=self.is_remote,
+            headless=self.config.get("headless", False),
+            cloned=bool(self.template_dir),
+            pruned=pruned,
+        )
+        if not self.is_remote:
+            self._record_startup(user_data_path, time.time() - start_time, pruned)
         logger.success("Browser initialized successfully")
         return self.driver
     
+    def _record_startup(self, user_data_path: Path, seconds: float, pruned: int):
+        """Log startup time, comparing it with the previous launch when caches were pruned."""
+        stats_file = user_data_path / ".startup.json"
+        previous = None
+        try:
+            previous = json.loads(stats_file.read_text()).get("seconds")
+        except (OSError, ValueError):
+            pass
+        
+        if pruned:
+            message = f"Pruned {pruned / (1024 * 1024):.1f} MB of caches; startup {seconds:.2f}s"
+            if previous:
+                message += f" (previous launch {previous:.2f}s)"
+            logger.info(message)
+        else:
+            logger.debug(f"Browser startup took {seconds:.2f}s")
+            
+        try:
+            stats_file.write_text(json.dumps({"seconds": round(seconds, 3), "pruned_bytes": pruned}))
+        except OSError:
+            pass
+    
+    def get_memory_usage_mb(self) -> Optional[float]:
+        """
+        Get resident memory of the local browser and its child processes.
+        
+        Returns:
+            RSS in MB, or None if not measurable (remote mode, non-Linux)
+        """
+        if not self.driver or self.is_remote:
+            return None
+            
+        pid = getattr(self.driver, "browser_pid", None)
+        if not pid:
+            service = getattr(self.driver, "service", None)
+            process = getattr(service, "process", None)
+            pid = getattr(process, "pid", None)
+        if not pid:
+            return None
+            
+        return get_process_tree_rss_mb(pid)
+    
     def close(self):
         """Close the browser and clean up resources."""
         if self.driver:
@@ -131,3 +225,5 @@ class BrowserManager:
             except Exception as e:
                 logger.warning(f"Error closing browser: {e}")
             self.driver = None
+        if self.discard_profile and self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
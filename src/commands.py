@@ -0,0 +1,185 @@
+"""
+Command Monitor Module
+Counts and times every WebDriver wire command by type and calling site.
+"""
+
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from selenium.webdriver.remote.webdriver import WebDriver
+from loguru import logger
+
+from tracing import current_span
+
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Thin wrappers whose callers are the interesting call site
+PASSTHROUGH_MODULES = {"commands", "probe", "tracing"}
+
+
+def _new_entry() -> Dict[str, Any]:
+    return {"count": 0, "total_s": 0.0, "max_s": 0.0}
+
+
+class CommandMonitor:
+    """
+    Wraps ``driver.execute``, the method every WebDriver command goes
+    through (find_element, is_displayed, .text, execute_script, CDP, ...).
+
+    Each command is counted and timed under its wire name and under the
+    first frame in this project that issued it, e.g.
+    ``uploader._poll_for_upload:427``. Frames in Selenium, in this module
+    and in DomProbe are skipped, so a chatty loop shows up at its own line.
+    ``report`` summarizes the commands since the last ``reset`` (one
+    upload) and warns when the ``commands`` budget is exceeded; against a
+    remote grid every command is an HTTP round trip, so counts matter more
+    than local timings suggest.
+    """
+
+    def __init__(self, driver: WebDriver, config: dict):
+        """
+        Initialize CommandMonitor.
+
+        Args:
+            driver: Selenium WebDriver instance to instrument
+            config: Browser configuration dictionary
+        """
+        budget = config.get("commands", {})
+        self.max_commands = budget.get("max_per_upload")
+        self.max_seconds = budget.get("max_seconds_per_upload")
+        self.max_per_site = budget.get("max_per_site")
+        self.top_sites = budget.get("top_sites", 5)
+        self._lock = threading.Lock()
+        self._site_cache: Dict[str, Optional[str]] = {}
+        self.reset()
+        self._install(driver)
+
+    def _install(self, driver: WebDriver):
+        execute = driver.execute
+
+        def monitored(driver_command, params=None):
+            start_time = time.perf_counter()
+            try:
+                return execute(driver_command, params)
+            finally:
+                self._record(driver_command, self._call_site(), time.perf_counter() - start_time)
+
+        driver.execute = monitored
+
+    def _module(self, filename: str) -> Optional[str]:
+        """Module name of a file in this project, None for anything else."""
+        if filename not in self._site_cache:
+            path = os.path.abspath(filename)
+            in_src = os.path.dirname(path) == SRC_DIR
+            self._site_cache[filename] = os.path.splitext(os.path.basename(path))[0] if in_src else None
+        return self._site_cache[filename]
+
+    def _call_site(self) -> str:
+        """First project frame on the stack outside the passthrough modules."""
+        frame = sys._getframe(2)
+        while frame is not None:
+            module = self._module(frame.f_code.co_filename)
+            if module and module not in PASSTHROUGH_MODULES:
+                # co_qualname is new in Python 3.11
+                name = getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+                return f"{module}.{name}:{frame.f_lineno}"
+            frame = frame.f_back
+        return "unknown"
+
+    def _record(self, command: str, site: str, seconds: float):
+        with self._lock:
+            self.total += 1
+            self.total_s += seconds
+            for entry in (self.by_command.setdefault(command, _new_entry()),
+                          self.by_site.setdefault(site, dict(_new_entry(), commands={}))):
+                entry["count"] += 1
+                entry["total_s"] += seconds
+                entry["max_s"] = max(entry["max_s"], seconds)
+            commands = self.by_site[site]["commands"]
+            commands[command] = commands.get(command, 0) + 1
+
+    def reset(self):
+        """Start counting a new upload."""
+        with self._lock:
+            self.total = 0
+            self.total_s = 0.0
+            self.by_command: Dict[str, Dict[str, Any]] = {}
+            self.by_site: Dict[str, Dict[str, Any]] = {}
+
+    def report(self, label: str = "upload") -> Dict[str, Any]:
+        """
+        Summarize the commands since the last reset and check the budget.
+
+        Args:
+            label: What was measured, for the log lines
+
+        Returns:
+            Totals plus per-command and per-site counts and timings,
+            busiest first
+        """
+        def summary(entries: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+            return {
+                key: dict(
+                    {k: v for k, v in entry.items() if k != "max_s"},
+                    total_s=round(entry["total_s"], 4),
+                    mean_ms=round(entry["total_s"] / entry["count"] * 1000, 2),
+                    max_ms=round(entry["max_s"] * 1000, 2),
+                )
+                for key, entry in sorted(entries.items(), key=lambda item: -item[1]["count"])
+            }
+
+        with self._lock:
+            report = {
+                "commands": self.total,
+                "seconds": round(self.total_s, 3),
+                "by_command": summary(self.by_command),
+                "by_site": summary(self.by_site),
+            }
+
+        logger.info(f"WebDriver commands for {label}: {report['commands']} in {report['seconds']:.2f}s")
+        for site, entry in list(report["by_site"].items())[:self.top_sites]:
+            logger.debug(f"  {entry['count']:>5} {entry['total_s']:>8.3f}s  {site}")
+        self._check_budget(report, label)
+        current_span().set_attributes(commands=report["commands"], command_seconds=report["seconds"])
+        return report
+
+    def _check_budget(self, report: Dict[str, Any], label: str):
+        """Warn about uploads and call sites over the configured budget."""
+        if self.max_commands and report["commands"] > self.max_commands:
+            logger.warning(
+                f"Command budget exceeded for {label}: {report['commands']} commands "
+                f"(budget {self.max_commands})"
+            )
+        if self.max_seconds and report["seconds"] > self.max_seconds:
+            logger.warning(
+                f"Command time budget exceeded for {label}: {report['seconds']:.1f}s "
+                f"(budget {self.max_seconds}s)"
+            )
+        if self.max_per_site:
+            for site, entry in report["by_site"].items():
+                if entry["count"] <= self.max_per_site:
+                    break
+                busiest = max(entry["commands"], key=entry["commands"].get)
+                logger.warning(
+                    f"Chatty call site {site}: {entry['count']} commands "
+                    f"(mostly {busiest}, budget {self.max_per_site})"
+                )
+
+
+def reset_commands(driver: WebDriver):
+    """Start a new command report on a driver created by BrowserManager (no-op otherwise)."""
+    monitor = getattr(driver, "command_monitor", None)
+    if monitor:
+        monitor.reset()
+
+
+def report_commands(driver: WebDriver, label: str = "upload") -> Optional[Dict[str, Any]]:
+    """Command report since the last reset on a driver created by BrowserManager (None otherwise)."""
+    monitor = getattr(driver, "command_monitor", None)
+    if monitor:
+        return monitor.report(label)
+    return None
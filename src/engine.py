@@ -0,0 +1,393 @@
+"""
+Multi-Account Engine Module
+Runs uploads for many accounts in parallel, one worker process per browser.
+"""
+
+import multiprocessing
+import os
+import queue
+import socket
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from batch import BatchItem, BatchResult, upload_error
+from jobstore import JobStore
+from tracing import flush_traces, setup_tracing
+from utils import get_available_memory_mb, setup_logging
+
+
+def get_accounts(config: dict) -> Dict[str, dict]:
+    """
+    Read account definitions from config, filling in per-account defaults.
+
+    Every account gets its own cookie jar and Chrome profile so that workers
+    never share browser state.
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        Mapping of account name to account settings
+    """
+    accounts = {}
+    for entry in config.get("accounts", []) or []:
+        name = entry["name"]
+        accounts[name] = {
+            "name": name,
+            "cookie_file": entry.get("cookie_file") or f"data/cookies/{name}.json",
+            "user_data_dir": entry.get("user_data_dir") or f"./chrome_profiles/{name}",
+            "max_concurrency": max(1, int(entry.get("max_concurrency", 1))),
+        }
+    return accounts
+
+
+def _profile_dir(account: dict, slot: int) -> str:
+    """Profile directory for a worker slot (slots beyond the first get their own copy)."""
+    if slot == 0:
+        return account["user_data_dir"]
+    return str(Path(account["user_data_dir"]).with_name(f"{Path(account['user_data_dir']).name}_{slot}"))
+
+
+def _account_worker(account: dict, slot: int, config: dict, jobs, results, db_path: Optional[str] = None):
+    """
+    Worker process: owns one browser and uploads jobs for a single account.
+
+    Jobs come either from the account's queue (until a None sentinel) or, if
+    ``db_path`` is given, are claimed from the durable job store until none
+    are left. If the browser or login fails, jobs are reported as failed
+    rather than left in the queue.
+    """
+    from browser import BrowserManager
+    from jobstore import JobStore
+    from profiles import ProfileCloner
+    from refresher import needs_refresh, refresh_session
+    from uploader import TikTokUploader
+    from vault import CookieVault
+
+    setup_logging(config.get("logging", {}))
+    setup_tracing(config.get("tracing", {}))
+    name = account["name"]
+    logger.info(f"[{name}#{slot}] Worker started (pid {os.getpid()})")
+
+    store = JobStore(config, db_path=db_path) if db_path else None
+    # The first worker of each account keeps its session from expiring
+    refresh_config = config.get("refresh", {})
+    refresh_window = refresh_config.get("window_hours", 24) * 3600
+    vault = CookieVault(config) if slot == 0 and refresh_config.get("enabled", True) else None
+
+    def next_job() -> Optional[dict]:
+        if store:
+            return store.claim(account=name)
+        return jobs.get()
+
+    # With cloning, every slot runs on a fresh copy of the account's profile
+    cloner = ProfileCloner(config)
+    if cloner.enabled:
+        browser_args = cloner.browser_args(f"{name}_{slot}", template=account["user_data_dir"])
+    else:
+        browser_args = {"user_data_dir": _profile_dir(account, slot)}
+    manager = BrowserManager(config["browser"], **browser_args)
+    uploader = None
+    error = ""
+    try:
+        driver = manager.create_driver()
+        uploader = TikTokUploader(driver, config, cookie_file=account["cookie_file"])
+        if not uploader.login_manager.ensure_logged_in():
+            error = "not logged in"
+    except Exception as e:
+        logger.error(f"[{name}#{slot}] Browser startup failed: {e}")
+        error = f"browser startup failed: {e}"
+
+    if store and error:
+        # Leave the jobs queued for a later run instead of burning attempts
+        logger.error(f"[{name}#{slot}] {error}, not claiming jobs")
+        manager.close()
+        store.close()
+        return
+
+    check_login = False
+    try:
+        while True:
+            job = next_job()
+            if job is None:
+                break
+
+            start_time = time.time()
+            if error:
+                results.put(BatchResult(job["path"], False, 0.0, error, name))
+                continue
+
+            stages: List[str] = []
+
+            def on_stage(stage: str):
+                if store:
+                    store.set_state(job["id"], stage)
+                stages.append(stage)
+
+            try:
+                success = uploader.upload_video(
+                    video_path=job["path"],
+                    title=job["title"],
+                    tags=job["tags"],
+                    check_login=check_login,
+                    on_stage=on_stage
+                )
+                job_error = upload_error(success, stages)
+            except Exception as e:
+                logger.exception(f"[{name}#{slot}] Unexpected error uploading {job['path']}: {e}")
+                success, job_error = False, str(e)
+
+            if store:
+                store.finish(job["id"], success, job_error)
+            check_login = not success
+            results.put(BatchResult(job["path"], success, time.time() - start_time, job_error, name))
+            
+            if vault and needs_refresh(vault, account["cookie_file"], refresh_window):
+                logger.info(f"[{name}#{slot}] Session expires soon, refreshing")
+                refresh_session(uploader.login_manager)
+    finally:
+        manager.close()
+        if store:
+            store.close()
+        if vault:
+            vault.close()
+        # Worker processes skip atexit handlers, so export spans explicitly
+        flush_traces()
+        logger.info(f"[{name}#{slot}] Worker finished")
+
+
+class MultiAccountEngine:
+    """
+    Routes upload jobs to per-account worker processes.
+
+    Jobs are grouped by account into per-account queues. Each account runs up
+    to ``max_concurrency`` workers, and the total number of live workers is
+    capped by CPU count and available memory.
+    """
+
+    def __init__(self, config: dict):
+        """
+        Initialize MultiAccountEngine.
+
+        Args:
+            config: Application configuration (needs an ``accounts`` list)
+        """
+        self.config = config
+        self.accounts = get_accounts(config)
+        engine_config = config.get("engine", {})
+        self.max_workers = engine_config.get("max_workers") or os.cpu_count() or 1
+        self.browser_memory_mb = engine_config.get("browser_memory_mb", 800)
+        self.reserve_memory_mb = engine_config.get("reserve_memory_mb", 1024)
+        self.default_account = engine_config.get("default_account") or next(iter(self.accounts), "")
+        self.http_check = config.get("login", {}).get("http_check", True)
+
+    def worker_limit(self) -> int:
+        """Maximum number of concurrent workers given CPU and RAM caps."""
+        limit = self.max_workers
+        available = get_available_memory_mb()
+        if available is not None and self.browser_memory_mb:
+            by_memory = int((available - self.reserve_memory_mb) // self.browser_memory_mb)
+            limit = min(limit, max(1, by_memory))
+        return limit
+
+    def check_sessions(self, names: List[str]) -> List[str]:
+        """
+        Check the cookie jars of the given accounts over HTTP, in parallel.
+
+        Args:
+            names: Accounts about to get workers
+
+        Returns:
+            Accounts whose saved session is known to be logged out
+        """
+        if not self.http_check or not names:
+            return []
+
+        from login import check_cookie_sessions
+
+        start_time = time.time()
+        states = check_cookie_sessions({name: self.accounts[name]["cookie_file"] for name in names}, self.config)
+        expired = [name for name, state in states.items() if state is False]
+        logger.info(
+            f"Session pre-check: {len(names) - len(expired)}/{len(names)} accounts usable "
+            f"({time.time() - start_time:.2f}s)"
+        )
+        for name in expired:
+            logger.error(f"[{name}] Saved session is logged out, re-export its cookies")
+        return expired
+
+    def assign_accounts(self, items: List[BatchItem]) -> List[BatchResult]:
+        """
+        Fill in the default account and reject items for unknown accounts.
+
+        Args:
+            items: Items to route (updated in place)
+
+        Returns:
+            Failed results for items whose account is not configured
+        """
+        rejected = []
+        for item in items:
+            item.account = item.account or self.default_account
+            if item.account not in self.accounts:
+                logger.error(f"Unknown account '{item.account}' for {item.path}")
+                rejected.append(BatchResult(item.path, False, 0.0, "unknown account", item.account))
+        return rejected
+
+    def run(self, items: List[BatchItem]) -> List[BatchResult]:
+        """
+        Upload all items, routing each to its account's workers.
+
+        Args:
+            items: Videos to upload; items without an account go to the default
+
+        Returns:
+            Per-item results (in completion order)
+        """
+        results = self.assign_accounts(items)
+        expired = self.check_sessions(sorted({i.account for i in items if i.account in self.accounts}))
+
+        # Route jobs to per-account queues
+        ctx = multiprocessing.get_context("spawn")
+        job_queues = {}
+        counts: Dict[str, int] = {}
+        for item in items:
+            if item.account not in self.accounts:
+                continue
+            if item.account in expired:
+                results.append(BatchResult(item.path, False, 0.0, "session expired", item.account))
+                continue
+            if item.account not in job_queues:
+                job_queues[item.account] = ctx.Queue()
+            job_queues[item.account].put(asdict(item))
+            counts[item.account] = counts.get(item.account, 0) + 1
+
+        results.extend(self._schedule(ctx, counts, job_queues))
+        return results
+
+    def run_queue(self, store: JobStore) -> List[BatchResult]:
+        """
+        Work the durable job store, one set of workers per account with jobs.
+
+        Workers claim jobs from the store themselves, so a killed run can be
+        resumed by running again.
+
+        Args:
+            store: Job store holding queued jobs
+
+        Returns:
+            Per-job results (in completion order)
+        """
+        store.release_dead_workers()
+        counts = {}
+        for name, count in store.pending_counts().items():
+            if name in self.accounts:
+                counts[name] = count
+            else:
+                logger.error(f"{count} queued jobs for unknown account '{name}' will be skipped")
+
+        # Jobs of logged-out accounts stay queued for a later run
+        for name in self.check_sessions(sorted(counts)):
+            del counts[name]
+
+        ctx = multiprocessing.get_context("spawn")
+        results = self._schedule(ctx, counts, None, store)
+        logger.info(f"Queue state: {store.summary()}")
+        return results
+
+    def _schedule(self, ctx, counts: Dict[str, int], job_queues: Optional[dict], store: Optional[JobStore] = None) -> List[BatchResult]:
+        """Start per-account workers within the global cap and collect their results."""
+        results: List[BatchResult] = []
+        result_queue = ctx.Queue()
+        db_path = str(store.db_path) if store else None
+
+        pending_slots: List[Tuple[str, int]] = []
+        for name, count in counts.items():
+            slots = min(self.accounts[name]["max_concurrency"], count)
+            for slot in range(slots):
+                if job_queues is not None:
+                    job_queues[name].put(None)
+                pending_slots.append((name, slot))
+
+        # Give every account its first worker before any account gets a second
+        pending_slots.sort(key=lambda pending: pending[1])
+
+        limit = self.worker_limit()
+        logger.info(
+            f"Engine: {sum(counts.values())} jobs, {len(counts)} accounts, "
+            f"{len(pending_slots)} worker slots, max {limit} concurrent"
+        )
+
+        # Only queue mode knows exactly how many results to expect; store
+        # mode may retry jobs within the run
+        outstanding = dict(counts) if job_queues is not None else None
+        running: Dict[Tuple[str, int], multiprocessing.process.BaseProcess] = {}
+
+        def collect(result: BatchResult):
+            if outstanding is not None:
+                outstanding[result.account] -= 1
+            results.append(result)
+
+        while pending_slots or running:
+            # Start workers up to the global cap
+            while pending_slots and len(running) < limit:
+                name, slot = pending_slots.pop(0)
+                jobs = job_queues[name] if job_queues is not None else None
+                process = ctx.Process(
+                    target=_account_worker,
+                    args=(self.accounts[name], slot, self.config, jobs, result_queue, db_path),
+                    name=f"worker-{name}-{slot}",
+                )
+                process.start()
+                running[(name, slot)] = process
+
+            # Collect results
+            try:
+                collect(result_queue.get(timeout=1))
+                continue
+            except queue.Empty:
+                pass
+
+            # Reap finished workers
+            for key, process in list(running.items()):
+                if process.is_alive():
+                    continue
+                process.join()
+                del running[key]
+                name = key[0]
+                if process.exitcode != 0:
+                    logger.error(f"Worker {process.name} exited with code {process.exitcode}")
+                    if store:
+                        store.release_worker(f"{socket.gethostname()}:{process.pid}")
+                still_serving = any(k[0] == name for k in running) or any(k[0] == name for k in pending_slots)
+                if job_queues is not None and not still_serving:
+                    results.extend(self._fail_remaining(name, job_queues[name], outstanding))
+
+        # Results may still be in flight after the last worker exits
+        while outstanding is None or any(outstanding.values()):
+            try:
+                collect(result_queue.get(timeout=1))
+            except queue.Empty:
+                break
+
+        return results
+
+    def _fail_remaining(self, name: str, jobs, outstanding: Dict[str, int]) -> List[BatchResult]:
+        """Mark jobs left behind by crashed workers of an account as failed."""
+        failed = []
+        while True:
+            try:
+                job = jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                continue
+            outstanding[name] -= 1
+            failed.append(BatchResult(job["path"], False, 0.0, "worker crashed", name))
+        if failed:
+            logger.error(f"[{name}] {len(failed)} jobs failed because all workers exited")
+        return failed
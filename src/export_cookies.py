@@ -3,6 +3,7 @@ Export Cookies Script
 Login to TikTok and save cookies for Docker deployment.
 """
 
+import argparse
 import sys
 import time
 from pathlib import Path
@@ -10,15 +11,35 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from browser import BrowserManager
+from engine import get_accounts
 from login import LoginManager
 from utils import load_config, setup_logging
 from loguru import logger
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Export TikTok cookies")
+    parser.add_argument(
+        "--account",
+        type=str,
+        default=None,
+        help="Account name from config 'accounts' (uses its profile and cookie file)"
+    )
+    args = parser.parse_args()
+    
     config = load_config("config/config.yaml")
     setup_logging(config.get("logging", {}))
     
+    cookie_file = "data/cookies/tiktok_cookies.json"
+    user_data_dir = None
+    if args.account:
+        account = get_accounts(config).get(args.account)
+        if not account:
+            logger.error(f"Unknown account: {args.account}")
+            return 1
+        cookie_file = account["cookie_file"]
+        user_data_dir = account["user_data_dir"]
+    
     logger.info("=" * 60)
     logger.info("TikTok Cookie Exporter")
     logger.info("=" * 60)
@@ -29,10 +50,10 @@ def main():
     
     browser_manager = None
     try:
-        browser_manager = BrowserManager(config["browser"])
+        browser_manager = BrowserManager(config["browser"], user_data_dir=user_data_dir)
         driver = browser_manager.create_driver()
         
-        login_manager = LoginManager(driver, config)
+        login_manager = LoginManager(driver, config, cookie_file=cookie_file)
         
         # Navigate to TikTok
         logger.info("Opening TikTok...")
@@ -51,7 +72,6 @@ def main():
         time.sleep(2)
         
         # Save cookies
-        cookie_file = "data/cookies/tiktok_cookies.json"
         if login_manager.save_cookies(cookie_file):
             logger.success(f"Cookies saved to {cookie_file}")
             logger.info("")
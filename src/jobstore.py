@@ -0,0 +1,353 @@
+"""
+Job Store Module
+Durable SQLite-backed upload queue with crash-resumable job state.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+
+# Job states in pipeline order
+QUEUED = "queued"
+UPLOADING = "uploading"
+CAPTION_FILLED = "caption_filled"
+POSTING = "posting"
+POSTED = "posted"
+VERIFIED = "verified"
+FAILED = "failed"
+
+STATES = (QUEUED, UPLOADING, CAPTION_FILLED, POSTING, POSTED, VERIFIED, FAILED)
+
+# States in which an interrupted job can safely be started over. "posting" is
+# recorded right before the Post click: from then on the video may be live,
+# so the job is never uploaded again.
+RESTARTABLE_STATES = (QUEUED, UPLOADING, CAPTION_FILLED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_key TEXT NOT NULL UNIQUE,
+    path TEXT NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    tags TEXT NOT NULL DEFAULT '[]',
+    account TEXT NOT NULL DEFAULT '',
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    error TEXT NOT NULL DEFAULT '',
+    timings TEXT NOT NULL DEFAULT '{}',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (state, account, lease_until);
+"""
+
+
+def default_worker_id() -> str:
+    """Identify the current process as host:pid."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_alive(pid: int) -> bool:
+    """Check whether a process with this pid exists on this host."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """
+    Persistent upload job queue.
+
+    Jobs move through queued -> uploading -> caption_filled -> posting ->
+    posted -> verified (or failed). Workers claim jobs atomically with a
+    lease; if a worker dies, its lease expires and the job can be claimed
+    again. Jobs that already reached "posting" are never re-uploaded.
+    """
+
+    DB_FILE = "data/jobs.db"
+
+    def __init__(self, config: dict, db_path: Optional[str] = None):
+        """
+        Initialize JobStore.
+
+        Args:
+            config: Application configuration
+            db_path: SQLite file (defaults to jobs.db_path in config)
+        """
+        jobs_config = config.get("jobs", {})
+        self.db_path = Path(db_path or jobs_config.get("db_path") or self.DB_FILE)
+        self.max_attempts = jobs_config.get("max_attempts", 3)
+        self.lease_seconds = jobs_config.get("lease_seconds", 1800)
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode; transactions are opened explicitly where needed.
+        # The connection may be shared by pool threads, so access is serialized.
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(
+            str(self.db_path), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    @staticmethod
+    def _job_key(path: str, title: str, tags: List[str], account: str) -> str:
+        """Stable identity of a job, so re-enqueuing a manifest does not duplicate it."""
+        raw = json.dumps([str(Path(path).resolve()), title, list(tags), account])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def enqueue(self, path: str, title: str = "", tags: Optional[List[str]] = None, account: str = "") -> bool:
+        """
+        Add a job unless an identical one already exists.
+
+        Args:
+            path: Video file path
+            title: Video title/caption
+            tags: Hashtags (without #)
+            account: Account to post as
+
+        Returns:
+            True if a new job was added
+        """
+        with self._lock:
+            tags = list(tags or [])
+            now = time.time()
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO jobs (job_key, path, title, tags, account, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._job_key(path, title, tags, account), path, title, json.dumps(tags), account, now, now)
+            )
+            return cursor.rowcount == 1
+
+    def claim(self, worker_id: Optional[str] = None, account: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Atomically claim the next runnable job.
+
+        A job is runnable if it is queued, or was interrupted before posting
+        and its lease has expired, and it has attempts left.
+
+        Args:
+            worker_id: Identity recorded on the lease
+            account: Only claim jobs for this account
+
+        Returns:
+            The claimed job, or None if nothing is runnable
+        """
+        with self._lock:
+            worker_id = worker_id or default_worker_id()
+            now = time.time()
+            placeholders = ", ".join("?" for _ in RESTARTABLE_STATES)
+            query = (
+                f"SELECT * FROM jobs WHERE state IN ({placeholders}) "
+                "AND (lease_until IS NULL OR lease_until < ?) AND attempts < ?"
+            )
+            params: list = [*RESTARTABLE_STATES, now, self.max_attempts]
+            if account is not None:
+                query += " AND account = ?"
+                params.append(account)
+            query += " ORDER BY id LIMIT 1"
+
+            # BEGIN IMMEDIATE takes the write lock up front, so two workers can
+            # never select the same row
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs that crashed on their last attempt will never be claimed again
+                self.conn.execute(
+                    f"UPDATE jobs SET state = ?, error = 'attempts exhausted', updated_at = ? "
+                    f"WHERE state IN ({placeholders}) AND attempts >= ? "
+                    "AND (lease_until IS NULL OR lease_until < ?)",
+                    (FAILED, now, *RESTARTABLE_STATES, self.max_attempts, now)
+                )
+                row = self.conn.execute(query, params).fetchone()
+                if row is None:
+                    self.conn.execute("COMMIT")
+                    return None
+
+                if row["state"] != QUEUED:
+                    logger.warning(f"Resuming job {row['id']} interrupted in state '{row['state']}'")
+
+                timings = json.loads(row["timings"])
+                timings.setdefault("claimed", []).append(now)
+                self.conn.execute(
+                    "UPDATE jobs SET state = ?, attempts = attempts + 1, worker = ?, lease_until = ?, "
+                    "timings = ?, updated_at = ? WHERE id = ?",
+                    (QUEUED, worker_id, now + self.lease_seconds, json.dumps(timings), now, row["id"])
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+            job = self._to_job(row)
+            job["attempts"] += 1
+            return job
+
+    def set_state(self, job_id: int, state: str, error: str = ""):
+        """
+        Record a state transition, its timestamp and renew the lease.
+
+        Args:
+            job_id: Job id
+            state: New state
+            error: Error message (for failed jobs)
+        """
+        with self._lock:
+            if state not in STATES:
+                raise ValueError(f"Unknown job state: {state}")
+
+            now = time.time()
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute("SELECT timings FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                timings = json.loads(row["timings"]) if row else {}
+                timings[state] = now
+
+                finished = state in (POSTED, VERIFIED, FAILED)
+                self.conn.execute(
+                    "UPDATE jobs SET state = ?, error = ?, timings = ?, updated_at = ?, "
+                    "lease_until = ? WHERE id = ?",
+                    (state, error, json.dumps(timings), now, None if finished else now + self.lease_seconds, job_id)
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def finish(self, job_id: int, success: bool, error: str = ""):
+        """
+        Close out a claimed job after an upload attempt.
+
+        Failed attempts go back to the queue until max_attempts is reached.
+
+        Args:
+            job_id: Job id
+            success: Whether the upload succeeded
+            error: Error message for failures
+        """
+        with self._lock:
+            if success:
+                row = self.conn.execute("SELECT state FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if row and row["state"] not in (POSTED, VERIFIED):
+                    self.set_state(job_id, VERIFIED)
+                return
+
+            row = self.conn.execute("SELECT state, attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row and row["state"] in (POSTED, VERIFIED):
+                # Post went through; only the confirmation failed
+                return
+            if row and row["state"] == POSTING:
+                # Failed somewhere around the Post click: it may be live
+                self.set_state(job_id, FAILED, f"{error}; may have been posted, check before re-queueing")
+                return
+            if row and row["attempts"] < self.max_attempts:
+                self.conn.execute(
+                    "UPDATE jobs SET state = ?, error = ?, lease_until = NULL, updated_at = ? WHERE id = ?",
+                    (QUEUED, error, time.time(), job_id)
+                )
+            else:
+                self.set_state(job_id, FAILED, error)
+
+    def release_worker(self, worker_id: str) -> int:
+        """
+        Expire the leases held by a worker known to be dead.
+
+        Args:
+            worker_id: Worker identity used when claiming
+
+        Returns:
+            Number of jobs released
+        """
+        with self._lock:
+            placeholders = ", ".join("?" for _ in RESTARTABLE_STATES)
+            cursor = self.conn.execute(
+                f"UPDATE jobs SET lease_until = NULL, updated_at = ? "
+                f"WHERE worker = ? AND state IN ({placeholders})",
+                (time.time(), worker_id, *RESTARTABLE_STATES)
+            )
+            return cursor.rowcount
+
+    def release_dead_workers(self) -> int:
+        """
+        Release leases held by processes on this host that are no longer running.
+
+        Lets a killed run be resumed immediately instead of waiting for its
+        leases to expire.
+
+        Returns:
+            Number of jobs released
+        """
+        host = socket.gethostname()
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT worker FROM jobs WHERE lease_until IS NOT NULL AND worker LIKE ?",
+                (f"{host}:%",)
+            ).fetchall()
+
+        released = 0
+        for row in rows:
+            worker = row["worker"]
+            try:
+                pid = int(worker.split(":")[1])
+            except (IndexError, ValueError):
+                continue
+            if pid == os.getpid() or _pid_alive(pid):
+                continue
+            released += self.release_worker(worker)
+
+        if released:
+            logger.info(f"Released {released} jobs held by dead workers")
+        return released
+
+    def pending_counts(self) -> Dict[str, int]:
+        """
+        Count runnable jobs per account (ignoring leases).
+
+        Returns:
+            Mapping of account name to job count
+        """
+        with self._lock:
+            placeholders = ", ".join("?" for _ in RESTARTABLE_STATES)
+            rows = self.conn.execute(
+                f"SELECT account, COUNT(*) AS n FROM jobs WHERE state IN ({placeholders}) "
+                "AND attempts < ? GROUP BY account",
+                (*RESTARTABLE_STATES, self.max_attempts)
+            ).fetchall()
+            return {row["account"]: row["n"] for row in rows}
+
+    def summary(self) -> Dict[str, int]:
+        """
+        Count jobs per state.
+
+        Returns:
+            Mapping of state to job count
+        """
+        with self._lock:
+            rows = self.conn.execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state").fetchall()
+            return {row["state"]: row["n"] for row in rows}
+
+    def _to_job(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a database row into a job dictionary."""
+        job = dict(row)
+        job["tags"] = json.loads(job["tags"])
+        job["timings"] = json.loads(job["timings"])
+        return job
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
@@ -3,117 +3,430 @@ Login Module
 Handles TikTok authentication via cookies or browser session.
 """
 
-import json
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import DefaultCookiePolicy
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 
+import requests
 from selenium.webdriver.remote.webdriver import WebDriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from loguru import logger
 
+from blocking import report_page, use_profile
+from readiness import LOGIN_INDICATORS, wait_until_ready
+from tracing import current_span, traced
+from vault import CookieVault
+from waits import WaitPolicy
+
+
+# Cookie jars come from Selenium (get_cookies) or from browser extensions,
+# which spell sameSite differently
+SAME_SITE_VALUES = {
+    "strict": "Strict",
+    "lax": "Lax",
+    "none": "None",
+    "no_restriction": "None",
+}
+
+
+def to_cdp_cookie(cookie: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Convert a saved cookie to a CDP Network.CookieParam.
+
+    Args:
+        cookie: Cookie as saved by save_cookies or a browser extension
+
+    Returns:
+        (cookie param, "") or (None, reason the browser would reject it)
+    """
+    name = cookie.get("name")
+    domain = cookie.get("domain")
+    if not name or cookie.get("value") is None:
+        return None, "missing name or value"
+    if not domain:
+        return None, "missing domain"
+
+    param: Dict[str, Any] = {
+        "name": name,
+        "value": cookie["value"],
+        "path": cookie.get("path") or "/",
+        "secure": bool(cookie.get("secure", False)),
+        "httpOnly": bool(cookie.get("httpOnly", False)),
+    }
+    # Selenium stores host-only cookies without the leading dot and has no
+    # hostOnly flag; setting "domain" would widen them to every subdomain
+    if cookie.get("hostOnly", not domain.startswith(".")):
+        scheme = "https" if param["secure"] else "http"
+        param["url"] = f"{scheme}://{domain.lstrip('.')}{param['path']}"
+    else:
+        param["domain"] = domain
+
+    expires = cookie.get("expiry", cookie.get("expirationDate"))
+    if expires is not None and not cookie.get("session"):
+        if expires < time.time():
+            return None, "expired"
+        param["expires"] = expires
+
+    same_site = SAME_SITE_VALUES.get(str(cookie.get("sameSite", "")).lower())
+    if same_site:
+        if same_site == "None" and not param["secure"]:
+            return None, "sameSite=None requires secure"
+        param["sameSite"] = same_site
+
+    if name.startswith(("__Secure-", "__Host-")) and not param["secure"]:
+        return None, f"{name.split('-')[0]}- prefix requires secure"
+
+    for key in ("partitionKey", "priority", "sameParty", "sourceScheme", "sourcePort"):
+        if cookie.get(key) not in (None, ""):
+            param[key] = cookie[key]
+
+    return param, ""
+
+
+SESSION_CHECK_URL = "https://www.tiktok.com/passport/web/account/info/"
+DEFAULT_CRITICAL_COOKIES = ["sessionid", "sid_tt", "sid_guard"]
+
+_http_session: Optional[requests.Session] = None
+_http_lock = threading.Lock()
+
+
+def _get_http_session() -> requests.Session:
+    """
+    Shared connection pool for session checks.
+
+    The session never stores cookies itself: every request carries its own
+    account's jar in the Cookie header, so accounts cannot leak into each other.
+    """
+    global _http_session
+    with _http_lock:
+        if _http_session is None:
+            session = requests.Session()
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=32)
+            session.mount("https://", adapter)
+            _http_session = session
+        return _http_session
+
+
+def check_cookie_session(cookie_file: str, config: dict) -> Optional[bool]:
+    """
+    Check whether a saved cookie jar is still logged in, without a browser.
+
+    Missing or expired session cookies are caught locally; otherwise the jar
+    is sent to TikTok's account info endpoint.
+
+    Args:
+        cookie_file: Cookie jar saved by save_cookies / export_cookies.py
+        config: Application configuration
+
+    Returns:
+        True if logged in, False if not, None if the check was inconclusive
+        (network error, unexpected response)
+    """
+    login_config = config.get("login", {})
+    critical = set(login_config.get("critical_cookies", DEFAULT_CRITICAL_COOKIES))
+    user_agent = config.get("browser", {}).get("user_agent", "Mozilla/5.0")
+
+    path = Path(cookie_file)
+    if not path.exists():
+        logger.warning(f"Cookie file not found: {path}")
+        return False
+    try:
+        cookies = CookieVault(config).load(str(path))
+    except Exception as e:
+        logger.error(f"Could not read {path}: {e}")
+        return False
+
+    check_url = login_config.get("session_check_url", SESSION_CHECK_URL)
+    host = urlparse(check_url).hostname or ""
+    now = time.time()
+    jar = {}
+    for cookie in cookies:
+        expires = cookie.get("expiry", cookie.get("expirationDate"))
+        if expires is not None and expires < now:
+            continue
+        # Send what a browser would send to the check URL's host
+        domain = (cookie.get("domain") or "").lstrip(".")
+        if domain and (host == domain or host.endswith(f".{domain}")) and cookie.get("name"):
+            jar[cookie["name"]] = cookie.get("value", "")
+
+    if critical and not critical & jar.keys():
+        logger.info(f"{path.name}: no valid session cookie")
+        return False
+
+    try:
+        response = _get_http_session().get(
+            check_url,
+            headers={
+                "Cookie": "; ".join(f"{k}={v}" for k, v in jar.items()),
+                "User-Agent": user_agent,
+                "Accept": "application/json",
+            },
+            timeout=login_config.get("session_check_timeout", 10),
+            allow_redirects=False,
+        )
+        data = response.json()
+    except (requests.RequestException, ValueError) as e:
+        logger.debug(f"{path.name}: session check inconclusive: {e}")
+        return None
+
+    account = data.get("data") if isinstance(data, dict) else None
+    if isinstance(account, dict) and (account.get("user_id") or account.get("username")):
+        return True
+    if isinstance(data, dict) and data.get("message") == "error":
+        return False
+    return None
+
+
+def check_cookie_sessions(cookie_files: Dict[str, str], config: dict) -> Dict[str, Optional[bool]]:
+    """
+    Run check_cookie_session for many accounts in parallel.
+
+    Args:
+        cookie_files: Mapping of account name to cookie file
+        config: Application configuration
+
+    Returns:
+        Mapping of account name to check result
+    """
+    if not cookie_files:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(16, len(cookie_files))) as executor:
+        futures = {
+            name: executor.submit(check_cookie_session, cookie_file, config)
+            for name, cookie_file in cookie_files.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
 
 class LoginManager:
     """Manages TikTok login and session handling."""
     
     COOKIE_FILE = "data/cookies/tiktok_cookies.json"
     
-    def __init__(self, driver: WebDriver, config: dict):
+    def __init__(self, driver: WebDriver, config: dict, cookie_file: Optional[str] = None):
         """
         Initialize LoginManager.
         
         Args:
             driver: Selenium WebDriver instance
             config: Application configuration
+            cookie_file: Cookie jar for this account (defaults to login.cookie_file,
+                then COOKIE_FILE)
         """
         self.driver = driver
         self.config = config
+        self.cookie_file = cookie_file or config.get("login", {}).get("cookie_file") or self.COOKIE_FILE
+        self.vault = CookieVault(config)
         self.base_url = config.get("tiktok", {}).get("base_url", "https://www.tiktok.com")
         
-    def is_logged_in(self) -> bool:
+        login_config = config.get("login", {})
+        self.cache_ttl = login_config.get("cache_ttl", 600)
+        self.critical_cookies = set(login_config.get("critical_cookies", DEFAULT_CRITICAL_COOKIES))
+        self.waits = WaitPolicy(config)
+        # Login state cache: a positive check is trusted until this time
+        self._logged_in_until = 0.0
+        
+    def is_logged_in(self, use_cache: bool = True) -> bool:
         """
         Check if user is currently logged in.
         
+        A positive result is cached for ``login.cache_ttl`` seconds, but never
+        past the expiry of the critical session cookies.
+        
+        Args:
+            use_cache: Return the cached state if it is still valid
+        
         Returns:
             True if logged in, False otherwise
         """
+        if use_cache and time.time() < self._logged_in_until:
+            logger.debug("Login state cached, skipping check")
+            return True
+            
         try:
+            use_profile(self.driver, "login-check")
             self.driver.get(self.base_url)
-            time.sleep(3)
-            
-            # Check for login indicators (avatar, profile elements)
-            # TikTok's DOM changes frequently, so we check multiple indicators
-            login_indicators = [
-                '[data-e2e="profile-icon"]',
-                '[data-e2e="nav-profile"]',
-                'a[href*="/profile"]'
-            ]
             
-            for selector in login_indicators:
-                try:
-                    element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    if element:
-                        logger.info("User is logged in")
-                        return True
-                except:
-                    continue
+            # Wait until the header shows either the profile icon or the
+            # login button, then read the login indicators from that snapshot
+            snapshot = wait_until_ready(self.driver, "login-state-known", self.waits)
+            report_page(self.driver, "home")
+            if any(snapshot[selector].found for selector in LOGIN_INDICATORS):
+                logger.info("User is logged in")
+                self._cache_login_state()
+                return True
                     
             logger.warning("User is not logged in")
+            self.invalidate()
             return False
             
         except Exception as e:
             logger.error(f"Error checking login status: {e}")
+            self.invalidate()
             return False
     
+    def _cache_login_state(self):
+        """Trust the login for the TTL or until a critical cookie expires."""
+        until = time.time() + self.cache_ttl
+        try:
+            for cookie in self.driver.get_cookies():
+                if cookie.get("name") in self.critical_cookies and cookie.get("expiry"):
+                    until = min(until, cookie["expiry"])
+        except Exception as e:
+            logger.debug(f"Could not read cookie expiry: {e}")
+        self._logged_in_until = until
+    
+    def invalidate(self, reason: str = ""):
+        """
+        Forget the cached login state so the next check hits the page.
+        
+        Args:
+            reason: Logged if a valid cached state is dropped
+        """
+        if reason and self._logged_in_until > time.time():
+            logger.info(f"Login state invalidated: {reason}")
+        self._logged_in_until = 0.0
+    
+    @staticmethod
+    def is_auth_url(url: str) -> bool:
+        """True if the URL is a login/auth page (the session was rejected)."""
+        url = (url or "").lower()
+        return "/login" in url or "passport" in url or "/signup" in url
+    
+    def check_session(self, cookie_file: Optional[str] = None) -> Optional[bool]:
+        """
+        Check the saved cookie jar over HTTP, without touching the browser.
+        
+        Args:
+            cookie_file: Cookie jar to check (defaults to this account's)
+            
+        Returns:
+            True if logged in, False if not, None if inconclusive
+        """
+        return check_cookie_session(cookie_file or self.cookie_file, self.config)
+    
+    def _has_session_cookie(self) -> bool:
+        """Check for a critical session cookie without navigating."""
+        try:
+            return any(c.get("name") in self.critical_cookies for c in self.driver.get_cookies())
+        except Exception:
+            return False
+    
+    @traced()
     def load_cookies(self, cookie_file: Optional[str] = None) -> bool:
         """
         Load cookies from file to restore session.
         
+        Locally the whole jar is installed with one CDP Network.setCookies
+        call before any navigation; the next page load picks it up. Drivers
+        without CDP (remote) fall back to add_cookie per cookie.
+        
         Args:
             cookie_file: Path to cookie file (JSON format)
             
         Returns:
             True if cookies loaded successfully
         """
-        cookie_path = Path(cookie_file or self.COOKIE_FILE)
+        cookie_path = Path(cookie_file or self.cookie_file)
         
         if not cookie_path.exists():
             logger.warning(f"Cookie file not found: {cookie_path}")
             return False
             
         try:
-            # First navigate to TikTok domain
-            self.driver.get(self.base_url)
-            time.sleep(2)
-            
-            # Load and add cookies
-            with open(cookie_path, "r") as f:
-                cookies = json.load(f)
+            cookies = self.vault.load(str(cookie_path))
                 
-            for cookie in cookies:
-                # Remove problematic fields
-                cookie.pop("sameSite", None)
-                cookie.pop("storeId", None)
-                try:
-                    self.driver.add_cookie(cookie)
-                except Exception as e:
-                    logger.debug(f"Could not add cookie: {e}")
-                    
-            logger.info(f"Loaded {len(cookies)} cookies from {cookie_path}")
-            
-            # Refresh to apply cookies
-            self.driver.refresh()
-            time.sleep(3)
-            
-            return True
+            if hasattr(self.driver, "execute_cdp_cmd"):
+                loaded = self._set_cookies_cdp(cookies)
+            else:
+                loaded = self._add_cookies_webdriver(cookies)
+            current_span().set_attributes(
+                cookies=len(cookies), loaded=loaded,
+                method="cdp" if hasattr(self.driver, "execute_cdp_cmd") else "webdriver",
+            )
+                
+            logger.info(f"Loaded {loaded}/{len(cookies)} cookies from {cookie_path}")
+            return loaded > 0
             
         except Exception as e:
             logger.error(f"Error loading cookies: {e}")
             return False
     
+    def _set_cookies_cdp(self, cookies: List[Dict[str, Any]]) -> int:
+        """Install cookies in one Network.setCookies call; returns how many were set."""
+        params = []
+        rejected: List[Tuple[str, str]] = []
+        for cookie in cookies:
+            param, reason = to_cdp_cookie(cookie)
+            if param is None:
+                rejected.append((cookie.get("name", "?"), reason))
+            else:
+                params.append(param)
+                
+        try:
+            self.driver.execute_cdp_cmd("Network.setCookies", {"cookies": params})
+            installed = len(params)
+        except Exception as e:
+            # One bad cookie fails the whole batch; set them one by one to
+            # find out which
+            logger.debug(f"Network.setCookies failed ({e}), retrying per cookie")
+            installed = 0
+            for param in params:
+                try:
+                    self.driver.execute_cdp_cmd("Network.setCookie", param)
+                    installed += 1
+                except Exception as cookie_error:
+                    rejected.append((param["name"], str(cookie_error).splitlines()[0]))
+                    
+        self._report_rejected(rejected)
+        return installed
+    
+    def _add_cookies_webdriver(self, cookies: List[Dict[str, Any]]) -> int:
+        """Fallback for drivers without CDP: add_cookie needs the domain open first."""
+        self.driver.get(self.base_url)
+        
+        installed = 0
+        rejected: List[Tuple[str, str]] = []
+        for cookie in cookies:
+            param, reason = to_cdp_cookie(cookie)
+            if param is None:
+                rejected.append((cookie.get("name", "?"), reason))
+                continue
+            webdriver_cookie = {
+                "name": param["name"],
+                "value": param["value"],
+                "path": param["path"],
+                "secure": param["secure"],
+                "httpOnly": param["httpOnly"],
+            }
+            if "domain" in param:
+                webdriver_cookie["domain"] = param["domain"]
+            if "expires" in param:
+                webdriver_cookie["expiry"] = int(param["expires"])
+            if "sameSite" in param:
+                webdriver_cookie["sameSite"] = param["sameSite"]
+            try:
+                self.driver.add_cookie(webdriver_cookie)
+                installed += 1
+            except Exception as e:
+                rejected.append((param["name"], str(e).splitlines()[0]))
+                
+        self._report_rejected(rejected)
+        return installed
+    
+    def _report_rejected(self, rejected: List[Tuple[str, str]]):
+        """Log cookies the browser did not accept."""
+        if not rejected:
+            return
+        logger.warning(f"{len(rejected)} cookies rejected")
+        for name, reason in rejected:
+            logger.warning(f"  {name}: {reason}")
+    
     def save_cookies(self, cookie_file: Optional[str] = None) -> bool:
         """
         Save current cookies to file.
@@ -124,13 +437,11 @@ class LoginManager:
         Returns:
             True if cookies saved successfully
         """
-        cookie_path = Path(cookie_file or self.COOKIE_FILE)
-        cookie_path.parent.mkdir(parents=True, exist_ok=True)
+        cookie_path = Path(cookie_file or self.cookie_file)
         
         try:
             cookies = self.driver.get_cookies()
-            with open(cookie_path, "w") as f:
-                json.dump(cookies, f, indent=2)
+            self.vault.save(str(cookie_path), cookies)
                 
             logger.info(f"Saved {len(cookies)} cookies to {cookie_path}")
             return True
@@ -156,10 +467,11 @@ class LoginManager:
         
         self.driver.get(login_url)
         
-        # Wait for user to complete login
+        # Wait for user to complete login; polling cookies does not navigate
+        # away from the login form
         start_time = time.time()
         while time.time() - start_time < timeout:
-            if self.is_logged_in():
+            if self._has_session_cookie() and self.is_logged_in(use_cache=False):
                 logger.success("Login successful!")
                 self.save_cookies()
                 return True
@@ -168,6 +480,7 @@ class LoginManager:
         logger.error("Login timeout exceeded")
         return False
     
+    @traced()
     def ensure_logged_in(self) -> bool:
         """
         Ensure user is logged in, trying cookies first then manual login.
@@ -175,11 +488,19 @@ class LoginManager:
         Returns:
             True if logged in
         """
+        if time.time() < self._logged_in_until:
+            logger.debug("Login state cached, skipping check")
+            return True
+            
         # Check if running in Docker (remote Selenium)
         is_docker = os.environ.get("SELENIUM_REMOTE_URL") is not None
         
         if is_docker:
             # In Docker: always load cookies first (remote browser has no session)
+            if Path(self.cookie_file).exists() and self.check_session() is False:
+                logger.error("Saved cookies are no longer logged in")
+                logger.error("Try re-exporting cookies with 'python src/export_cookies.py'")
+                return False
             logger.info("Docker mode: loading cookies...")
             if not self.load_cookies():
                 logger.error("No cookies found! Run 'python src/export_cookies.py' locally first")
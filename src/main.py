@@ -4,10 +4,18 @@ Mini TikTok Automation System - Main Entry Point
 
 import argparse
 from pathlib import Path
+from typing import List
 from loguru import logger
 
+from batch import BatchItem, BatchRunner, items_from_glob, load_manifest, log_results, write_results
 from browser import BrowserManager
+from engine import MultiAccountEngine
+from jobstore import JobStore
+from mock_tiktok import mock_config, start as start_mock
+from pool import BrowserPool
+from preflight import Preflight
 from uploader import TikTokUploader
+from tracing import setup_tracing
 from utils import load_config, setup_logging
 
 
@@ -16,12 +24,27 @@ def parse_args():
     parser = argparse.ArgumentParser(
         description="TikTok Video Auto Publisher"
     )
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
         "-v", "--video",
         type=str,
-        required=True,
         help="Path to the video file to upload"
     )
+    source.add_argument(
+        "-m", "--manifest",
+        type=str,
+        help="Batch mode: JSONL/CSV/YAML manifest listing path, title and tags"
+    )
+    source.add_argument(
+        "-g", "--glob",
+        type=str,
+        help="Batch mode: glob pattern or directory of videos (uses --title/--tags for all)"
+    )
+    source.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the jobs left in the durable queue by an earlier --queue run"
+    )
     parser.add_argument(
         "-t", "--title",
         type=str,
@@ -35,18 +58,79 @@ def parse_args():
         default=[],
         help="Hashtags for the video (without #)"
     )
+    parser.add_argument(
+        "--report",
+        type=str,
+        default=None,
+        help="Batch mode: write per-item results to this JSON file"
+    )
+    parser.add_argument(
+        "--pool",
+        type=int,
+        default=0,
+        help="Batch mode: upload in parallel through N warm browsers"
+    )
+    parser.add_argument(
+        "--accounts",
+        action="store_true",
+        help="Batch mode: route items to per-account worker processes (see 'accounts' in config)"
+    )
+    parser.add_argument(
+        "--queue",
+        action="store_true",
+        help="Batch mode: track jobs in the durable SQLite queue so a crashed run can be resumed"
+    )
     parser.add_argument(
         "--headless",
         action="store_true",
         help="Run browser in headless mode"
     )
+    parser.add_argument(
+        "--mock",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="URL",
+        help="Run against the local mock TikTok (src/mock_tiktok.py) at URL, or start one in-process"
+    )
     parser.add_argument(
         "-c", "--config",
         type=str,
         default="config/config.yaml",
         help="Path to config file"
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.queue and args.video:
+        parser.error("--queue needs a batch (-m or -g); a single --video is not queued")
+    if args.pool and args.video:
+        parser.error("--pool needs a batch (-m or -g); a single --video uses one browser")
+    if args.accounts and args.video:
+        parser.error("--accounts needs a batch (-m or -g) whose items name their account")
+    return args
+
+
+def load_batch_items(args) -> List[BatchItem]:
+    """Collect batch items from the manifest or glob argument."""
+    if args.manifest:
+        return load_manifest(args.manifest)
+    return items_from_glob(args.glob, args.title, args.tags)
+
+
+def open_job_store(config: dict, items: List[BatchItem]) -> JobStore:
+    """Open the durable queue and add any new batch items to it."""
+    store = JobStore(config)
+    added = sum(store.enqueue(item.path, item.title, item.tags, item.account) for item in items)
+    logger.info(f"Job queue {store.db_path}: {added} new jobs, state {store.summary()}")
+    return store
+
+
+def run_batch(args, runner: BatchRunner, items: List[BatchItem], store: JobStore = None) -> int:
+    """Run a batch (or drain the job queue) and write the optional report."""
+    results = runner.run_queue(store) if store else runner.run(items)
+    if args.report:
+        runner.write_report(args.report)
+
+    return 0 if all(r.success for r in results) else 1
 
 
 def main():
@@ -58,35 +142,105 @@ def main():
     
     # Setup logging
     setup_logging(config.get("logging", {}))
+    setup_tracing(config.get("tracing", {}))
+    
+    # Offline run against the mock TikTok pages
+    if args.mock is not None:
+        url = args.mock or start_mock(config)[1]
+        config = mock_config(config, url)
+        logger.info(f"Using mock TikTok at {url}")
     
     # Validate video file
-    video_path = Path(args.video)
-    if not video_path.exists():
-        logger.error(f"Video file not found: {video_path}")
-        return 1
+    store = None
+    if args.video:
+        video_path = Path(args.video)
+        if not video_path.exists():
+            logger.error(f"Video file not found: {video_path}")
+            return 1
+    else:
+        items = [] if args.resume else load_batch_items(args)
+        if not items and not args.resume:
+            logger.error("No videos to upload")
+            return 1
+    
+    # Reject files TikTok would refuse before starting any browser
+    preflight = Preflight(config)
+    if preflight.enabled:
+        if args.video:
+            if not preflight.filter([str(video_path)]):
+                return 1
+        elif items:
+            passed = preflight.filter([item.path for item in items])
+            items = [item for item in items if item.path in passed]
+            if not items:
+                logger.error("No videos passed preflight")
+                return 1
     
     logger.info(f"Starting Mini TikTok Automation System v0.1.0")
-    logger.info(f"Video: {video_path}")
+    logger.info(f"Video: {args.video or args.manifest or args.glob or 'resume queue'}")
     
     # Override headless mode if specified
     if args.headless:
         config["browser"]["headless"] = True
     
+    if not args.video and not args.accounts and (args.queue or args.resume):
+        store = open_job_store(config, items)
+    
+    if args.accounts and not args.video:
+        engine = MultiAccountEngine(config)
+        if not engine.accounts:
+            logger.error("No accounts configured")
+            return 1
+        if args.queue or args.resume:
+            rejected = engine.assign_accounts(items)
+            store = open_job_store(config, [i for i in items if i.account in engine.accounts])
+            results = rejected + engine.run_queue(store)
+            store.close()
+        else:
+            results = engine.run(items)
+        log_results(results)
+        if args.report:
+            write_results(results, args.report)
+        return 0 if all(r.success for r in results) else 1
+    
+    if not args.video and args.pool > 0:
+        pool = BrowserPool(config, size=args.pool)
+        try:
+            if not pool.start():
+                logger.error("No browser in the pool could be started")
+                return 1
+            return run_batch(args, BatchRunner(pool=pool), items, store)
+        except Exception as e:
+            logger.exception(f"An error occurred: {e}")
+            return 1
+        finally:
+            pool.close()
+            if store:
+                store.close()
+    
     browser_manager = None
     try:
         # Initialize browser
         browser_manager = BrowserManager(config["browser"])
         driver = browser_manager.create_driver()
         
-        # Create uploader and post video
+        # Create uploader and post video(s)
         uploader = TikTokUploader(driver, config)
+        if not args.video:
+            return run_batch(args, BatchRunner(uploader), items, store)
+        
+        stages: List[str] = []
         success = uploader.upload_video(
             video_path=str(video_path),
             title=args.title,
-            tags=args.tags
+            tags=args.tags,
+            on_stage=stages.append
         )
         
-        if success:
+        if success and "verified" not in stages:
+            logger.warning("Video posted, but TikTok did not confirm it; check your profile")
+            return 0
+        elif success:
             logger.success("Video uploaded successfully!")
             return 0
         else:
@@ -99,6 +253,8 @@ def main():
     finally:
         if browser_manager:
             browser_manager.close()
+        if store:
+            store.close()
 
 
 if __name__ == "__main__":
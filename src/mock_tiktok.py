@@ -0,0 +1,418 @@
+"""
+Mock TikTok Module
+Local stand-in for TikTok's home, login and Studio upload pages, for offline
+end-to-end runs and benchmarks.
+"""
+
+import argparse
+import copy
+import html
+import json
+import random
+import threading
+import time
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlparse
+
+from loguru import logger
+
+
+MOCK_COOKIE_FILE = "data/cookies/mock_cookies.json"
+MOCK_PROFILE_DIR = "./chrome_mock"
+SESSION_COOKIES = ["sessionid", "sid_tt", "sid_guard"]
+SESSION_TOKEN = "mock-session"
+
+DEFAULT_SETTINGS: Dict[str, Any] = {
+    "host": "127.0.0.1",
+    "port": 8900,
+    "render_delay": 0.3,               # seconds before a page's app content is attached
+    "upload_mb_per_s": 20,             # simulated upload throughput
+    "processing_delay": 2,             # seconds between 100% and the Post button enabling
+    "post_delay": 1,                   # seconds from Post to the redirect to the content page
+    "content_check_probability": 0.3,  # "Turn on automatic content checks?" after upload
+    "restricted_probability": 0.2,     # "Content may be restricted" on the first Post click
+    "auto_login": True,                # the login page logs in by itself
+    "build": "mock-1",                 # bundle name suffix, i.e. the page version
+    "seed": None,                      # fixes the popup draws for reproducible runs
+}
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<link rel="stylesheet" href="/static/app.{build}.css">
+<script>window.MOCK_CONFIG = {config};</script>
+<script src="/static/app.{build}.js" defer></script>
+</head>
+<body>
+<div id="root"></div>
+<template id="app">{body}</template>
+</body>
+</html>
+"""
+
+HEADER_LOGGED_IN = """
+<header class="mock-header">
+  <a data-e2e="nav-profile" href="/profile"><span data-e2e="profile-icon" class="avatar">me</span></a>
+</header>
+"""
+
+HEADER_LOGGED_OUT = """
+<header class="mock-header">
+  <button data-e2e="top-login-button" onclick="location.href='/login'">Log in</button>
+</header>
+"""
+
+LOGIN_BODY = """
+<div class="login-container">
+  <h2>Log in to TikTok</h2>
+  <button id="login-submit" class="TUXButton TUXButton--primary"
+          onclick="location.href='/login/submit?redirect_url=' + encodeURIComponent(MOCK_CONFIG.redirect_url)">Log in</button>
+</div>
+"""
+
+STUDIO_BODY = """
+<div class="upload-area" id="upload-area">
+  <p>Select video to upload</p>
+  <input type="file" accept="video/*" class="upload-input"
+         style="opacity:0;position:absolute;width:1px;height:1px">
+</div>
+<div id="editor" style="display:none">
+  <div id="progress-bar"><span id="progress">0%</span></div>
+  <div id="edit-cover" style="display:none">Edit cover</div>
+  <div class="DraftEditor-root">
+    <div class="DraftEditor-editorContainer">
+      <div id="caption" class="notranslate public-DraftEditor-content" contenteditable="true"
+           role="combobox" style="min-height:60px"></div>
+    </div>
+  </div>
+  <button id="post" class="TUXButton TUXButton--primary" data-e2e="post_video_button" disabled>
+    <div class="TUXButton-label">Post</div>
+  </button>
+</div>
+<div id="content-check" class="mock-modal" style="display:none">
+  <div>Turn on automatic content checks?</div>
+  <button class="TUXButton TUXButton--primary" data-close="content-check">Turn on</button>
+  <button data-close="content-check">Cancel</button>
+</div>
+<div id="restricted" class="common-modal mock-modal" style="display:none">
+  <div class="common-modal-close-icon" data-close="restricted">&times;</div>
+  <div>Content may be restricted</div>
+</div>
+"""
+
+CSS = """
+body { font-family: sans-serif; margin: 0; }
+.mock-header { height: 48px; display: flex; justify-content: flex-end; padding: 8px; }
+.mock-modal { position: fixed; top: 30%; left: 30%; width: 40%; padding: 24px; background: #fff;
+              border: 1px solid #ccc; }
+.common-modal-close-icon { width: 24px; height: 24px; cursor: pointer; }
+#post:disabled { opacity: 0.5; }
+"""
+
+APP_JS = """
+(function () {
+    var cfg = window.MOCK_CONFIG, file = null, warned = false, posting = false;
+
+    function $(id) { return document.getElementById(id); }
+    function show(id, on) { $(id).style.display = on ? '' : 'none'; }
+    function shown(id) { return $(id) && $(id).style.display !== 'none'; }
+
+    function startUpload(f) {
+        file = f;
+        show('upload-area', false);
+        show('editor', true);
+        // Studio prefills the caption with the file name
+        $('caption').textContent = f.name.replace(/\\.[^.]+$/, '');
+        var rate = cfg.upload_mb_per_s * 1024 * 1024, started = Date.now();
+        var timer = setInterval(function () {
+            var sent = Math.min(f.size, (Date.now() - started) / 1000 * rate);
+            $('progress').textContent = (f.size ? Math.floor(sent / f.size * 100) : 100) + '%';
+            if (sent >= f.size) {
+                clearInterval(timer);
+                setTimeout(processed, cfg.processing_delay * 1000);
+            }
+        }, 100);
+    }
+
+    function processed() {
+        show('progress-bar', false);
+        show('edit-cover', true);
+        $('post').disabled = false;
+        if (cfg.content_check) show('content-check', true);
+    }
+
+    function post() {
+        // An open modal covers the Post button
+        if ($('post').disabled || posting || shown('content-check') || shown('restricted')) return;
+        if (cfg.restricted && !warned) {
+            warned = true;
+            show('restricted', true);
+            return;
+        }
+        posting = true;
+        $('post').disabled = true;
+        fetch('/api/post', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({caption: $('caption').innerText.trim(), file: file.name, size: file.size})
+        }).then(function () {
+            setTimeout(function () { location.href = '/tiktokstudio/content'; }, cfg.post_delay * 1000);
+        });
+    }
+
+    setTimeout(function () {
+        var root = $('root');
+        root.appendChild($('app').content.cloneNode(true));
+        var input = root.querySelector('input[type="file"]');
+        if (input) {
+            input.addEventListener('change', function () {
+                if (input.files.length) startUpload(input.files[0]);
+            });
+            $('post').addEventListener('click', post);
+        }
+        Array.prototype.forEach.call(root.querySelectorAll('[data-close]'), function (el) {
+            el.addEventListener('click', function () { show(el.getAttribute('data-close'), false); });
+        });
+        if (cfg.auto_login && $('login-submit')) setTimeout(function () { $('login-submit').click(); }, 300);
+    }, cfg.render_delay * 1000);
+})();
+"""
+
+
+def mock_config(config: dict, url: str) -> dict:
+    """
+    Point a configuration at a mock server.
+
+    TikTok URLs and the session check go to the mock; the cookie jar and the
+    Chrome profile are kept apart from the real ones so a mock run never
+    overwrites a real session.
+
+    Args:
+        config: Application configuration
+        url: Mock server base URL, e.g. "http://127.0.0.1:8900"
+
+    Returns:
+        A modified copy of the configuration
+    """
+    url = url.rstrip("/")
+    config = copy.deepcopy(config)
+    config.setdefault("tiktok", {}).update({
+        "base_url": url,
+        "upload_url": f"{url}/tiktokstudio/upload",
+        "login_url": f"{url}/login",
+    })
+    login_config = config.setdefault("login", {})
+    login_config["session_check_url"] = f"{url}/passport/web/account/info/"
+    login_config["cookie_file"] = MOCK_COOKIE_FILE
+    config.setdefault("pool", {})["cookie_file"] = MOCK_COOKIE_FILE
+    config.setdefault("browser", {})["user_data_dir"] = MOCK_PROFILE_DIR
+    config.setdefault("profiles", {})["template_dir"] = MOCK_PROFILE_DIR
+    return config
+
+
+def session_cookies(host: str, days: float = 30) -> List[Dict[str, Any]]:
+    """Cookie jar that is logged in on the mock at ``host``."""
+    expiry = int(time.time() + days * 86400)
+    return [
+        {
+            "name": name, "value": SESSION_TOKEN, "domain": host, "path": "/", "hostOnly": True,
+            "secure": False, "httpOnly": True, "sameSite": "Lax", "expiry": expiry,
+        }
+        for name in SESSION_COOKIES
+    ]
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    """Serves the mock pages and records posts."""
+
+    settings: Dict[str, Any] = dict(DEFAULT_SETTINGS)
+    rng = random.Random()
+    posts: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+
+    def _logged_in(self) -> bool:
+        cookies = SimpleCookie(self.headers.get("Cookie", ""))
+        return "sessionid" in cookies and cookies["sessionid"].value == SESSION_TOKEN
+
+    def _send(self, status: int, body: str, content_type: str = "text/html; charset=utf-8",
+              headers: Optional[List[Tuple[str, str]]] = None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        for name, value in headers or []:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _json(self, data: Any, status: int = 200):
+        self._send(status, json.dumps(data), "application/json")
+
+    def _redirect(self, location: str, headers: Optional[List[Tuple[str, str]]] = None):
+        self._send(302, "", headers=[("Location", location)] + (headers or []))
+
+    def _page(self, title: str, body: str, **extra):
+        settings = self.settings
+        page_config = {
+            "render_delay": settings["render_delay"],
+            "upload_mb_per_s": settings["upload_mb_per_s"],
+            "processing_delay": settings["processing_delay"],
+            "post_delay": settings["post_delay"],
+            "auto_login": settings["auto_login"],
+        }
+        page_config.update(extra)
+        self._send(200, PAGE.format(
+            title=title, build=settings["build"], config=json.dumps(page_config), body=body
+        ))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path.rstrip("/") or "/"
+        query = parse_qs(url.query)
+
+        if path == "/":
+            header = HEADER_LOGGED_IN if self._logged_in() else HEADER_LOGGED_OUT
+            self._page("TikTok (mock)", header + "<main>For You</main>")
+        elif path == "/login":
+            self._page("Log in (mock)", LOGIN_BODY, redirect_url=query.get("redirect_url", ["/"])[0])
+        elif path == "/login/submit":
+            max_age = 30 * 86400
+            cookies = [("Set-Cookie", f"{name}={SESSION_TOKEN}; Path=/; Max-Age={max_age}; HttpOnly; SameSite=Lax")
+                       for name in SESSION_COOKIES]
+            target = query.get("redirect_url", ["/"])[0]
+            self._redirect(target if target.startswith("/") else "/", cookies)
+        elif path in ("/tiktokstudio/upload", "/creator-center/upload"):
+            if not self._logged_in():
+                self._redirect(f"/login?redirect_url={quote(path)}")
+                return
+            with self.lock:
+                content_check = self.rng.random() < self.settings["content_check_probability"]
+                restricted = self.rng.random() < self.settings["restricted_probability"]
+            self._page("TikTok Studio (mock)", HEADER_LOGGED_IN + STUDIO_BODY,
+                       content_check=content_check, restricted=restricted)
+        elif path in ("/tiktokstudio/content", "/profile"):
+            if not self._logged_in():
+                self._redirect(f"/login?redirect_url={quote(path)}")
+                return
+            with self.lock:
+                items = "".join(f"<li>{html.escape(str(post.get('caption', '')))}</li>" for post in self.posts)
+            self._page("Posts (mock)", HEADER_LOGGED_IN + f"<ul id='posts'>{items}</ul>")
+        elif path == "/passport/web/account/info":
+            if self._logged_in():
+                self._json({"data": {"user_id": "1", "username": "mock"}, "message": "success"})
+            else:
+                self._json({"data": {}, "message": "error"})
+        elif path == "/api/posts":
+            with self.lock:
+                self._json(list(self.posts))
+        elif path == f"/static/app.{self.settings['build']}.js":
+            self._send(200, APP_JS, "application/javascript")
+        elif path == f"/static/app.{self.settings['build']}.css":
+            self._send(200, CSS, "text/css")
+        else:
+            self._send(404, "Not found", "text/plain")
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        if path == "/api/post":
+            if not self._logged_in():
+                self._json({"message": "error"}, 401)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                post = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._json({"message": "invalid json"}, 400)
+                return
+            post["posted_at"] = time.time()
+            with self.lock:
+                self.posts.append(post)
+            logger.info(f"Mock post: {post.get('file')} ({post.get('caption', '')[:40]})")
+            self._json({"message": "success"})
+        elif path == "/api/reset":
+            with self.lock:
+                self.posts.clear()
+            self._json({"message": "success"})
+        else:
+            self._send(404, "Not found", "text/plain")
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def _configure(config: dict, host: Optional[str], port: Optional[int]) -> Tuple[str, int]:
+    """Apply the mock section of the config to the handler."""
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update(config.get("mock") or {})
+    _MockHandler.settings = settings
+    _MockHandler.rng = random.Random(settings["seed"])
+    _MockHandler.posts = []
+    return host or settings["host"], settings["port"] if port is None else port
+
+
+def start(config: dict, host: Optional[str] = None, port: Optional[int] = None,
+          cookie_file: Optional[str] = MOCK_COOKIE_FILE) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Run the mock server in a background thread.
+
+    Args:
+        config: Application configuration (uses its "mock" section)
+        host: Interface to bind (default: mock.host)
+        port: Port to listen on (default: mock.port; 0 picks a free port)
+        cookie_file: Write a logged-in cookie jar here (None to skip)
+
+    Returns:
+        (server, base URL); call server.shutdown() to stop it
+    """
+    host, port = _configure(config, host, port)
+    server = ThreadingHTTPServer((host, port), _MockHandler)
+    url = f"http://{host}:{server.server_address[1]}"
+    if cookie_file:
+        from vault import CookieVault
+        CookieVault(config).save(cookie_file, session_cookies(host))
+    threading.Thread(target=server.serve_forever, name="mock-tiktok", daemon=True).start()
+    logger.info(f"Mock TikTok serving at {url}")
+    return server, url
+
+
+def serve(config: dict, host: Optional[str] = None, port: Optional[int] = None,
+          cookie_file: Optional[str] = MOCK_COOKIE_FILE):
+    """
+    Run the mock server in the foreground.
+
+    Args:
+        config: Application configuration (uses its "mock" section)
+        host: Interface to bind (default: mock.host)
+        port: Port to listen on (default: mock.port)
+        cookie_file: Write a logged-in cookie jar here (None to skip)
+    """
+    server, _ = start(config, host, port, cookie_file)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    from utils import load_config, setup_logging
+
+    parser = argparse.ArgumentParser(description="Local mock of TikTok's home, login and Studio upload pages")
+    parser.add_argument("--host", type=str, default=None, help="Interface to bind (default: mock.host)")
+    parser.add_argument("--port", type=int, default=None, help="Port to listen on (default: mock.port)")
+    parser.add_argument("--cookies", type=str, default=MOCK_COOKIE_FILE, help="Where to write a logged-in cookie jar")
+    parser.add_argument("--no-cookies", action="store_true", help="Do not write a cookie jar")
+    parser.add_argument("-c", "--config", type=str, default="config/config.yaml", help="Path to config file")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    setup_logging(config.get("logging", {}))
+    serve(config, args.host, args.port, None if args.no_cookies else args.cookies)
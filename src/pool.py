@@ -0,0 +1,296 @@
+"""
+Browser Pool Module
+Keeps warm, logged-in browsers open on the upload page and leases them out.
+"""
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from loguru import logger
+
+from blocking import use_profile
+from browser import BrowserManager
+from login import LoginManager
+from profiles import ProfileCloner
+from refresher import SessionRefresher
+from uploader import TikTokUploader
+
+
+class PooledBrowser:
+    """A single warm browser owned by a BrowserPool."""
+
+    def __init__(self, index: int, manager: BrowserManager, uploader: TikTokUploader):
+        """
+        Initialize PooledBrowser.
+
+        Args:
+            index: Slot number in the pool
+            manager: Browser manager owning the driver
+            uploader: Uploader bound to the driver
+        """
+        self.index = index
+        self.manager = manager
+        self.uploader = uploader
+        self.uploads = 0
+        self.needs_login_check = False
+
+    @property
+    def driver(self):
+        """The underlying WebDriver."""
+        return self.manager.driver
+
+
+class BrowserPool:
+    """
+    Pool of pre-launched, pre-authenticated browsers.
+
+    Each slot gets its own Chrome profile (two Chromes cannot share one),
+    loads cookies once, and sits on the upload page until leased. Drivers are
+    health-checked and reset on return, and recycled after a number of
+    uploads or when their memory grows past a limit.
+    """
+
+    # Seconds between checks for a dead pool while waiting for a lease
+    LEASE_POLL = 1.0
+
+    def __init__(self, config: dict, size: Optional[int] = None):
+        """
+        Initialize BrowserPool.
+
+        Args:
+            config: Application configuration
+            size: Number of browsers (defaults to pool.size in config)
+        """
+        self.config = config
+        pool_config = config.get("pool", {})
+        self.size = size or pool_config.get("size", 2)
+        self.max_uploads = pool_config.get("max_uploads_per_driver", 20)
+        self.max_rss_mb = pool_config.get("max_rss_mb", 1500)
+        self.cookie_file = (
+            pool_config.get("cookie_file")
+            or config.get("login", {}).get("cookie_file")
+            or LoginManager.COOKIE_FILE
+        )
+
+        base_dir = config.get("browser", {}).get("user_data_dir") or "./chrome_data"
+        self.profile_root = Path(pool_config.get("profile_dir") or f"{base_dir}_pool")
+        self.cloner = ProfileCloner(config)
+
+        self._idle: "queue.Queue[PooledBrowser]" = queue.Queue()
+        self._all: List[PooledBrowser] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.refresher = SessionRefresher(config, self)
+
+    def start(self) -> int:
+        """
+        Launch and warm up all browsers in parallel.
+
+        Returns:
+            Number of browsers that came up successfully
+        """
+        logger.info(f"Starting browser pool with {self.size} browsers...")
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            browsers = list(executor.map(self._launch, range(self.size)))
+
+        ready = [b for b in browsers if b is not None]
+        for browser in ready:
+            self._all.append(browser)
+            self._idle.put(browser)
+
+        logger.success(f"Browser pool ready: {len(ready)}/{self.size} browsers")
+        if ready:
+            self.refresher.start()
+        return len(ready)
+
+    def _launch(self, index: int) -> Optional[PooledBrowser]:
+        """Create one browser, log it in and open the upload page."""
+        if self.cloner.enabled:
+            browser_args = self.cloner.browser_args(f"pool_{index}")
+        else:
+            browser_args = {"user_data_dir": str(self.profile_root / f"worker_{index}")}
+        manager = BrowserManager(self.config["browser"], **browser_args)
+        try:
+            driver = manager.create_driver()
+            uploader = TikTokUploader(driver, self.config, cookie_file=self.cookie_file)
+            if not uploader.login_manager.ensure_logged_in():
+                logger.error(f"Pool browser {index}: login failed")
+                manager.close()
+                return None
+
+            browser = PooledBrowser(index, manager, uploader)
+            self._open_upload_page(browser)
+            logger.info(f"Pool browser {index} is warm")
+            return browser
+
+        except Exception as e:
+            logger.error(f"Pool browser {index} failed to start: {e}")
+            manager.close()
+            return None
+
+    def _open_upload_page(self, browser: PooledBrowser):
+        """Navigate to a fresh upload page and mark it ready for the next lease."""
+        driver = browser.driver
+        # Drop any extra tabs left behind by the previous upload
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+        use_profile(driver, "upload")
+        driver.get(browser.uploader.upload_url)
+        browser.uploader.upload_page_ready = True
+
+    def _is_healthy(self, browser: PooledBrowser) -> bool:
+        """Check that the driver still responds and the session is valid."""
+        try:
+            browser.driver.execute_script("return document.readyState")
+        except Exception as e:
+            logger.warning(f"Pool browser {browser.index} is unresponsive: {e}")
+            return False
+
+        if browser.needs_login_check:
+            browser.needs_login_check = False
+            # Drop the cached state first, or the check never reaches the page
+            login_manager = browser.uploader.login_manager
+            login_manager.invalidate("upload failed")
+            if not login_manager.ensure_logged_in():
+                logger.warning(f"Pool browser {browser.index} lost its session")
+                return False
+
+        return True
+
+    def _needs_recycle(self, browser: PooledBrowser) -> bool:
+        """Check the upload count and memory limits."""
+        if self.max_uploads and browser.uploads >= self.max_uploads:
+            logger.info(f"Pool browser {browser.index} reached {browser.uploads} uploads, recycling")
+            return True
+
+        rss_mb = browser.manager.get_memory_usage_mb()
+        if self.max_rss_mb and rss_mb is not None and rss_mb > self.max_rss_mb:
+            logger.info(f"Pool browser {browser.index} uses {rss_mb:.0f} MB, recycling")
+            return True
+
+        return False
+
+    def _release(self, browser: PooledBrowser):
+        """Health-check, reset or recycle a returned browser."""
+        if self._closed:
+            browser.manager.close()
+            return
+
+        replacement: Optional[PooledBrowser] = browser
+        if self._needs_recycle(browser) or not self._is_healthy(browser):
+            browser.manager.close()
+            replacement = self._launch(browser.index)
+        else:
+            try:
+                self._open_upload_page(browser)
+            except Exception as e:
+                logger.warning(f"Pool browser {browser.index} reset failed: {e}")
+                browser.manager.close()
+                replacement = self._launch(browser.index)
+
+        with self._lock:
+            # close() may have run while the replacement was launching
+            closed = self._closed
+            if not closed:
+                if browser in self._all:
+                    self._all.remove(browser)
+                if replacement is not None:
+                    self._all.append(replacement)
+        if closed:
+            if replacement is not None and replacement is not browser:
+                replacement.manager.close()
+            return
+        if replacement is None:
+            logger.error(f"Pool browser {browser.index} could not be replaced")
+            return
+        self._idle.put(replacement)
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[PooledBrowser]:
+        """
+        Borrow a warm browser for the duration of a with-block.
+
+        Args:
+            timeout: Seconds to wait for a free browser (None waits as long
+                as the pool has live browsers)
+
+        Yields:
+            A logged-in browser sitting on the upload page
+
+        Raises:
+            TimeoutError: No browser became free within the timeout
+            RuntimeError: Every browser in the pool died and could not be replaced
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            # Wait in short slices so a pool whose last browser just died
+            # fails instead of blocking forever
+            wait = self.LEASE_POLL if deadline is None else min(self.LEASE_POLL, max(0.0, deadline - time.time()))
+            try:
+                browser = self._idle.get(timeout=wait)
+                break
+            except queue.Empty:
+                pass
+            with self._lock:
+                if not self._all:
+                    raise RuntimeError("No live browsers left in pool")
+            if deadline is not None and time.time() >= deadline:
+                raise TimeoutError("No browser available in pool")
+
+        try:
+            yield browser
+        finally:
+            self._release(browser)
+
+    def upload(
+        self,
+        video_path: str,
+        title: str = "",
+        tags: List[str] = None,
+        on_stage: Optional[Callable[[str], None]] = None
+    ) -> bool:
+        """
+        Upload a video using the next free browser.
+
+        Args:
+            video_path: Path to video file
+            title: Video title/caption
+            tags: List of hashtags (without #)
+            on_stage: Upload stage callback (see TikTokUploader.upload_video)
+
+        Returns:
+            True if upload successful
+        """
+        with self.lease() as browser:
+            success = browser.uploader.upload_video(
+                video_path=video_path,
+                title=title,
+                tags=tags,
+                check_login=False,
+                on_stage=on_stage
+            )
+            browser.uploads += 1
+            # A failure may mean the session expired; verify before reuse
+            browser.needs_login_check = not success
+            return success
+
+    def close(self):
+        """Close every browser in the pool."""
+        with self._lock:
+            self._closed = True
+        self.refresher.stop()
+        with self._lock:
+            browsers = list(self._all)
+            self._all.clear()
+        for browser in browsers:
+            browser.manager.close()
+        logger.info("Browser pool closed")
@@ -0,0 +1,360 @@
+"""
+Preflight Module
+Validates videos by reading MP4/MOV box headers before any browser is started.
+"""
+
+import argparse
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+
+from loguru import logger
+
+
+# Containers TikTok accepts that are not ISO base media files; these are only
+# checked for size
+OTHER_EXTENSIONS = {".webm", ".avi", ".mkv"}
+MP4_EXTENSIONS = {".mp4", ".mov", ".m4v"}
+
+# Every format the batch scanner and validate_video_file accept
+VIDEO_EXTENSIONS = MP4_EXTENSIONS | OTHER_EXTENSIONS
+
+# Boxes inside moov that only contain other boxes
+CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"edts"}
+
+# Boxes a QuickTime/MP4 file may start with
+LEADING_BOXES = {b"ftyp", b"wide", b"free", b"skip", b"pnot", b"moov", b"mdat"}
+
+# moov is read into memory to parse it; anything bigger is not a sane file
+MAX_MOOV_BYTES = 64 * 1024 * 1024
+
+
+@dataclass
+class VideoInfo:
+    """What preflight found out about a video file."""
+
+    path: str
+    size: int = 0
+    brand: str = ""
+    duration: float = 0.0
+    width: int = 0
+    height: int = 0
+    codec: str = ""
+    moov_offset: int = -1
+    mdat_offset: int = -1
+    fragmented: bool = False
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """True if nothing would make TikTok reject the file."""
+        return not self.errors
+
+    @property
+    def faststart(self) -> bool:
+        """True if moov comes before mdat, so players can start before the download ends."""
+        return 0 <= self.moov_offset < self.mdat_offset or self.mdat_offset < 0
+
+    def describe(self) -> str:
+        """One-line summary for logs."""
+        size_mb = self.size / (1024 * 1024)
+        details = f"{size_mb:.1f} MB"
+        if self.duration:
+            details += f", {self.duration:.1f}s"
+        if self.width and self.height:
+            details += f", {self.width}x{self.height}"
+        if self.codec:
+            details += f", {self.codec}"
+        if self.moov_offset >= 0:
+            details += ", faststart" if self.faststart else ", moov at end"
+        return f"{Path(self.path).name} ({details})"
+
+
+def iter_boxes(f: BinaryIO, start: int, end: int) -> Iterator[Tuple[bytes, int, int, int]]:
+    """
+    Walk box headers between two file offsets without reading payloads.
+
+    Yields:
+        (type, box offset, payload offset, box end) tuples
+    """
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack(">I4s", header)
+        payload = offset + 8
+        if size == 1:
+            large = f.read(8)
+            if len(large) < 8:
+                return
+            size = struct.unpack(">Q", large)[0]
+            payload += 8
+        elif size == 0:
+            size = end - offset
+        if size < payload - offset:
+            raise ValueError(f"invalid size for box '{box_type.decode('latin-1')}' at offset {offset}")
+        yield box_type, offset, payload, offset + size
+        offset += size
+
+
+def _iter_children(data: bytes, start: int = 0) -> Iterator[Tuple[bytes, bytes]]:
+    """Walk boxes inside an in-memory payload, yielding (type, payload)."""
+    offset = start
+    while offset + 8 <= len(data):
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = len(data) - offset
+        if size < header:
+            return
+        yield box_type, data[offset + header:offset + size]
+        offset += size
+
+
+def _parse_moov(data: bytes, info: VideoInfo):
+    """Fill duration, resolution and codec from the moov payload."""
+    for box_type, payload in _iter_children(data):
+        if box_type == b"mvhd":
+            version = payload[0]
+            if version == 1:
+                timescale, duration = struct.unpack_from(">IQ", payload, 20)
+            else:
+                timescale, duration = struct.unpack_from(">II", payload, 12)
+            if timescale:
+                info.duration = duration / timescale
+        elif box_type == b"mvex":
+            info.fragmented = True
+        elif box_type == b"trak" and not info.codec:
+            _parse_track(payload, info)
+
+
+def _parse_track(data: bytes, info: VideoInfo):
+    """Take resolution and codec from the first video track."""
+    width = height = 0
+    handler = b""
+    codec = b""
+    stack = [data]
+    while stack:
+        for box_type, payload in _iter_children(stack.pop()):
+            if box_type in CONTAINER_BOXES:
+                stack.append(payload)
+            elif box_type == b"tkhd" and payload:
+                at = 88 if payload[0] == 1 else 76
+                if len(payload) < at + 8:
+                    continue
+                width, height = struct.unpack_from(">II", payload, at)
+                width, height = width >> 16, height >> 16
+            elif box_type == b"hdlr" and len(payload) >= 12:
+                handler = payload[8:12]
+            elif box_type == b"stsd" and len(payload) >= 16:
+                codec = payload[12:16]
+                # Visual sample entries carry the coded size too
+                if not (width and height) and len(payload) >= 44:
+                    width, height = struct.unpack_from(">HH", payload, 40)
+
+    if handler == b"vide":
+        info.codec = codec.decode("latin-1").strip()
+        info.width, info.height = width, height
+
+
+def probe_video(path: str) -> VideoInfo:
+    """
+    Read the container structure of a video file.
+
+    Only box headers and the moov box are read; media data is skipped with
+    seeks, so this takes milliseconds regardless of file size.
+
+    Args:
+        path: Video file path
+
+    Returns:
+        VideoInfo with any structural problems in ``errors``
+    """
+    info = VideoInfo(path=str(path))
+    file_path = Path(path)
+    if not file_path.is_file():
+        info.errors.append("file not found")
+        return info
+
+    info.size = file_path.stat().st_size
+    if not info.size or file_path.suffix.lower() not in MP4_EXTENSIONS:
+        return info
+
+    try:
+        with open(file_path, "rb") as f:
+            for box_type, offset, payload, end in iter_boxes(f, 0, info.size):
+                if offset == 0 and box_type not in LEADING_BOXES:
+                    info.errors.append("not an MP4/MOV file")
+                    return info
+                if end > info.size:
+                    info.errors.append(f"truncated: '{box_type.decode('latin-1')}' box runs past end of file")
+                    return info
+                if box_type == b"ftyp":
+                    f.seek(payload)
+                    info.brand = f.read(4).decode("latin-1").strip()
+                elif box_type == b"moov":
+                    info.moov_offset = offset
+                    if end - payload > MAX_MOOV_BYTES:
+                        info.errors.append("moov box is implausibly large")
+                        break
+                    f.seek(payload)
+                    _parse_moov(f.read(end - payload), info)
+                elif box_type == b"mdat" and info.mdat_offset < 0:
+                    info.mdat_offset = offset
+                elif box_type == b"moof":
+                    info.fragmented = True
+    except (ValueError, struct.error, IndexError) as e:
+        info.errors.append(f"corrupt container: {e}")
+        return info
+
+    if not info.brand:
+        info.errors.append("not an MP4/MOV file (no ftyp box)")
+    if info.moov_offset < 0:
+        info.errors.append("missing moov box (incomplete or unfinished recording)")
+    if info.mdat_offset < 0 and not info.fragmented:
+        info.errors.append("missing mdat box (no media data)")
+    return info
+
+
+class Preflight:
+    """
+    Rejects videos TikTok would refuse before any Chrome work starts.
+
+    Checks the container structure, duration, resolution, codec and size
+    against the limits in the ``preflight`` config section.
+    """
+
+    def __init__(self, config: dict):
+        """
+        Initialize Preflight.
+
+        Args:
+            config: Application configuration
+        """
+        preflight_config = config.get("preflight", {})
+        self.enabled = preflight_config.get("enabled", True)
+        self.min_duration = preflight_config.get("min_duration", 3)
+        self.max_duration = preflight_config.get("max_duration", 600)
+        self.min_short_side = preflight_config.get("min_short_side", 0)
+        self.max_size_mb = preflight_config.get("max_size_mb", 4096)
+        self.codecs = [c.lower() for c in preflight_config.get("codecs", ["avc1", "avc3", "hvc1", "hev1"])]
+        self.workers = preflight_config.get("workers", 0) or os.cpu_count() or 1
+
+    def check(self, path: str) -> VideoInfo:
+        """
+        Probe a file and apply the upload limits.
+
+        Args:
+            path: Video file path
+
+        Returns:
+            VideoInfo; ``ok`` is False if the file should not be uploaded
+        """
+        info = probe_video(path)
+        if not info.size:
+            if not info.errors:
+                info.errors.append("file is empty")
+            return info
+
+        suffix = Path(path).suffix.lower()
+        if suffix not in VIDEO_EXTENSIONS:
+            info.errors.append(f"unsupported format '{suffix}'")
+
+        size_mb = info.size / (1024 * 1024)
+        if self.max_size_mb and size_mb > self.max_size_mb:
+            info.errors.append(f"file is {size_mb:.0f} MB, limit is {self.max_size_mb} MB")
+
+        if info.errors or suffix not in MP4_EXTENSIONS:
+            return info
+
+        if info.duration:
+            if info.duration < self.min_duration:
+                info.errors.append(f"too short: {info.duration:.1f}s (min {self.min_duration}s)")
+            elif self.max_duration and info.duration > self.max_duration:
+                info.errors.append(f"too long: {info.duration:.0f}s (max {self.max_duration}s)")
+        elif not info.fragmented:
+            info.errors.append("duration is zero")
+
+        if not info.codec:
+            info.errors.append("no video track")
+        else:
+            if self.codecs and info.codec.lower() not in self.codecs:
+                info.errors.append(f"unsupported codec '{info.codec}'")
+            short_side = min(info.width, info.height)
+            if self.min_short_side and short_side and short_side < self.min_short_side:
+                info.errors.append(f"resolution {info.width}x{info.height} below {self.min_short_side}p")
+
+        return info
+
+    def check_many(self, paths: List[str]) -> List[VideoInfo]:
+        """
+        Check many files, in parallel processes when there are several.
+
+        Args:
+            paths: Video file paths
+
+        Returns:
+            VideoInfo per path, in input order
+        """
+        if len(paths) <= 1 or self.workers <= 1:
+            return [self.check(p) for p in paths]
+
+        workers = min(self.workers, len(paths))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.check, paths, chunksize=max(1, len(paths) // (workers * 4))))
+
+    def filter(self, paths: List[str]) -> Dict[str, VideoInfo]:
+        """
+        Check files and log the result of each.
+
+        Args:
+            paths: Video file paths
+
+        Returns:
+            Mapping of path to VideoInfo for every file that passed
+        """
+        passed = {}
+        for info in self.check_many(paths):
+            if info.ok:
+                logger.debug(f"Preflight OK: {info.describe()}")
+                passed[info.path] = info
+            else:
+                logger.error(f"Preflight rejected {Path(info.path).name}: {'; '.join(info.errors)}")
+        if len(paths) > 1:
+            logger.info(f"Preflight: {len(passed)}/{len(paths)} videos passed")
+        return passed
+
+
+if __name__ == "__main__":
+    from utils import load_config, setup_logging
+
+    parser = argparse.ArgumentParser(description="Check videos against TikTok upload limits")
+    parser.add_argument("paths", nargs="+", help="Video files or directories")
+    parser.add_argument("-c", "--config", type=str, default="config/config.yaml", help="Path to config file")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    setup_logging(config.get("logging", {}))
+
+    files = []
+    for arg in args.paths:
+        path = Path(arg)
+        if path.is_dir():
+            files.extend(str(p) for p in sorted(path.rglob("*")) if p.suffix.lower() in VIDEO_EXTENSIONS)
+        else:
+            files.append(str(path))
+
+    results = Preflight(config).check_many(files)
+    for info in results:
+        status = "OK  " if info.ok else "FAIL"
+        print(f"{status} {info.describe()}" + ("" if info.ok else f": {'; '.join(info.errors)}"))
+    sys.exit(0 if all(info.ok for info in results) else 1)
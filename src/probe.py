@@ -0,0 +1,186 @@
+"""
+DOM Probe Module
+Evaluates a batch of selectors in one round trip and returns a compact snapshot.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+from loguru import logger
+
+
+PROBE_JS = """
+var specs = arguments[0];
+var out = {};
+
+function visible(el) {
+    return !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+}
+function enabled(el) {
+    return !el.disabled && el.getAttribute('aria-disabled') !== 'true';
+}
+function textOf(el) {
+    return (el.innerText || el.textContent || '').trim();
+}
+
+for (var name in specs) {
+    var spec = specs[name];
+    var els = [];
+    try {
+        if (spec.xpath) {
+            var res = document.evaluate(spec.xpath, document, null,
+                XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var i = 0; i < res.snapshotLength; i++) els.push(res.snapshotItem(i));
+        } else {
+            els = Array.prototype.slice.call(document.querySelectorAll(spec.css));
+        }
+    } catch (e) {
+        out[name] = {error: String(e)};
+        continue;
+    }
+    if (spec.text !== undefined && spec.text !== null) {
+        els = els.filter(function(el) { return textOf(el).toLowerCase() === spec.text; });
+    }
+    if (spec.contains) {
+        els = els.filter(function(el) { return textOf(el).toLowerCase().indexOf(spec.contains) !== -1; });
+    }
+    var vis = els.filter(visible);
+    var first = vis[0] || els[0] || null;
+    out[name] = {
+        count: els.length,
+        visible_count: vis.length,
+        element: first,
+        visible: first ? visible(first) : false,
+        enabled: first ? enabled(first) : false,
+        text: first ? textOf(first).slice(0, 200) : '',
+        texts: spec.texts ? vis.slice(0, spec.texts).map(function(el) {
+            return textOf(el).slice(0, 200);
+        }) : [],
+        height: first ? first.offsetHeight : 0
+    };
+}
+return {url: location.href, probes: out};
+"""
+
+
+@dataclass
+class ProbeResult:
+    """What one selector matched in the page."""
+
+    count: int = 0
+    visible_count: int = 0
+    element: Optional[WebElement] = None
+    visible: bool = False
+    enabled: bool = False
+    text: str = ""
+    texts: List[str] = field(default_factory=list)
+    height: int = 0
+    error: str = ""
+
+    @property
+    def found(self) -> bool:
+        """True if at least one element matched."""
+        return self.count > 0
+
+    @property
+    def clickable(self) -> bool:
+        """True if the first match is visible and enabled."""
+        return self.visible and self.enabled
+
+
+@dataclass
+class Snapshot:
+    """Results of one probe call, keyed by probe name."""
+
+    url: str = ""
+    probes: Dict[str, ProbeResult] = field(default_factory=dict)
+
+    def __getitem__(self, name: str) -> ProbeResult:
+        return self.probes.get(name) or ProbeResult()
+
+
+def css(selector: str, text: Optional[str] = None, contains: Optional[str] = None, texts: int = 0) -> Dict[str, Any]:
+    """
+    Build a CSS probe spec.
+
+    Args:
+        selector: CSS selector
+        text: Keep only elements whose trimmed, lowercased text equals this
+        contains: Keep only elements whose lowercased text contains this
+        texts: Also return the texts of up to this many visible matches
+
+    Returns:
+        Probe spec for DomProbe.snapshot
+    """
+    return {"css": selector, "text": text, "contains": contains, "texts": texts}
+
+
+def xpath(expression: str, text: Optional[str] = None, contains: Optional[str] = None, texts: int = 0) -> Dict[str, Any]:
+    """
+    Build an XPath probe spec (same filters as css()).
+
+    Args:
+        expression: XPath expression
+        text: Keep only elements whose trimmed, lowercased text equals this
+        contains: Keep only elements whose lowercased text contains this
+        texts: Also return the texts of up to this many visible matches
+
+    Returns:
+        Probe spec for DomProbe.snapshot
+    """
+    return {"xpath": expression, "text": text, "contains": contains, "texts": texts}
+
+
+class DomProbe:
+    """
+    Answers "which of these selectors match, are they visible/enabled, and
+    what do they say" with a single execute_script call.
+
+    Checking elements one by one costs a WebDriver round trip per element per
+    attribute, which adds up quickly against a remote grid.
+    """
+
+    def __init__(self, driver: WebDriver):
+        """
+        Initialize DomProbe.
+
+        Args:
+            driver: Selenium WebDriver instance
+        """
+        self.driver = driver
+
+    def snapshot(self, specs: Dict[str, Dict[str, Any]]) -> Snapshot:
+        """
+        Evaluate all probe specs in one round trip.
+
+        Args:
+            specs: Mapping of probe name to spec (see css() / xpath())
+
+        Returns:
+            Snapshot of the page; an empty snapshot if the script failed
+        """
+        try:
+            raw = self.driver.execute_script(PROBE_JS, specs) or {}
+        except Exception as e:
+            logger.debug(f"DOM probe failed: {e}")
+            return Snapshot()
+
+        probes = {}
+        for name, data in (raw.get("probes") or {}).items():
+            if data.get("error"):
+                logger.debug(f"Probe '{name}' failed: {data['error']}")
+                probes[name] = ProbeResult(error=data["error"])
+                continue
+            probes[name] = ProbeResult(
+                count=data.get("count", 0),
+                visible_count=data.get("visible_count", 0),
+                element=data.get("element"),
+                visible=bool(data.get("visible")),
+                enabled=bool(data.get("enabled")),
+                text=data.get("text") or "",
+                texts=data.get("texts") or [],
+                height=data.get("height") or 0,
+            )
+        return Snapshot(url=raw.get("url", ""), probes=probes)
@@ -0,0 +1,305 @@
+"""
+Chrome Profile Module
+Clones a golden Chrome profile per worker and keeps profiles from bloating.
+"""
+
+import argparse
+import errno
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+
+# Regenerated by Chrome on demand; never worth copying
+CACHE_DIRS = {
+    "Cache", "Code Cache", "GPUCache", "GrShaderCache", "GraphiteDawnCache", "ShaderCache",
+    "DawnCache", "DawnGraphiteCache", "DawnWebGPUCache", "Crashpad", "BrowserMetrics",
+    "component_crx_cache", "CacheStorage", "ScriptCache",
+}
+
+# Per-process lock files that would make the clone look "in use"
+LOCK_FILES = {"SingletonLock", "SingletonCookie", "SingletonSocket", "lockfile", "RunningChromeVersion"}
+
+# Component data Chrome replaces with new versioned files instead of editing in
+# place, so hardlinks into the template are safe
+SHARED_DIRS = {
+    "Extensions", "Dictionaries", "hyphen-data", "Safe Browsing", "ZxcvbnData", "WidevineCdm",
+    "OnDeviceHeadSuggestModel", "optimization_guide_model_store", "MEIPreload", "SSLErrorAssistant",
+    "FileTypePolicies", "CertificateRevocation", "Subresource Filter", "TrustTokenKeyCommitments",
+    "OriginTrials", "FirstPartySetsPreloaded", "Crowd Deny", "AutofillStates", "pnacl",
+}
+
+# ioctl(dest_fd, FICLONE, src_fd) makes a copy-on-write clone on btrfs/XFS
+FICLONE = 0x40049409
+
+TMPFS_ROOT = "/dev/shm/tiktok_profiles"
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    """Try a copy-on-write clone; False if the filesystem does not support it."""
+    try:
+        import fcntl
+    except ImportError:
+        # No ioctl on Windows: always fall back to a plain copy
+        return False
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        shutil.copystat(src, dst)
+        return True
+    except OSError as e:
+        if dst.exists():
+            dst.unlink()
+        if e.errno in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS):
+            return False
+        raise
+
+
+def clone_profile(template: str, dest: str, use_reflink: bool = True) -> Dict[str, int]:
+    """
+    Build a fresh copy of a Chrome profile.
+
+    Caches and lock files are skipped. Files are reflinked where the
+    filesystem supports it; otherwise component data is hardlinked and
+    everything Chrome writes to (cookies, local storage, preferences) is
+    copied.
+
+    Args:
+        template: Golden profile directory
+        dest: Clone directory (replaced if it exists)
+        use_reflink: Try copy-on-write clones first
+
+    Returns:
+        Counts of reflinked, linked, copied and skipped entries
+    """
+    src_root = Path(template)
+    dest_root = Path(dest)
+    if dest_root.exists():
+        shutil.rmtree(dest_root)
+    dest_root.mkdir(parents=True)
+
+    start_time = time.time()
+    stats = {"reflinked": 0, "linked": 0, "copied": 0, "skipped": 0}
+    same_device = src_root.stat().st_dev == dest_root.stat().st_dev
+
+    for root, dirs, files in os.walk(src_root):
+        root_path = Path(root)
+        relative = root_path.relative_to(src_root)
+        kept = [d for d in dirs if d not in CACHE_DIRS]
+        stats["skipped"] += len(dirs) - len(kept)
+        dirs[:] = kept
+        (dest_root / relative).mkdir(exist_ok=True)
+        shared = bool(SHARED_DIRS & set(relative.parts))
+
+        for name in files:
+            src = root_path / name
+            dst = dest_root / relative / name
+            if name in LOCK_FILES or src.is_symlink():
+                stats["skipped"] += 1
+                continue
+            if use_reflink and same_device and _reflink(src, dst):
+                stats["reflinked"] += 1
+                continue
+            use_reflink = False  # unsupported here; do not try for every file
+            if shared and same_device:
+                os.link(src, dst)
+                stats["linked"] += 1
+            else:
+                shutil.copy2(src, dst)
+                stats["copied"] += 1
+
+    logger.info(
+        f"Cloned profile {src_root} -> {dest_root} in {time.time() - start_time:.2f}s "
+        f"({stats['reflinked']} reflinked, {stats['linked']} linked, "
+        f"{stats['copied']} copied, {stats['skipped']} skipped)"
+    )
+    return stats
+
+
+class ProfileCloner:
+    """
+    Hands every worker its own clone of a logged-in golden profile.
+
+    Two Chromes cannot share a user-data-dir, and a fresh empty profile means
+    a slow cold start plus a cookie login. Cloning the template instead gives
+    each worker a warm, logged-in profile in seconds.
+    """
+
+    def __init__(self, config: dict):
+        """
+        Initialize ProfileCloner.
+
+        Args:
+            config: Application configuration
+        """
+        profiles_config = config.get("profiles", {})
+        self.enabled = profiles_config.get("clone", False)
+        self.template_dir = (
+            profiles_config.get("template_dir")
+            or os.environ.get("CHROME_USER_DATA_DIR")
+            or config.get("browser", {}).get("user_data_dir")
+            or "./chrome_data"
+        )
+        self.tmpfs = profiles_config.get("tmpfs", False)
+        root = TMPFS_ROOT if self.tmpfs else profiles_config.get("clone_dir") or "./chrome_clones"
+        self.root = Path(root)
+
+    def path_for(self, name: str) -> str:
+        """Clone directory for a worker."""
+        return str(self.root / name)
+
+    def browser_args(self, name: str, template: Optional[str] = None) -> Dict[str, Any]:
+        """
+        BrowserManager arguments for a worker's profile.
+
+        Args:
+            name: Worker name, used as the clone directory name
+            template: Profile to clone (defaults to the golden template)
+
+        Returns:
+            Keyword arguments for BrowserManager
+        """
+        return {
+            "user_data_dir": self.path_for(name),
+            "template_dir": template or self.template_dir,
+            "discard_profile": self.tmpfs,
+        }
+
+
+def dir_size(path: Path) -> int:
+    """Total size of the files under a directory, in bytes."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def profile_in_use(profile: str) -> bool:
+    """True if a live Chrome holds the profile's SingletonLock."""
+    lock = Path(profile) / "SingletonLock"
+    if not lock.is_symlink():
+        return False
+    # The lock is a symlink to "<hostname>-<pid>"
+    try:
+        pid = int(os.readlink(lock).rsplit("-", 1)[1])
+        os.kill(pid, 0)
+    except (ValueError, IndexError, ProcessLookupError):
+        return False
+    except (OSError, PermissionError):
+        return True
+    return True
+
+
+def profile_usage(profile: str) -> Dict[str, int]:
+    """
+    Measure a profile by component.
+
+    Cache directories are reported by name (summed over all sub-profiles),
+    everything else under "other".
+
+    Args:
+        profile: Chrome user-data-dir
+
+    Returns:
+        Mapping of component name to bytes, largest first
+    """
+    usage: Dict[str, int] = {}
+    for root, dirs, files in os.walk(profile):
+        for name in [d for d in dirs if d in CACHE_DIRS]:
+            usage[name] = usage.get(name, 0) + dir_size(Path(root) / name)
+        dirs[:] = [d for d in dirs if d not in CACHE_DIRS]
+        for name in files:
+            try:
+                usage["other"] = usage.get("other", 0) + os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return dict(sorted(usage.items(), key=lambda item: item[1], reverse=True))
+
+
+def prune_profile(profile: str, limits_mb: Dict[str, float]) -> int:
+    """
+    Delete cache directories that have grown past their limit.
+
+    Only directories in CACHE_DIRS are touched; Cookies, Local Storage,
+    IndexedDB and preferences (the login state) are never removed.
+
+    Args:
+        profile: Chrome user-data-dir (must not be in use)
+        limits_mb: Limit per cache directory name; "default" applies to the rest
+
+    Returns:
+        Bytes freed
+    """
+    if profile_in_use(profile):
+        logger.warning(f"Profile {profile} is in use by a running Chrome, not pruning")
+        return 0
+
+    default_limit = limits_mb.get("default", 100)
+    freed = 0
+    for root, dirs, _ in os.walk(profile):
+        for name in [d for d in dirs if d in CACHE_DIRS]:
+            path = Path(root) / name
+            size = dir_size(path)
+            if size > limits_mb.get(name, default_limit) * 1024 * 1024:
+                shutil.rmtree(path, ignore_errors=True)
+                freed += size
+                logger.debug(f"Pruned {path} ({size / (1024 * 1024):.1f} MB)")
+        dirs[:] = [d for d in dirs if d not in CACHE_DIRS]
+    return freed
+
+
+def _format_usage(usage: Dict[str, int]) -> str:
+    """Human-readable component sizes."""
+    return ", ".join(f"{name} {size / (1024 * 1024):.1f} MB" for name, size in usage.items())
+
+
+def _measure_startup(browser_config: dict, profile: str) -> float:
+    """Launch Chrome on a profile and return the seconds until it is usable."""
+    from browser import BrowserManager
+
+    manager = BrowserManager(dict(browser_config, prune_on_launch=False), user_data_dir=profile)
+    start_time = time.time()
+    try:
+        manager.create_driver()
+        manager.driver.get("about:blank")
+        return time.time() - start_time
+    finally:
+        manager.close()
+
+
+if __name__ == "__main__":
+    from utils import load_config, setup_logging
+
+    parser = argparse.ArgumentParser(description="Measure and prune Chrome profiles")
+    parser.add_argument("profiles", nargs="*", help="Profile directories (default: browser.user_data_dir)")
+    parser.add_argument("--prune", action="store_true", help="Delete caches above the configured limits")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="Launch Chrome before and after pruning and compare startup time")
+    parser.add_argument("-c", "--config", type=str, default="config/config.yaml", help="Path to config file")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    setup_logging(config.get("logging", {}))
+    browser_config = config.get("browser", {})
+    limits = browser_config.get("cache_limits_mb", {})
+
+    for profile in args.profiles or [browser_config.get("user_data_dir") or "./chrome_data"]:
+        usage = profile_usage(profile)
+        logger.info(f"{profile}: {sum(usage.values()) / (1024 * 1024):.1f} MB ({_format_usage(usage)})")
+        if not args.prune:
+            continue
+
+        before = _measure_startup(browser_config, profile) if args.measure_startup else None
+        freed = prune_profile(profile, limits)
+        logger.info(f"{profile}: freed {freed / (1024 * 1024):.1f} MB")
+        if before is not None:
+            after = _measure_startup(browser_config, profile)
+            logger.info(f"{profile}: startup {before:.2f}s -> {after:.2f}s ({before - after:+.2f}s saved)")
@@ -0,0 +1,108 @@
+"""
+Page Readiness Module
+Named predicates that say when a page is usable, so steps never sleep blindly.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from probe import DomProbe, Snapshot, css
+from waits import WaitPolicy
+
+
+# Any of these means the user is logged in
+LOGIN_INDICATORS = [
+    '[data-e2e="profile-icon"]',
+    '[data-e2e="nav-profile"]',
+    'a[href*="/profile"]',
+]
+
+# Any of these means the page rendered for a logged-out visitor
+LOGGED_OUT_INDICATORS = [
+    '[data-e2e="top-login-button"]',
+    '#header-login-button',
+    'button[data-e2e="nav-login-button"]',
+]
+
+FILE_INPUT_SELECTORS = [
+    'input[type="file"]',
+    'input[accept*="video"]',
+    '[data-e2e="upload-input"]',
+    'input[accept*="mp4"]',
+    'input.upload-input',
+]
+
+
+@dataclass
+class ReadinessCheck:
+    """A set of probes and the condition on their snapshot that means "ready"."""
+
+    name: str
+    probes: Dict[str, Dict[str, Any]]
+    ready: Callable[[Snapshot], bool]
+
+
+def _any_found(selectors):
+    return lambda snapshot: any(snapshot[s].found for s in selectors)
+
+
+def _found_or_auth(selectors):
+    """Ready when a selector matches, or TikTok redirected to login (no point waiting then)."""
+    found = _any_found(selectors)
+
+    def ready(snapshot: Snapshot) -> bool:
+        # login imports this module, so its helper is looked up at call time
+        from login import LoginManager
+        return found(snapshot) or LoginManager.is_auth_url(snapshot.url)
+    return ready
+
+
+CHECKS: Dict[str, ReadinessCheck] = {
+    check.name: check for check in [
+        ReadinessCheck(
+            "profile-icon-present",
+            {s: css(s) for s in LOGIN_INDICATORS},
+            _any_found(LOGIN_INDICATORS),
+        ),
+        # Home page rendered far enough to tell logged in from logged out
+        ReadinessCheck(
+            "login-state-known",
+            {s: css(s) for s in LOGIN_INDICATORS + LOGGED_OUT_INDICATORS},
+            _found_or_auth(LOGIN_INDICATORS + LOGGED_OUT_INDICATORS),
+        ),
+        ReadinessCheck(
+            "file-input-attached",
+            {s: css(s) for s in FILE_INPUT_SELECTORS},
+            _found_or_auth(FILE_INPUT_SELECTORS),
+        ),
+    ]
+}
+
+
+def wait_until_ready(driver: WebDriver, check: str, waits: WaitPolicy) -> Snapshot:
+    """
+    Poll a named readiness check until it passes or its wait times out.
+
+    Each poll is a single DomProbe round trip, so this returns within one
+    poll interval of the page becoming usable. The timeout and poll interval
+    are those of the wait with the same name as the check.
+
+    Args:
+        driver: Selenium WebDriver instance
+        check: Name of a check in CHECKS
+        waits: Wait policy to take the timeout from and record metrics in
+
+    Returns:
+        The last snapshot (use ``is_ready`` to see whether it passed)
+    """
+    readiness = CHECKS[check]
+    probe = DomProbe(driver)
+    snapshot = waits.until(check, lambda: probe.snapshot(readiness.probes), readiness.ready)
+    return snapshot if snapshot is not None else Snapshot()
+
+
+def is_ready(check: str, snapshot: Optional[Snapshot]) -> bool:
+    """True if a snapshot from wait_until_ready satisfies the named check."""
+    return snapshot is not None and CHECKS[check].ready(snapshot)
@@ -0,0 +1,131 @@
+"""
+Session Refresher Module
+Renews TikTok sessions from idle browsers before the saved cookies expire.
+"""
+
+import threading
+import time
+from typing import Optional
+
+from loguru import logger
+
+from login import LoginManager
+from vault import CookieVault
+
+
+def needs_refresh(vault: CookieVault, cookie_file: str, window: float) -> bool:
+    """
+    Check whether a jar's session expires within the refresh window.
+
+    Args:
+        vault: Cookie vault holding the expiry index
+        cookie_file: Account's cookie jar
+        window: Look-ahead in seconds
+
+    Returns:
+        True if the session should be refreshed now
+    """
+    try:
+        expires = vault.session_expires(cookie_file)
+    except Exception as e:
+        logger.debug(f"Could not read session expiry of {cookie_file}: {e}")
+        return False
+    return expires is not None and expires < time.time() + window
+
+
+def refresh_session(login_manager: LoginManager) -> bool:
+    """
+    Visit TikTok with the live session so it reissues cookies, then save the jar.
+
+    Args:
+        login_manager: Login manager bound to a logged-in browser
+
+    Returns:
+        True if the session was still valid and the jar was written back
+    """
+    cookie_file = login_manager.cookie_file
+    before = login_manager.vault.session_expires(cookie_file)
+
+    if not login_manager.is_logged_in(use_cache=False):
+        logger.error(f"Session for {cookie_file} has lapsed; re-export its cookies")
+        return False
+    if not login_manager.save_cookies():
+        return False
+
+    after = login_manager.vault.session_expires(cookie_file)
+    if before and after and after <= before:
+        logger.warning(f"TikTok did not extend the session in {cookie_file}")
+    else:
+        logger.success(f"Refreshed session in {cookie_file}")
+    return True
+
+
+class SessionRefresher:
+    """
+    Background thread that keeps a browser pool's session from expiring.
+
+    Every ``refresh.check_interval`` seconds it looks up the pool's cookie jar
+    in the vault's expiry index. If the session expires within
+    ``refresh.window_hours``, it borrows an idle browser (never waiting for
+    one, so uploads are not delayed), lets TikTok reissue the cookies and
+    writes the new jar back.
+    """
+
+    def __init__(self, config: dict, pool):
+        """
+        Initialize SessionRefresher.
+
+        Args:
+            config: Application configuration
+            pool: BrowserPool whose browsers share one account
+        """
+        refresh_config = config.get("refresh", {})
+        self.enabled = refresh_config.get("enabled", True)
+        self.interval = refresh_config.get("check_interval", 300)
+        self.window = refresh_config.get("window_hours", 24) * 3600
+        self.pool = pool
+        self.vault = CookieVault(config)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the background thread (no-op if disabled)."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="session-refresher", daemon=True)
+        self._thread.start()
+        logger.info(f"Session refresher started (every {self.interval}s, window {self.window / 3600:.0f}h)")
+
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.vault.close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh_due()
+            except Exception as e:
+                logger.warning(f"Session refresh failed: {e}")
+
+    def refresh_due(self) -> bool:
+        """
+        Refresh the pool's session if it is about to expire and a browser is idle.
+
+        Returns:
+            True if a refresh was performed
+        """
+        cookie_file = self.pool.cookie_file
+        if not needs_refresh(self.vault, cookie_file, self.window):
+            return False
+
+        try:
+            with self.pool.lease(timeout=0) as browser:
+                logger.info(f"Refreshing session for {cookie_file} in pool browser {browser.index}")
+                return refresh_session(browser.uploader.login_manager)
+        except TimeoutError:
+            logger.debug("No idle browser for session refresh, will retry")
+            return False
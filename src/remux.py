@@ -0,0 +1,244 @@
+"""
+Remux Module
+Moves the moov atom in front of mdat ("faststart") without re-encoding.
+"""
+
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from loguru import logger
+
+from preflight import CONTAINER_BOXES, MAX_MOOV_BYTES, MP4_EXTENSIONS, iter_boxes
+from utils import content_hash
+
+
+def _patch_chunk_offsets(moov: bytearray, start: int, end: int, shift: int, moved: Tuple[int, int]):
+    """
+    Add ``shift`` to stco/co64 entries inside moov[start:end], in place.
+
+    Only offsets within the ``moved`` file range (the data that ends up
+    behind the relocated moov) are changed.
+
+    Raises:
+        ValueError: If a 32-bit offset would overflow or the moov is compressed
+    """
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", moov, offset)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", moov, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            raise ValueError(f"invalid size for box '{box_type.decode('latin-1')}'")
+        payload = offset + header
+
+        if box_type in CONTAINER_BOXES:
+            _patch_chunk_offsets(moov, payload, offset + size, shift, moved)
+        elif box_type == b"cmov":
+            raise ValueError("compressed moov is not supported")
+        elif box_type == b"stco":
+            count = struct.unpack_from(">I", moov, payload + 4)[0]
+            at = payload + 8
+            for _ in range(count):
+                value = struct.unpack_from(">I", moov, at)[0]
+                if moved[0] <= value < moved[1]:
+                    value += shift
+                    if value > 0xFFFFFFFF:
+                        raise ValueError("chunk offset overflows stco")
+                    struct.pack_into(">I", moov, at, value)
+                at += 4
+        elif box_type == b"co64":
+            count = struct.unpack_from(">I", moov, payload + 4)[0]
+            at = payload + 8
+            for _ in range(count):
+                value = struct.unpack_from(">Q", moov, at)[0]
+                if moved[0] <= value < moved[1]:
+                    struct.pack_into(">Q", moov, at, value + shift)
+                at += 8
+
+        offset += size
+
+
+def _copy_range(src, dst, start: int, length: int, chunk_size: int):
+    """Copy ``length`` bytes from ``start`` in src to the current position in dst."""
+    src.seek(start)
+    remaining = length
+    while remaining > 0:
+        chunk = src.read(min(chunk_size, remaining))
+        if not chunk:
+            raise ValueError("unexpected end of file")
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+class FaststartRemuxer:
+    """
+    Rewrites MP4/MOV files with moov before mdat so TikTok can start
+    processing as soon as the first bytes arrive.
+
+    Only the moov box is held in memory; media data is streamed in fixed-size
+    chunks to a temp file. Results are cached by the source's content hash,
+    so each video is remuxed once no matter how often it is posted; the
+    least recently used copies are deleted once the cache outgrows
+    ``faststart.max_cache_mb``.
+    """
+
+    def __init__(self, config: dict):
+        """
+        Initialize FaststartRemuxer.
+
+        Args:
+            config: Application configuration
+        """
+        remux_config = config.get("faststart", {})
+        self.enabled = remux_config.get("enabled", False)
+        self.cache_dir = Path(remux_config.get("cache_dir") or "data/cache/faststart")
+        self.chunk_size = remux_config.get("chunk_size_mb", 8) * 1024 * 1024
+        max_cache_mb = remux_config.get("max_cache_mb", 2048)
+        self.max_cache_bytes = int(max_cache_mb * 1024 * 1024) if max_cache_mb else None
+
+    def prepare(self, video_path: Path) -> Path:
+        """
+        Return a faststart version of the video, remuxing it if needed.
+
+        Files that are already faststart, are not MP4/MOV, or cannot be
+        remuxed are returned unchanged.
+
+        Args:
+            video_path: Source video
+
+        Returns:
+            Path to upload
+        """
+        if not self.enabled or video_path.suffix.lower() not in MP4_EXTENSIONS:
+            return video_path
+
+        try:
+            layout = self._layout(video_path)
+            if layout is None:
+                return video_path
+
+            # Keep the original file name: TikTok pre-fills the caption with it
+            target = self.cache_dir / content_hash(str(video_path)) / video_path.name
+            if target.exists():
+                logger.info(f"Using cached faststart copy of {video_path.name}")
+                # Refresh mtime so cache hits count as recent use for eviction
+                os.utime(target)
+                return target
+
+            self._remux(video_path, target, *layout)
+            logger.info(f"Moved moov to the front of {video_path.name}")
+            if self.max_cache_bytes:
+                self._evict(keep=target)
+            return target
+
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Faststart remux of {video_path.name} failed, uploading original: {e}")
+            return video_path
+
+    def _evict(self, keep: Path) -> int:
+        """
+        Delete least recently used copies until the cache fits in max_cache_mb.
+
+        Args:
+            keep: Copy that must not be evicted (the one about to be uploaded)
+
+        Returns:
+            Number of bytes freed
+        """
+        # Copies live in <hash>/<original name>; dot-prefixed files are partial writes
+        files = [p for p in self.cache_dir.glob("*/*") if p.is_file() and not p.name.startswith(".")]
+        total = sum(p.stat().st_size for p in files)
+        freed = 0
+        for path in sorted(files, key=lambda p: p.stat().st_mtime):
+            if total - freed <= self.max_cache_bytes:
+                break
+            if path == keep:
+                continue
+            size = path.stat().st_size
+            try:
+                path.unlink()
+            except OSError:
+                continue  # another process evicted it first
+            try:
+                path.parent.rmdir()
+            except OSError:
+                pass  # a concurrent remux of the same source is writing here
+            freed += size
+            logger.info(f"Evicted {path.name} from faststart cache ({size / (1024 * 1024):.1f} MB)")
+        return freed
+
+    def _layout(self, video_path: Path) -> Optional[Tuple[List[Tuple[bytes, int, int]], int, int, int]]:
+        """
+        Read the top-level box layout.
+
+        Returns:
+            (boxes as (type, offset, end), moov offset, moov end, first mdat
+            offset), or None if the file needs no remux
+        """
+        size = video_path.stat().st_size
+        boxes = []
+        with open(video_path, "rb") as f:
+            for box_type, offset, _, end in iter_boxes(f, 0, size):
+                if end > size:
+                    raise ValueError("file is truncated")
+                boxes.append((box_type, offset, end))
+
+        types = [b[0] for b in boxes]
+        if types.count(b"moov") != 1 or b"mdat" not in types or b"moof" in types:
+            return None
+
+        moov_index = types.index(b"moov")
+        mdat_index = types.index(b"mdat")
+        if moov_index < mdat_index:
+            return None
+
+        _, moov_start, moov_end = boxes[moov_index]
+        if moov_end - moov_start > MAX_MOOV_BYTES:
+            raise ValueError("moov box is too large")
+        return boxes, moov_start, moov_end, boxes[mdat_index][1]
+
+    def _remux(
+        self,
+        video_path: Path,
+        target: Path,
+        boxes: List[Tuple[bytes, int, int]],
+        moov_start: int,
+        moov_end: int,
+        mdat_start: int
+    ):
+        """Write boxes before the first mdat, then moov, then everything else."""
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(video_path, "rb") as src:
+            src.seek(moov_start)
+            moov = bytearray(src.read(moov_end - moov_start))
+            header = 16 if struct.unpack_from(">I", moov, 0)[0] == 1 else 8
+            # Media between the first mdat and the old moov position moves
+            # back by the size of moov; anything after it stays put
+            _patch_chunk_offsets(moov, header, len(moov), len(moov), (mdat_start, moov_start))
+
+            # Unique per call: processes remuxing the same source must not
+            # truncate each other's partial output
+            fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".part")
+            tmp = Path(tmp_name)
+            try:
+                with os.fdopen(fd, "wb") as dst:
+                    inserted = False
+                    for box_type, start, end in boxes:
+                        if box_type == b"moov":
+                            continue
+                        if not inserted and start >= mdat_start:
+                            dst.write(moov)
+                            inserted = True
+                        _copy_range(src, dst, start, end - start, self.chunk_size)
+                os.replace(tmp, target)
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
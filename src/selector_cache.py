@@ -0,0 +1,239 @@
+"""
+Selector Cache Module
+Remembers which selector of each fallback list matched, per page version, and
+tries the winners first next time.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from selenium.webdriver.remote.webdriver import WebDriver
+from loguru import logger
+
+from utils import update_json
+
+
+# Names of the page's scripts and stylesheets; TikTok's bundles carry content
+# hashes, so the list changes whenever the front end is redeployed
+PAGE_VERSION_JS = """
+var names = [];
+var nodes = document.querySelectorAll('script[src], link[rel="stylesheet"][href]');
+for (var i = 0; i < nodes.length; i++) {
+    var url = nodes[i].src || nodes[i].href || '';
+    names.push(url.split('?')[0].split('/').pop());
+}
+return names.sort().join(' ');
+"""
+
+# Score of a selector with no (or fully decayed) history
+PRIOR = 0.5
+
+
+def page_version(driver: WebDriver) -> str:
+    """
+    Fingerprint of the front-end build the current page was served from.
+
+    Args:
+        driver: Selenium WebDriver instance
+
+    Returns:
+        Short hash, or "unknown" if the page could not be read
+    """
+    try:
+        names = driver.execute_script(PAGE_VERSION_JS) or ""
+    except Exception as e:
+        logger.debug(f"Could not read page version: {e}")
+        return "unknown"
+    return hashlib.sha1(names.encode()).hexdigest()[:12] if names else "unknown"
+
+
+class SelectorCache:
+    """
+    Persisted hit statistics for the selector fallback lists.
+
+    For every group (e.g. "file-input", "caption") and page version it keeps,
+    per selector, decayed hit and miss counts, the mean time until the hit
+    and when it was last seen. ``order`` sorts a fallback list by smoothed
+    hit rate, so after TikTok changes its DOM only the first upload on the
+    new version walks the whole list. On a version it has not seen yet, the
+    statistics of the most recent version are used. Counts lose half their
+    weight every ``half_life_days`` and entries unseen for ``max_age_days``
+    are dropped.
+    """
+
+    CACHE_FILE = "data/cache/selector_cache.json"
+    MAX_VERSIONS = 5
+
+    def __init__(self, config: dict):
+        """
+        Initialize SelectorCache.
+
+        Args:
+            config: Application configuration
+        """
+        cache_config = config.get("selector_cache", {})
+        self.enabled = cache_config.get("enabled", True)
+        self.cache_file = Path(cache_config.get("file") or self.CACHE_FILE)
+        self.half_life = cache_config.get("half_life_days", 7) * 86400
+        self.max_age = cache_config.get("max_age_days", 30) * 86400
+        self._lock = threading.Lock()
+        # Outcomes recorded since the last save, per (group, version, selector)
+        self._pending: Dict[Tuple[str, str, str], dict] = {}
+        self.data: Dict[str, Dict[str, Dict[str, dict]]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Dict[str, dict]]]:
+        if not self.enabled:
+            return {}
+        try:
+            return json.loads(self.cache_file.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _weight(self, seen: float, now: float) -> float:
+        """How much of an entry's history still counts."""
+        return 0.5 ** (max(0.0, now - seen) / self.half_life) if self.half_life else 1.0
+
+    def _stats(self, group: str, version: Optional[str]) -> Dict[str, dict]:
+        """Statistics for a version, or for the most recently seen one."""
+        versions = self.data.get(group, {})
+        if version in versions:
+            return versions[version]
+        if not versions:
+            return {}
+        return max(versions.values(), key=lambda entries: max(
+            (entry.get("seen", 0) for entry in entries.values()), default=0
+        ))
+
+    def score(self, group: str, selector: str, version: Optional[str] = None, now: Optional[float] = None) -> float:
+        """Smoothed hit rate of a selector, decayed towards PRIOR with age."""
+        now = now or time.time()
+        entry = self._stats(group, version).get(selector)
+        if not entry:
+            return PRIOR
+        hits, misses = entry.get("hits", 0), entry.get("misses", 0)
+        rate = (hits + 1) / (hits + misses + 2)
+        return PRIOR + (rate - PRIOR) * self._weight(entry.get("seen", 0), now)
+
+    def order(self, group: str, selectors: Iterable[str], version: Optional[str] = None) -> List[str]:
+        """
+        Sort a fallback list so the likeliest selectors come first.
+
+        Ties (e.g. no history) keep the list's own order.
+
+        Args:
+            group: Selector group name
+            selectors: Fallback list in its default order
+            version: Page version from page_version()
+
+        Returns:
+            The selectors, best first
+        """
+        selectors = list(selectors)
+        if not self.enabled:
+            return selectors
+        now = time.time()
+        with self._lock:
+            scores = {selector: self.score(group, selector, version, now) for selector in selectors}
+        ordered = sorted(selectors, key=lambda selector: -scores[selector])
+        if ordered != selectors:
+            logger.debug(f"Selector order for '{group}': {ordered}")
+        return ordered
+
+    def record(
+        self,
+        group: str,
+        version: Optional[str],
+        hit: Optional[str],
+        tried: Iterable[str],
+        latency: float = 0.0,
+    ):
+        """
+        Record the outcome of one lookup.
+
+        Args:
+            group: Selector group name
+            version: Page version from page_version()
+            hit: Selector that worked, or None if none did
+            tried: Selectors that were tried and did not work
+            latency: Seconds until the hit
+        """
+        if not self.enabled:
+            return
+        version = version or "unknown"
+        now = time.time()
+        with self._lock:
+            entries = self.data.setdefault(group, {}).setdefault(version, {})
+            for selector in [s for s in tried if s != hit] + ([hit] if hit else []):
+                entry = entries.setdefault(selector, {"hits": 0.0, "misses": 0.0, "latency_s": 0.0, "seen": now})
+                weight = self._weight(entry["seen"], now)
+                entry["hits"] = round(entry["hits"] * weight, 3)
+                entry["misses"] = round(entry["misses"] * weight, 3)
+                pending = self._pending.setdefault(
+                    (group, version, selector), {"hits": 0, "misses": 0, "latency_total": 0.0}
+                )
+                if selector == hit:
+                    # Running mean over the (decayed) hits
+                    entry["latency_s"] = round(
+                        (entry["latency_s"] * entry["hits"] + latency) / (entry["hits"] + 1), 3
+                    )
+                    entry["hits"] += 1
+                    pending["hits"] += 1
+                    pending["latency_total"] += latency
+                else:
+                    entry["misses"] += 1
+                    pending["misses"] += 1
+                entry["seen"] = now
+                pending["seen"] = now
+
+    def save(self):
+        """
+        Merge this process's outcomes into the cache file and drop stale entries.
+
+        Only the hits and misses recorded since the last save are added to
+        the stored counts, so workers sharing the file never overwrite each
+        other's statistics.
+        """
+        if not self.enabled or not self._pending:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+            def merge(data: Dict[str, Dict[str, Dict[str, dict]]]) -> Dict[str, Dict[str, Dict[str, dict]]]:
+                now = time.time()
+                for (group, version, selector), delta in pending.items():
+                    entry = data.setdefault(group, {}).setdefault(version, {}).setdefault(
+                        selector, {"hits": 0.0, "misses": 0.0, "latency_s": 0.0, "seen": delta["seen"]}
+                    )
+                    weight = self._weight(entry["seen"], now)
+                    hits = entry["hits"] * weight
+                    if delta["hits"]:
+                        entry["latency_s"] = round(
+                            (entry["latency_s"] * hits + delta["latency_total"]) / (hits + delta["hits"]), 3
+                        )
+                    entry["hits"] = round(hits + delta["hits"], 3)
+                    entry["misses"] = round(entry["misses"] * weight + delta["misses"], 3)
+                    entry["seen"] = max(entry["seen"], delta["seen"])
+
+                for group in list(data):
+                    versions = {
+                        version: {s: e for s, e in entries.items() if now - e.get("seen", 0) < self.max_age}
+                        for version, entries in data[group].items()
+                    }
+                    newest = sorted(
+                        (v for v in versions if versions[v]),
+                        key=lambda v: max(e.get("seen", 0) for e in versions[v].values()),
+                        reverse=True,
+                    )[:self.MAX_VERSIONS]
+                    data[group] = {version: versions[version] for version in newest}
+                    if not data[group]:
+                        del data[group]
+                return data
+
+            try:
+                self.data = update_json(self.cache_file, merge)
+            except OSError as e:
+                logger.debug(f"Could not save selector cache: {e}")
@@ -0,0 +1,322 @@
+"""
+Tracing Module
+Lightweight spans for the upload pipeline, exported in OpenTelemetry (OTLP/JSON)
+or Chrome trace-event format without needing the OpenTelemetry SDK.
+"""
+
+import atexit
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import requests
+from loguru import logger
+
+
+@dataclass
+class Span:
+    """One timed operation; nested spans share the trace id of their root."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+    thread_id: int = 0
+
+    def set_attribute(self, key: str, value: Any):
+        """Attach a str/int/float/bool attribute (anything else is stored as str)."""
+        self.attributes[key] = value if isinstance(value, (str, int, float, bool)) else str(value)
+
+    def set_attributes(self, **attributes: Any):
+        """Attach several attributes."""
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def add_event(self, name: str, **attributes: Any):
+        """Record a point in time inside the span."""
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+
+    def record_exception(self, error: BaseException):
+        """Mark the span failed."""
+        self.error = f"{type(error).__name__}: {error}"
+        self.add_event("exception", type=type(error).__name__, message=str(error))
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off, so callers never need to check."""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, **attributes: Any):
+        pass
+
+    def add_event(self, name: str, **attributes: Any):
+        pass
+
+    def record_exception(self, error: BaseException):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+# The open span of the current thread (or task)
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def _any_value(value: Any) -> Dict[str, Any]:
+    """OTLP AnyValue for an attribute."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _any_value(value)} for key, value in attributes.items()]
+
+
+class Tracer:
+    """
+    Creates spans and exports them when they end.
+
+    Exporters (``tracing.exporter``):
+
+    - ``file``: appends to ``tracing.file``, either one OTLP/JSON
+      ExportTraceServiceRequest per line (``format: otlp``) or Chrome trace
+      events (``format: chrome``), which chrome://tracing and Perfetto show
+      as flame charts with one row per thread. Chrome traces go to one file
+      per process (``traces.<pid>.jsonl``), since each needs its own header.
+    - ``otlp``: POSTs OTLP/JSON to a collector (``tracing.endpoint``, e.g.
+      http://localhost:4318/v1/traces).
+
+    Finished spans are buffered and written when a root span ends, when the
+    buffer fills, and at exit.
+    """
+
+    BATCH_SIZE = 64
+
+    def __init__(self, config: dict):
+        """
+        Initialize Tracer.
+
+        Args:
+            config: Tracing configuration dictionary
+        """
+        self.exporter = config.get("exporter", "file")
+        self.format = config.get("format", "otlp")
+        self.file = Path(config.get("file") or "logs/traces.jsonl")
+        self.endpoint = config.get("endpoint") or "http://localhost:4318/v1/traces"
+        self.service_name = config.get("service_name", "tiktok-auto")
+        self._buffer: List[Span] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """
+        Time a block as a child of the current span.
+
+        Args:
+            name: Span name
+            **attributes: Initial attributes
+
+        Yields:
+            The span, for adding attributes while it runs
+        """
+        parent = _current.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            thread_id=threading.get_ident(),
+        )
+        span.set_attributes(**attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current.reset(token)
+            self._finish(span)
+
+    def _finish(self, span: Span):
+        with self._lock:
+            self._buffer.append(span)
+            if span.parent_id is not None and len(self._buffer) < self.BATCH_SIZE:
+                return
+            spans, self._buffer = self._buffer, []
+        self._export(spans)
+
+    def flush(self):
+        """Export buffered spans."""
+        with self._lock:
+            spans, self._buffer = self._buffer, []
+        if spans:
+            self._export(spans)
+
+    def _export(self, spans: List[Span]):
+        try:
+            if self.exporter == "otlp":
+                response = requests.post(self.endpoint, json=self._otlp(spans), timeout=5)
+                response.raise_for_status()
+            elif self.format == "chrome":
+                self._write_chrome(spans)
+            else:
+                self._append(json.dumps(self._otlp(spans), separators=(",", ":")) + "\n")
+        except (OSError, requests.RequestException) as e:
+            logger.debug(f"Could not export {len(spans)} spans: {e}")
+
+    def _append(self, text: str, path: Optional[Path] = None):
+        path = path or self.file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # One write per batch, so processes appending to the same file do not interleave
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(text)
+
+    def chrome_file(self) -> Path:
+        """Chrome trace file of this process."""
+        return self.file.with_name(f"{self.file.stem}.{os.getpid()}{self.file.suffix}")
+
+    def _otlp(self, spans: List[Span]) -> Dict[str, Any]:
+        """OTLP/JSON ExportTraceServiceRequest."""
+        resource = {"service.name": self.service_name, "process.pid": os.getpid()}
+        return {"resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes(resource)},
+            "scopeSpans": [{
+                "scope": {"name": "tiktok-auto.tracing"},
+                "spans": [{
+                    "traceId": span.trace_id,
+                    "spanId": span.span_id,
+                    **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                    "name": span.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(span.start_ns),
+                    "endTimeUnixNano": str(span.end_ns),
+                    "attributes": _otlp_attributes(dict(span.attributes, **{"thread.id": span.thread_id})),
+                    "events": [{
+                        "name": event["name"],
+                        "timeUnixNano": str(event["time_ns"]),
+                        "attributes": _otlp_attributes(event["attributes"]),
+                    } for event in span.events],
+                    "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+                } for span in spans],
+            }],
+        }]}
+
+    def _write_chrome(self, spans: List[Span]):
+        """Complete ("X") trace events; the JSON array is left open, which viewers accept."""
+        pid = os.getpid()
+        events = [json.dumps({
+            "name": span.name,
+            "cat": "upload",
+            "ph": "X",
+            "ts": span.start_ns // 1000,
+            "dur": max(1, (span.end_ns - span.start_ns) // 1000),
+            "pid": pid,
+            "tid": span.thread_id,
+            "args": dict(span.attributes, error=span.error) if span.error else span.attributes,
+        }, separators=(",", ":")) for span in spans]
+        path = self.chrome_file()
+        # Only this process writes the file, so the header check cannot race
+        # another process; the lock keeps this process's threads in order
+        with self._write_lock:
+            new_file = not path.exists() or path.stat().st_size == 0
+            self._append(("[\n" if new_file else "") + "".join(f"{event},\n" for event in events), path)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def setup_tracing(config: dict) -> Optional[Tracer]:
+    """
+    Enable tracing for this process if ``tracing.enabled`` is set.
+
+    Args:
+        config: Tracing configuration dictionary
+
+    Returns:
+        The tracer, or None if tracing is off
+    """
+    global _tracer
+    if _tracer is not None:
+        _tracer.flush()
+    _tracer = Tracer(config) if config.get("enabled", False) else None
+    if _tracer:
+        if _tracer.exporter == "otlp":
+            target = _tracer.endpoint
+        else:
+            target = _tracer.chrome_file() if _tracer.format == "chrome" else _tracer.file
+        logger.info(f"Tracing to {target} ({_tracer.format if _tracer.exporter == 'file' else 'otlp'})")
+    return _tracer
+
+
+def flush_traces():
+    """Export the spans buffered so far (call before a worker process exits)."""
+    if _tracer is not None:
+        _tracer.flush()
+
+
+# Registered once, so replacing the tracer does not pile up exit handlers
+atexit.register(flush_traces)
+
+
+@contextmanager
+def span(name: str, **attributes: Any):
+    """Time a block as a span (a no-op when tracing is off)."""
+    if _tracer is None:
+        yield NOOP_SPAN
+        return
+    with _tracer.span(name, **attributes) as current:
+        yield current
+
+
+def current_span():
+    """The open span of this thread, or a no-op stand-in."""
+    return (_tracer and _current.get()) or NOOP_SPAN
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    Decorator that runs a function inside a span named after it.
+
+    Boolean return values are recorded as the "result" attribute.
+
+    Args:
+        name: Span name (default: the function's qualified name)
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.span(span_name) as current:
+                result = func(*args, **kwargs)
+                if isinstance(result, bool):
+                    current.set_attribute("result", result)
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,389 @@
+"""
+File Transfer Module
+Moves videos onto a remote Selenium node without loading them into memory.
+"""
+
+import argparse
+import hmac
+import json
+import os
+import shutil
+import sys
+import tempfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, Optional
+from urllib.parse import quote, unquote
+
+import requests
+from loguru import logger
+
+from utils import content_hash
+
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def evict_lru(directory: Path, max_bytes: int, keep: Optional[Path] = None) -> int:
+    """
+    Delete least recently used files until the directory fits in max_bytes.
+
+    Files are ordered by mtime, which staging refreshes on every cache hit.
+
+    Args:
+        directory: Cache directory
+        max_bytes: Size limit
+        keep: File that must not be evicted (the one just staged)
+
+    Returns:
+        Number of bytes freed
+    """
+    files = [p for p in directory.iterdir() if p.is_file() and not p.name.startswith(".")]
+    total = sum(p.stat().st_size for p in files)
+    freed = 0
+    for path in sorted(files, key=lambda p: p.stat().st_mtime):
+        if total - freed <= max_bytes:
+            break
+        if keep is not None and path == keep:
+            continue
+        size = path.stat().st_size
+        path.unlink()
+        freed += size
+        logger.info(f"Evicted {path.name} from staging cache ({size / (1024 * 1024):.1f} MB)")
+    return freed
+
+
+def _write_atomic(target: Path, write: Callable[[BinaryIO], None]):
+    """
+    Write a file through a temp file in the same directory, then rename it.
+
+    The temp name is unique per call, so concurrent writers of the same
+    (content-addressed) name never truncate each other; the last rename wins
+    and either result is complete. Dot-prefixed temp files are skipped by
+    evict_lru.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_name, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+class FileTransfer:
+    """
+    Stages local videos where a remote browser can read them.
+
+    By default Selenium's LocalFileDetector zips and base64-encodes the whole
+    file into a single JSON request, which needs roughly 2.3x the file size
+    in memory. The modes below copy the file in fixed-size chunks instead and
+    hand the browser a path on its own filesystem:
+
+    - ``detector``: keep the LocalFileDetector behaviour (default)
+    - ``shared_volume``: a directory mounted in both containers; files already
+      inside it are used in place, others are copied in chunks
+    - ``http``: stream the file to a receiver sidecar on the browser node
+      (see ``python src/transfer.py --serve``)
+
+    With ``cache`` enabled, staged copies are named by content hash, so a
+    video posted to many accounts (or retried) crosses the network once.
+    """
+
+    def __init__(self, config: dict):
+        """
+        Initialize FileTransfer.
+
+        Args:
+            config: Application configuration
+        """
+        transfer_config = config.get("transfer", {})
+        self.mode = transfer_config.get("mode", "detector")
+        self.local_dir = transfer_config.get("local_dir")
+        self.remote_dir = transfer_config.get("remote_dir")
+        self.receiver_url = (transfer_config.get("receiver_url") or "").rstrip("/")
+        self.chunk_size = transfer_config.get("chunk_size_mb", 8) * 1024 * 1024
+        self.cache = transfer_config.get("cache", True)
+        self.cache_max_bytes = int(transfer_config.get("cache_max_gb", 20) * 1024 ** 3)
+        self.token = transfer_config.get("token") or os.environ.get("TRANSFER_TOKEN")
+        self._session: Optional[requests.Session] = None
+
+    @property
+    def streams(self) -> bool:
+        """True if files are staged on the node instead of sent via send_keys."""
+        return self.mode in ("shared_volume", "http")
+
+    def stage(self, local_path: str) -> str:
+        """
+        Make a local file available to the browser node.
+
+        Args:
+            local_path: Path to the video on this machine
+
+        Returns:
+            Path to pass to the file input (a node path in streaming modes)
+        """
+        if self.mode == "shared_volume":
+            return self._stage_shared_volume(Path(local_path))
+        if self.mode == "http":
+            return self._stage_http(Path(local_path))
+        return local_path
+
+    def _stage_shared_volume(self, path: Path) -> str:
+        """Map or copy the file into the shared directory."""
+        if not self.local_dir or not self.remote_dir:
+            raise ValueError("transfer.local_dir and transfer.remote_dir are required for shared_volume")
+
+        local_dir = Path(self.local_dir).resolve()
+        path = path.resolve()
+
+        # Already on the shared volume: nothing to copy
+        try:
+            return str(Path(self.remote_dir) / path.relative_to(local_dir))
+        except ValueError:
+            pass
+
+        if self.cache:
+            relative = Path("staging") / self._cache_name(path)
+        else:
+            relative = Path(path.name)
+        target = local_dir / relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        if self.cache and target.exists() and target.stat().st_size == path.stat().st_size:
+            os.utime(target)
+            logger.info(f"{path.name} already staged on shared volume, skipping copy")
+        else:
+            logger.info(f"Copying {path.name} to shared volume in {self.chunk_size // (1024 * 1024)} MB chunks...")
+            with open(path, "rb") as src:
+                _write_atomic(target, lambda dst: shutil.copyfileobj(src, dst, self.chunk_size))
+            if self.cache:
+                evict_lru(target.parent, self.cache_max_bytes, keep=target)
+
+        return str(Path(self.remote_dir) / relative)
+
+    def _cache_name(self, path: Path) -> str:
+        """Content-addressed file name for the staging cache."""
+        return f"{content_hash(str(path))}{path.suffix.lower()}"
+
+    def _read_chunks(self, path: Path) -> Iterator[bytes]:
+        """Yield the file in fixed-size chunks."""
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def _stage_http(self, path: Path) -> str:
+        """Stream the file to the receiver sidecar with a chunked PUT."""
+        if not self.receiver_url:
+            raise ValueError("transfer.receiver_url is required for http mode")
+        if self._session is None:
+            self._session = requests.Session()
+            if self.token:
+                self._session.headers["Authorization"] = f"Bearer {self.token}"
+
+        size = path.stat().st_size
+        name = self._cache_name(path) if self.cache else path.name
+        url = f"{self.receiver_url}/{quote(name)}"
+
+        if self.cache:
+            head = self._session.head(url, timeout=10)
+            if head.status_code == 200 and int(head.headers.get("Content-Length", -1)) == size:
+                logger.info(f"{path.name} already staged on browser node, skipping transfer")
+                return head.headers["X-Staged-Path"]
+
+        logger.info(f"Streaming {path.name} ({size / (1024 * 1024):.1f} MB) to {self.receiver_url}...")
+        response = self._session.put(
+            url,
+            data=self._read_chunks(path),
+            timeout=(10, 600)
+        )
+        response.raise_for_status()
+        return response.json()["path"]
+
+
+class _ReceiverHandler(BaseHTTPRequestHandler):
+    """Writes PUT bodies to the staging directory, chunk by chunk."""
+
+    staging_dir: Path = Path("/tmp/staging")
+    # Where the browser sees the staging directory (differs when the
+    # receiver runs in a sidecar container with its own mount point)
+    browser_dir: Path = Path("/tmp/staging")
+    max_bytes: Optional[int] = None
+    # Shared secret clients must send as "Authorization: Bearer <token>"
+    token: Optional[str] = None
+
+    def _authorized(self) -> bool:
+        """Check the bearer token (if one is configured), answering 401 if it is wrong."""
+        if not self.token:
+            return True
+        sent = self.headers.get("Authorization", "")
+        if hmac.compare_digest(sent.encode("utf-8"), f"Bearer {self.token}".encode("utf-8")):
+            return True
+        self.send_response(401)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        self.close_connection = True
+        return False
+
+    def do_HEAD(self):
+        if not self._authorized():
+            return
+        name = Path(unquote(self.path.lstrip("/"))).name
+        target = self.staging_dir / name
+        if not name or not target.is_file():
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        # Refresh mtime so cache hits count as recent use for eviction
+        os.utime(target)
+        self.send_response(200)
+        self.send_header("Content-Length", str(target.stat().st_size))
+        self.send_header("X-Staged-Path", str(self.browser_dir / name))
+        self.end_headers()
+
+    def do_PUT(self):
+        if not self._authorized():
+            return
+        name = Path(unquote(self.path.lstrip("/"))).name
+        if not name:
+            self.send_error(400, "missing file name")
+            return
+
+        target = self.staging_dir / name
+        try:
+            _write_atomic(target, self._read_body)
+        except ValueError as e:
+            # Nothing was renamed into place, so the cache never holds a partial file
+            logger.warning(f"Rejected upload of {name}: {e}")
+            self.close_connection = True
+            try:
+                self.send_error(400, str(e))
+            except OSError:
+                pass  # the client is usually gone already
+            return
+        if self.max_bytes:
+            evict_lru(self.staging_dir, self.max_bytes, keep=target)
+
+        body = json.dumps({"path": str(self.browser_dir / name)}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self, f):
+        """
+        Copy the request body (chunked or with Content-Length) to f.
+
+        Raises:
+            ValueError: If the client sent less than it announced
+        """
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                # An empty line here means the client went away mid-body
+                size = int(self.rfile.readline().strip().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                self._copy_exact(f, size)
+                self.rfile.readline()
+        else:
+            self._copy_exact(f, int(self.headers.get("Content-Length", 0)))
+
+    def _copy_exact(self, f, length: int):
+        """Copy exactly ``length`` bytes of the request body to f."""
+        reader = _LimitedReader(self.rfile, length)
+        shutil.copyfileobj(reader, f, CHUNK_SIZE)
+        if reader.remaining:
+            raise ValueError(f"body ended after {length - reader.remaining} of {length} bytes")
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class _LimitedReader:
+    """File-like wrapper that reads at most ``remaining`` bytes."""
+
+    def __init__(self, stream, remaining: int):
+        self.stream = stream
+        self.remaining = remaining
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.stream.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+def serve(
+    staging_dir: str,
+    browser_dir: Optional[str] = None,
+    host: str = "127.0.0.1",
+    port: int = 8800,
+    max_gb: Optional[float] = None,
+    token: Optional[str] = None
+):
+    """
+    Run the receiver sidecar on the browser node.
+
+    Args:
+        staging_dir: Directory received files are written to
+        browser_dir: Same directory as mounted in the browser container
+        host: Interface to bind
+        port: Port to listen on
+        max_gb: Evict least recently used files beyond this size
+        token: Shared secret required from clients; mandatory when binding
+            anything but loopback, since the receiver writes files
+
+    Raises:
+        ValueError: If asked to listen beyond loopback without a token
+    """
+    if not token and host not in ("127.0.0.1", "localhost", "::1"):
+        raise ValueError(f"Refusing to listen on {host} without a token (--token or TRANSFER_TOKEN)")
+    _ReceiverHandler.token = token
+    _ReceiverHandler.staging_dir = Path(staging_dir)
+    _ReceiverHandler.browser_dir = Path(browser_dir or staging_dir)
+    _ReceiverHandler.max_bytes = int(max_gb * 1024 ** 3) if max_gb else None
+    _ReceiverHandler.staging_dir.mkdir(parents=True, exist_ok=True)
+    server = ThreadingHTTPServer((host, port), _ReceiverHandler)
+    logger.info(f"Receiving files into {staging_dir} on {host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Video transfer receiver for remote browser nodes")
+    parser.add_argument("--serve", action="store_true", help="Run the receiver sidecar")
+    parser.add_argument("--dir", type=str, default="/tmp/staging", help="Staging directory")
+    parser.add_argument("--browser-dir", type=str, default=None, help="Staging directory as seen by the browser")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to bind (non-loopback needs a token)")
+    parser.add_argument("--port", type=int, default=8800, help="Port to listen on")
+    parser.add_argument("--token", type=str, default=os.environ.get("TRANSFER_TOKEN"),
+                        help="Shared secret clients must send (default: $TRANSFER_TOKEN)")
+    parser.add_argument("--max-size-gb", type=float, default=None, help="Staging cache size limit")
+    args = parser.parse_args()
+
+    if not args.serve:
+        parser.print_help()
+        sys.exit(1)
+    try:
+        serve(args.dir, args.browser_dir, host=args.host, port=args.port, max_gb=args.max_size_gb, token=args.token)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
@@ -3,41 +3,143 @@ Video Uploader Module
 Handles video upload and posting to TikTok.
 """
 
+import os
 import time
 import random
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
 
 from selenium.webdriver.remote.webdriver import WebDriver
-from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.file_detector import UselessFileDetector
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.action_chains import ActionChains
 from loguru import logger
 
+from blocking import report_page, use_profile
+from commands import report_commands, reset_commands
 from login import LoginManager
+from probe import DomProbe, css, xpath
+from readiness import FILE_INPUT_SELECTORS, wait_until_ready
+from remux import FaststartRemuxer
+from selector_cache import SelectorCache, page_version
+from tracing import current_span, traced
+from transfer import FileTransfer
+from waits import WaitPolicy
+
+
+# Resolves with {status: "ready"} once the Post button is enabled and stays
+# enabled for the settle period while no progress below 100% is shown, or
+# {status: "pending", progress} when the wait slice runs out.
+WAIT_FOR_UPLOAD_JS = """
+var waitMs = arguments[0], settleMs = arguments[1];
+var done = arguments[arguments.length - 1];
+var finished = false, settleTimer = null, observer = null, lastProgress = null;
+
+function visible(el) {
+    return !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+}
+function postReady() {
+    var buttons = document.querySelectorAll('button');
+    for (var i = 0; i < buttons.length; i++) {
+        var b = buttons[i];
+        if ((b.innerText || '').trim().toLowerCase() === 'post' && visible(b) &&
+                !b.disabled && b.getAttribute('aria-disabled') !== 'true') {
+            return true;
+        }
+    }
+    return false;
+}
+function progress() {
+    var walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+    var node, re = /^(\\d{1,3})(?:\\.\\d+)?\\s*%$/;
+    while ((node = walker.nextNode())) {
+        var m = node.nodeValue.trim().match(re);
+        if (m && node.parentElement && visible(node.parentElement)) {
+            return parseInt(m[1], 10);
+        }
+    }
+    return null;
+}
+function uploading() {
+    lastProgress = progress();
+    return lastProgress !== null && lastProgress < 100;
+}
+function finish(status) {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(sliceTimer);
+    if (settleTimer) clearTimeout(settleTimer);
+    done({status: status, progress: lastProgress});
+}
+function check() {
+    if (finished) return;
+    if (!uploading() && postReady()) {
+        if (!settleTimer) {
+            settleTimer = setTimeout(function() {
+                settleTimer = null;
+                if (!uploading() && postReady()) finish('ready');
+            }, settleMs);
+        }
+    } else if (settleTimer) {
+        clearTimeout(settleTimer);
+        settleTimer = null;
+    }
+}
+
+var sliceTimer = setTimeout(function() { finish('pending'); }, waitMs);
+observer = new MutationObserver(check);
+observer.observe(document.body, {
+    subtree: true, childList: true, characterData: true,
+    attributes: true, attributeFilter: ['disabled', 'aria-disabled', 'class', 'style']
+});
+check();
+"""
 
 
 class TikTokUploader:
     """Handles video upload to TikTok."""
     
-    def __init__(self, driver: WebDriver, config: dict):
+    def __init__(self, driver: WebDriver, config: dict, cookie_file: Optional[str] = None):
         """
         Initialize TikTokUploader.
         
         Args:
             driver: Selenium WebDriver instance
             config: Application configuration
+            cookie_file: Cookie jar of the account to post as
         """
         self.driver = driver
         self.config = config
-        self.login_manager = LoginManager(driver, config)
+        self.login_manager = LoginManager(driver, config, cookie_file=cookie_file)
+        self.probe = DomProbe(driver)
+        self.transfer = FileTransfer(config)
+        self.remuxer = FaststartRemuxer(config)
         self.upload_url = config.get("tiktok", {}).get(
             "upload_url", 
             "https://www.tiktok.com/creator-center/upload"
         )
         self.timing = config.get("timing", {})
+        self.waits = WaitPolicy(config)
+        self.selectors = SelectorCache(config)
+        # Front-end build of the current upload page (see selector_cache)
+        self.page_version: Optional[str] = None
+        # Set by BrowserPool when the upload page is already open and fresh
+        self.upload_page_ready = False
+        # Seconds spent per stage of the last upload (human-like delays excluded)
+        self.timings: Dict[str, float] = {}
+        # WebDriver commands of the last upload (see commands.CommandMonitor)
+        self.command_report: Optional[dict] = None
+        
+    @contextmanager
+    def _timed(self, stage: str):
+        """Add the time spent in the block to ``self.timings[stage]``."""
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + time.time() - start_time
         
     def _random_delay(self, min_delay: float = None, max_delay: float = None):
         """Add random delay to simulate human behavior."""
@@ -53,11 +155,14 @@ class TikTokUploader:
             element.send_keys(char)
             time.sleep(random.uniform(typing_delay * 0.5, typing_delay * 1.5))
     
+    @traced()
     def upload_video(
         self, 
         video_path: str, 
         title: str = "", 
-        tags: List[str] = None
+        tags: List[str] = None,
+        check_login: bool = True,
+        on_stage: Optional[Callable[[str], None]] = None
     ) -> bool:
         """
         Upload a video to TikTok.
@@ -66,9 +171,16 @@ class TikTokUploader:
             video_path: Path to video file
             title: Video title/caption
             tags: List of hashtags (without #)
+            check_login: Verify the session before uploading (batch runs
+                check once up front and skip it per video)
+            on_stage: Called with "uploading", "caption_filled", "posting"
+                (right before the Post click), "posted" and "verified" as the
+                upload progresses
             
         Returns:
-            True if upload successful
+            True if Post was clicked. A post TikTok did not confirm in time
+            also counts, since it may be live; only then is "verified"
+            never reported to on_stage.
         """
         tags = tags or []
         video_path = Path(video_path).resolve()
@@ -78,34 +190,56 @@ class TikTokUploader:
             return False
             
         logger.info(f"Starting upload: {video_path.name}")
-        
-        # Ensure logged in
-        if not self.login_manager.ensure_logged_in():
-            logger.error("Cannot upload: not logged in")
-            return False
+        self.timings = {}
+        self.command_report = None
+        reset_commands(self.driver)
             
         try:
-            # Navigate to upload page
-            logger.info("Navigating to upload page...")
-            self.driver.get(self.upload_url)
-            self._random_delay(3, 5)
+            video_path = self.remuxer.prepare(video_path)
+            current_span().set_attributes(video=video_path.name, file_size=video_path.stat().st_size)
             
-            # Find and use the file input
-            logger.info("Uploading video file...")
-            file_input = self._find_file_input()
+            # Ensure logged in
+            if check_login:
+                with self._timed("login_check"):
+                    logged_in = self.login_manager.ensure_logged_in()
+                if not logged_in:
+                    logger.error("Cannot upload: not logged in")
+                    return False
+                
+            with self._timed("navigation"):
+                # Navigate to upload page (skipped when a warm pool already opened it)
+                if self.upload_page_ready:
+                    logger.info("Upload page already open")
+                    self.upload_page_ready = False
+                else:
+                    logger.info("Navigating to upload page...")
+                    use_profile(self.driver, "upload")
+                    self.driver.get(self.upload_url)
+                
+                # Find and use the file input
+                logger.info("Uploading video file...")
+                file_input = self._find_file_input()
             if not file_input:
                 logger.error("Could not find file input element")
+                self._check_auth_redirect()
                 return False
+            report_page(self.driver, "upload")
                 
-            file_input.send_keys(str(video_path))
+            self._notify_stage(on_stage, "uploading")
+            with self._timed("file_transfer"):
+                self._send_file(file_input, video_path)
             
             # Wait for upload to complete
-            if not self._wait_for_upload():
+            with self._timed("upload_wait"):
+                uploaded = self._wait_for_upload()
+            if not uploaded:
                 logger.error("Video upload timed out")
+                self._check_auth_redirect()
                 return False
             
             # Handle first-time popup "Turn on automatic content checks?"
-            self._handle_content_check_popup()
+            with self._timed("upload_wait"):
+                self._handle_content_check_popup()
                 
             logger.info("Video file uploaded, filling details...")
             
@@ -119,53 +253,112 @@ class TikTokUploader:
             self._random_delay()
             
             # Fill in title and tags
-            self._fill_caption(title, tags)
+            with self._timed("caption_fill"):
+                self._fill_caption(title, tags)
+            self._notify_stage(on_stage, "caption_filled")
             self._random_delay(2, 4)
             
-            # Click post button
-            if self._click_post_button():
-                # Handle any warning popups (e.g., "Content may be restricted")
-                self._handle_warning_popups()
+            # Click post button; from here on the video may go live, so a
+            # crash must not lead to the job being uploaded again
+            if not self._notify_stage(on_stage, "posting"):
+                logger.error("Could not record the posting state; not clicking Post")
+                return False
+            with self._timed("post_click"):
+                clicked = self._click_post_button()
+                if clicked:
+                    # Handle any warning popups (e.g., "Content may be restricted")
+                    self._handle_warning_popups()
+            if clicked:
+                self._notify_stage(on_stage, "posted")
                 
                 logger.info("Waiting for post to complete...")
-                return self._wait_for_post_complete()
+                with self._timed("post_confirmation"):
+                    confirmed = self._wait_for_post_complete()
+                if confirmed:
+                    self._notify_stage(on_stage, "verified")
+                else:
+                    # The click went through, so the video may be live: a
+                    # retry could post it twice. Queued jobs stay "posted".
+                    logger.warning("Post clicked but not confirmed; check the profile before retrying")
+                    self._check_auth_redirect()
+                return True
             else:
                 logger.error("Could not find post button")
+                # Nothing was clicked, so the job can safely be retried
+                self._notify_stage(on_stage, "caption_filled")
+                self._check_auth_redirect()
                 return False
                 
         except Exception as e:
             logger.exception(f"Error during upload: {e}")
+            self._check_auth_redirect()
+            return False
+        finally:
+            self.command_report = report_commands(self.driver, video_path.name)
+            self.waits.export()
+            self.selectors.save()
+    
+    def _check_auth_redirect(self):
+        """Drop the cached login state if a failed step landed on an auth page."""
+        try:
+            url = self.driver.current_url
+        except Exception:
+            return
+        if self.login_manager.is_auth_url(url):
+            self.login_manager.invalidate(f"redirected to {url}")
+    
+    def _notify_stage(self, on_stage: Optional[Callable[[str], None]], stage: str) -> bool:
+        """Report an upload stage to the caller without letting it break the upload."""
+        if not on_stage:
+            return True
+        try:
+            on_stage(stage)
+            return True
+        except Exception as e:
+            logger.warning(f"Stage callback failed for '{stage}': {e}")
             return False
     
+    def _send_file(self, file_input, video_path: Path):
+        """Hand the video to the file input, staging it on the node in remote mode."""
+        is_remote = os.environ.get("SELENIUM_REMOTE_URL") is not None
+        if not is_remote or not self.transfer.streams:
+            file_input.send_keys(str(video_path))
+            return
+            
+        # The file is already on the node: send the path as-is instead of
+        # letting LocalFileDetector zip and base64 the whole video
+        node_path = self.transfer.stage(str(video_path))
+        logger.info(f"Video staged on browser node: {node_path}")
+        with self.driver.file_detector_context(UselessFileDetector):
+            file_input.send_keys(node_path)
+    
+    @traced()
     def _find_file_input(self) -> Optional[object]:
         """Find the file input element on the upload page."""
-        # Wait longer for page to load (especially in Docker/remote mode)
-        logger.info("Waiting for page to load...")
-        time.sleep(5)
+        # Poll until the input is attached instead of sleeping for the page
+        # load (pages load with the eager/none strategy, see BrowserManager)
+        logger.info("Waiting for file input...")
+        start_time = time.time()
+        snapshot = wait_until_ready(self.driver, "file-input-attached", self.waits)
+        latency = time.time() - start_time
         
         # Log current URL for debugging
-        logger.info(f"Current URL: {self.driver.current_url}")
-        
-        selectors = [
-            'input[type="file"]',
-            'input[accept*="video"]',
-            '[data-e2e="upload-input"]',
-            'input[accept*="mp4"]',
-            'input.upload-input',
-        ]
-        
-        # Try to find with longer timeout
-        for selector in selectors:
-            try:
-                logger.debug(f"Trying selector: {selector}")
-                element = WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                )
+        logger.info(f"Current URL: {snapshot.url}")
+        
+        # Selectors that matched on earlier runs of this page version first
+        self.page_version = page_version(self.driver)
+        tried = []
+        for selector in self.selectors.order("file-input", FILE_INPUT_SELECTORS, self.page_version):
+            element = snapshot[selector].element
+            if element is not None:
                 logger.info(f"Found file input: {selector}")
+                self.selectors.record("file-input", self.page_version, selector, tried, latency)
+                current_span().set_attributes(selector=selector, retries=len(tried), page_version=self.page_version)
                 return element
-            except TimeoutException:
-                logger.debug(f"Selector not found: {selector}")
-                continue
+            logger.debug(f"Selector not found: {selector}")
+            tried.append(selector)
+        self.selectors.record("file-input", self.page_version, None, tried)
+        current_span().set_attributes(retries=len(tried), page_version=self.page_version)
         
         # Try JavaScript as fallback
         try:
@@ -192,61 +385,99 @@ class TikTokUploader:
                 
         return None
     
+    @traced()
     def _wait_for_upload(self, timeout: int = None) -> bool:
-        """Wait for video upload to complete."""
-        timeout = timeout or self.config.get("upload", {}).get("upload_timeout", 300)
+        """
+        Wait for video upload to complete.
+        
+        Installs a MutationObserver in the page that resolves a single async
+        script as soon as the Post button is enabled and no upload progress
+        below 100% is shown. The script returns every few seconds with the
+        current progress so it can be logged; falls back to DOM polling if
+        async scripts are not available.
+        """
+        upload_config = self.config.get("upload", {})
+        timeout = timeout or upload_config.get("upload_timeout", 300)
+        settle_ms = int(upload_config.get("settle_seconds", 1.5) * 1000)
+        chunk = upload_config.get("progress_log_interval", 15)
         
         logger.info(f"Waiting for upload (timeout: {timeout}s)...")
         
+        start_time = time.time()
+        previous_timeout = None
+        span = current_span()
+        slices = 0
+        try:
+            previous_timeout = self.driver.timeouts.script
+            self.driver.set_script_timeout(chunk + 10)
+            while time.time() - start_time < timeout:
+                remaining = timeout - (time.time() - start_time)
+                wait_ms = int(min(chunk, remaining) * 1000)
+                result = self.driver.execute_async_script(WAIT_FOR_UPLOAD_JS, wait_ms, settle_ms) or {}
+                slices += 1
+                
+                if result.get("status") == "ready":
+                    logger.info(f"Upload completed in {time.time() - start_time:.1f}s (Post button enabled)")
+                    span.set_attributes(mode="event", slices=slices)
+                    return True
+                if result.get("progress") is not None:
+                    logger.info(f"Upload in progress: {result['progress']}%")
+        except Exception as e:
+            logger.warning(f"Event-driven upload wait failed ({e}), falling back to polling")
+            span.set_attributes(mode="poll", slices=slices)
+            return self._poll_for_upload(timeout - (time.time() - start_time))
+        finally:
+            if previous_timeout is not None:
+                try:
+                    self.driver.set_script_timeout(previous_timeout)
+                except Exception:
+                    pass
+        
+        logger.warning("Upload wait timed out, but continuing anyway...")
+        span.set_attributes(mode="event", slices=slices, timed_out=True)
+        return True  # Continue anyway, might still work
+    
+    def _poll_for_upload(self, timeout: float) -> bool:
+        """Wait for upload by polling the DOM (fallback when async scripts fail)."""
+        logger.info(f"Polling for upload (timeout: {timeout:.0f}s)...")
+        
         start_time = time.time()
         post_found_count = 0  # Need to find Post button multiple times to confirm
         
         while time.time() - start_time < timeout:
+            snapshot = self.probe.snapshot({
+                "post": css("button", text="post"),
+                "edit_cover": xpath('//*[contains(text(), "Edit cover")]'),
+                "progress": xpath('//*[contains(text(), "%")]', texts=10),
+            })
+            
             # Check if Post button exists AND is clickable (not just present)
-            try:
-                buttons = self.driver.find_elements(By.TAG_NAME, "button")
-                for button in buttons:
-                    try:
-                        btn_text = button.text.strip().lower()
-                        if btn_text == "post" and button.is_displayed() and button.is_enabled():
-                            post_found_count += 1
-                            logger.info(f"Post button detected (count: {post_found_count})")
-                            # Confirm by finding it 3 times (page is stable)
-                            if post_found_count >= 3:
-                                logger.info("Upload completed (Post button stable)")
-                                time.sleep(2)  # Extra wait for UI to settle
-                                return True
-                    except:
-                        continue
-            except:
-                pass
+            if snapshot["post"].clickable:
+                post_found_count += 1
+                logger.info(f"Post button detected (count: {post_found_count})")
+                # Confirm by finding it 3 times (page is stable)
+                if post_found_count >= 3:
+                    logger.info("Upload completed (Post button stable)")
+                    time.sleep(2)  # Extra wait for UI to settle
+                    return True
             
             # Also check for "Edit cover" text which appears after upload
-            try:
-                edit_cover = self.driver.find_elements(By.XPATH, '//*[contains(text(), "Edit cover")]')
-                if edit_cover and any(e.is_displayed() for e in edit_cover):
-                    logger.info("Found 'Edit cover' - video uploaded")
-                    post_found_count += 1
-            except:
-                pass
+            if snapshot["edit_cover"].visible:
+                logger.info("Found 'Edit cover' - video uploaded")
+                post_found_count += 1
             
-            # Check upload progress
-            try:
-                # Look for upload percentage or progress bar
-                progress = self.driver.find_elements(By.XPATH, '//*[contains(text(), "%")]')
-                for p in progress:
-                    text = p.text.strip()
-                    if '%' in text and text != '100%':
-                        logger.info(f"Upload in progress: {text}")
-                        post_found_count = 0  # Reset if still uploading
-            except:
-                pass
+            # Check upload progress (percentage text)
+            for text in snapshot["progress"].texts:
+                if '%' in text and text != '100%':
+                    logger.info(f"Upload in progress: {text}")
+                    post_found_count = 0  # Reset if still uploading
                 
             time.sleep(3)
         
         logger.warning("Upload wait timed out, but continuing anyway...")
         return True  # Continue anyway, might still work
     
+    @traced()
     def _fill_caption(self, title: str, tags: List[str]):
         """Fill in the video caption with title and hashtags."""
         # Build full caption
@@ -301,49 +532,46 @@ class TikTokUploader:
         
         logger.info(f"Attempting to fill caption: {full_caption[:30]}...")
         
-        for selector in caption_selectors:
+        # One round trip tells us which selectors have a visible editor
+        snapshot = self.probe.snapshot({
+            selector: css(selector) for selector in caption_selectors
+        })
+        
+        tried = []
+        for selector in self.selectors.order("caption", caption_selectors, self.page_version):
+            result = snapshot[selector]
+            logger.info(f"Selector '{selector}' found {result.count} elements ({result.visible_count} visible)")
+            if not result.visible:
+                tried.append(selector)
+                continue
+            
+            element = result.element
             try:
-                elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                logger.info(f"Selector '{selector}' found {len(elements)} elements")
+                # Click and type
+                element.click()
+                time.sleep(0.5)
+                
+                # Select all and delete (ActionChains for more reliable input)
+                actions = ActionChains(self.driver)
+                actions.click(element)
+                actions.key_down(Keys.CONTROL).send_keys('a').key_up(Keys.CONTROL)
+                actions.send_keys(Keys.BACKSPACE)
+                actions.perform()
+                time.sleep(0.3)
+                
+                # Type caption
+                element.send_keys(full_caption)
+                logger.info(f"Caption added: {full_caption[:50]}...")
+                self.selectors.record("caption", self.page_version, selector, tried)
+                current_span().set_attributes(selector=selector, retries=len(tried))
+                return
                 
-                # Find the actual caption editor
-                for i, element in enumerate(elements):
-                    try:
-                        visible = element.is_displayed()
-                        size = element.size
-                        logger.info(f"  Element {i}: visible={visible}, size={size}")
-                        
-                        if not visible:
-                            continue
-                        
-                        # Click and type
-                        element.click()
-                        time.sleep(0.5)
-                        
-                        # Select all and delete
-                        from selenium.webdriver.common.keys import Keys
-                        from selenium.webdriver.common.action_chains import ActionChains
-                        
-                        # Use ActionChains for more reliable input
-                        actions = ActionChains(self.driver)
-                        actions.click(element)
-                        actions.key_down(Keys.CONTROL).send_keys('a').key_up(Keys.CONTROL)
-                        actions.send_keys(Keys.BACKSPACE)
-                        actions.perform()
-                        time.sleep(0.3)
-                        
-                        # Type caption
-                        element.send_keys(full_caption)
-                        logger.info(f"Caption added: {full_caption[:50]}...")
-                        return
-                        
-                    except Exception as e:
-                        logger.warning(f"Element {i} interaction failed: {e}")
-                        continue
-                        
             except Exception as e:
-                logger.debug(f"Caption selector {selector} failed: {e}")
+                logger.warning(f"Caption editor '{selector}' interaction failed: {e}")
+                tried.append(selector)
                 continue
+        self.selectors.record("caption", self.page_version, None, tried)
+        current_span().set_attributes(selector="javascript", retries=len(tried))
         
         # JavaScript fallback
         try:
@@ -372,8 +600,6 @@ class TikTokUploader:
     
     def _handle_content_check_popup(self):
         """Handle first-time 'Turn on automatic content checks?' popup."""
-        time.sleep(1)
-        
         try:
             # Look for "Turn on" button
             turn_on_selectors = [
@@ -383,43 +609,61 @@ class TikTokUploader:
                 'button.TUXButton--primary',
             ]
             
-            for selector in turn_on_selectors:
-                try:
-                    if selector.startswith("//"):
-                        btn = self.driver.find_element(By.XPATH, selector)
-                    else:
-                        btn = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    
-                    if btn and btn.is_displayed() and "turn on" in btn.text.lower():
-                        btn.click()
-                        logger.info("Clicked 'Turn on' for automatic content checks")
-                        time.sleep(1)
-                        return
-                except:
-                    continue
+            specs = {
+                selector: (xpath if selector.startswith("//") else css)(selector, contains="turn on")
+                for selector in turn_on_selectors
+            }
+            specs["cancel"] = xpath('//button[text()="Cancel"]')
+            # Usually absent: give it a short, configured chance to appear
+            snapshot = self.waits.until(
+                "content-check-popup",
+                lambda: self.probe.snapshot(specs),
+                lambda snap: any(result.visible for result in snap.probes.values()),
+            )
+            if snapshot is None:
+                return
+            
+            # Only a shown popup says anything about the selectors
+            tried = []
+            for selector in self.selectors.order("content-check-popup", turn_on_selectors, self.page_version):
+                if snapshot[selector].visible:
+                    snapshot[selector].element.click()
+                    logger.info("Clicked 'Turn on' for automatic content checks")
+                    self.selectors.record("content-check-popup", self.page_version, selector, tried)
+                    time.sleep(1)
+                    return
+                tried.append(selector)
             
             # If "Turn on" not found, try "Cancel"
-            try:
-                cancel_btn = self.driver.find_element(By.XPATH, '//button[text()="Cancel"]')
-                if cancel_btn and cancel_btn.is_displayed():
-                    cancel_btn.click()
-                    logger.info("Clicked 'Cancel' for content checks popup")
-                    time.sleep(0.5)
-            except:
-                pass
+            if snapshot["cancel"].visible:
+                snapshot["cancel"].element.click()
+                logger.info("Clicked 'Cancel' for content checks popup")
+                time.sleep(0.5)
                 
         except Exception as e:
             logger.debug(f"No content check popup found: {e}")
 
     def _handle_warning_popups(self):
         """Handle warning popups like 'Content may be restricted'."""
-        time.sleep(1.5)  # Wait for popup to appear
-        
         try:
-            # Check if "Content may be restricted" popup exists
-            popup_title = self.driver.find_elements(By.XPATH, '//*[text()="Content may be restricted"]')
+            # Check the popup and all close icons in one round trip
+            close_selectors = [
+                'div.common-modal-close-icon',
+                '[class*="close-icon"]',
+                '[class*="closeIcon"]',
+                '[class*="modal-close"]',
+                '.px-icon',
+            ]
+            specs = {selector: css(selector) for selector in close_selectors}
+            specs["popup"] = xpath('//*[text()="Content may be restricted"]')
+            # Usually absent: give it a short, configured chance to appear
+            snapshot = self.waits.until(
+                "warning-popup",
+                lambda: self.probe.snapshot(specs),
+                lambda snap: snap["popup"].found,
+            )
             
-            if not popup_title:
+            if snapshot is None or not snapshot["popup"].found:
                 logger.debug("No 'Content may be restricted' popup found")
                 return
             
@@ -427,36 +671,26 @@ class TikTokUploader:
             
             popup_closed = False
             
-            # Method 1: Click the close icon DIV (class: common-modal-close-icon)
-            try:
-                close_icon = self.driver.find_element(By.CSS_SELECTOR, 'div.common-modal-close-icon')
-                if close_icon and close_icon.is_displayed():
-                    close_icon.click()
-                    logger.info("Closed popup using div.common-modal-close-icon")
+            # Methods 1 and 2: Click the first visible close icon
+            # (the one that worked before first, then generic close icons)
+            tried = []
+            for selector in self.selectors.order("warning-popup-close", close_selectors, self.page_version):
+                close_elem = snapshot[selector]
+                if not close_elem.visible:
+                    tried.append(selector)
+                    continue
+                try:
+                    close_elem.element.click()
+                    logger.info(f"Closed popup using {selector}")
                     popup_closed = True
                     time.sleep(1)
-            except Exception as e:
-                logger.debug(f"Method 1 (common-modal-close-icon) failed: {e}")
-            
-            # Method 2: Try other close icon selectors
-            if not popup_closed:
-                close_selectors = [
-                    '[class*="close-icon"]',
-                    '[class*="closeIcon"]',
-                    '[class*="modal-close"]',
-                    '.px-icon',
-                ]
-                for selector in close_selectors:
-                    try:
-                        close_elem = self.driver.find_element(By.CSS_SELECTOR, selector)
-                        if close_elem and close_elem.is_displayed():
-                            close_elem.click()
-                            logger.info(f"Closed popup using {selector}")
-                            popup_closed = True
-                            time.sleep(1)
-                            break
-                    except:
-                        continue
+                    break
+                except Exception as e:
+                    logger.debug(f"Close icon {selector} failed: {e}")
+                    tried.append(selector)
+            self.selectors.record(
+                "warning-popup-close", self.page_version, selector if popup_closed else None, tried
+            )
             
             # Method 3: Use JavaScript to click the close icon
             if not popup_closed:
@@ -482,8 +716,10 @@ class TikTokUploader:
             # After closing, click Post again
             if popup_closed:
                 time.sleep(0.5)
-                still_visible = self.driver.find_elements(By.XPATH, '//*[text()="Content may be restricted"]')
-                if not still_visible or not any(e.is_displayed() for e in still_visible):
+                still_visible = self.probe.snapshot({
+                    "popup": xpath('//*[text()="Content may be restricted"]')
+                })["popup"]
+                if not still_visible.visible:
                     logger.info("Popup closed! Re-clicking Post...")
                     self._click_post_button()
                 else:
@@ -495,6 +731,7 @@ class TikTokUploader:
         except Exception as e:
             logger.debug(f"Warning popup error: {e}")
 
+    @traced()
     def _click_post_button(self) -> bool:
         """Find and click the post/publish button."""
         # Wait a bit for buttons to be ready
@@ -527,6 +764,7 @@ class TikTokUploader:
             result = self.driver.execute_script(js_click_post)
             if result in ['clicked', 'clicked_parent']:
                 logger.info(f"Post button clicked via JavaScript ({result})")
+                current_span().set_attributes(selector=f"javascript:{result}", retries=0)
                 return True
             logger.info(f"JavaScript click result: {result}")
         except Exception as e:
@@ -539,32 +777,33 @@ class TikTokUploader:
         except:
             pass
         
-        # Quick search: find all buttons and look for "Post" text
-        try:
-            buttons = self.driver.find_elements(By.TAG_NAME, "button")
-            logger.info(f"Found {len(buttons)} buttons on page")
-            for button in buttons:
+        # Quick search: one probe for the "Post" button and all button texts
+        snapshot = self.probe.snapshot({
+            "post": css("button", text="post"),
+            "buttons": css("button", texts=10),
+        })
+        logger.info(f"Found {snapshot['buttons'].count} buttons on page")
+        if snapshot["post"].found:
+            button = snapshot["post"].element
+            try:
+                # Scroll button into view
+                self.driver.execute_script("arguments[0].scrollIntoView(true);", button)
+                time.sleep(0.5)
                 try:
-                    btn_text = button.text.strip().lower()
-                    if btn_text == "post":
-                        # Scroll button into view
-                        self.driver.execute_script("arguments[0].scrollIntoView(true);", button)
-                        time.sleep(0.5)
-                        try:
-                            button.click()
-                            logger.info("Post button clicked")
-                            return True
-                        except:
-                            # Try JavaScript click
-                            self.driver.execute_script("arguments[0].click();", button)
-                            logger.info("Post button clicked via JS fallback")
-                            return True
+                    button.click()
+                    logger.info("Post button clicked")
+                    current_span().set_attributes(selector="button:post", retries=1)
+                    return True
                 except:
-                    continue
-        except Exception as e:
-            logger.debug(f"Button search failed: {e}")
+                    # Try JavaScript click
+                    self.driver.execute_script("arguments[0].click();", button)
+                    logger.info("Post button clicked via JS fallback")
+                    current_span().set_attributes(selector="button:post", retries=1)
+                    return True
+            except Exception as e:
+                logger.debug(f"Button click failed: {e}")
         
-        # Fallback: try specific selectors with longer timeout
+        # Fallback: wait briefly for any of the specific selectors to become clickable
         post_selectors = [
             '//button[.//div[text()="Post"]]',
             '//button[text()="Post"]',
@@ -572,35 +811,42 @@ class TikTokUploader:
             'button.TUXButton--primary',
             '[data-e2e="post-button"]',
         ]
-        
-        for selector in post_selectors:
+        specs = {
+            selector: (xpath if selector.startswith("//") else css)(selector)
+            for selector in post_selectors
+        }
+        start_time = time.time()
+        fallback = self.waits.until(
+            "post-button",
+            lambda: self.probe.snapshot(specs),
+            lambda snap: any(result.clickable for result in snap.probes.values()),
+        )
+        latency = time.time() - start_time
+        tried = []
+        for selector in self.selectors.order("post-button", post_selectors, self.page_version):
+            if fallback is None or not fallback[selector].clickable:
+                tried.append(selector)
+                continue
             try:
-                logger.debug(f"Trying Post selector: {selector}")
-                if selector.startswith("//"):
-                    button = WebDriverWait(self.driver, 5).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                else:
-                    button = WebDriverWait(self.driver, 5).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                    )
-                self.driver.execute_script("arguments[0].click();", button)
+                self.driver.execute_script("arguments[0].click();", fallback[selector].element)
                 logger.info(f"Post button clicked via {selector}")
+                self.selectors.record("post-button", self.page_version, selector, tried, latency)
+                current_span().set_attributes(selector=selector, retries=2 + len(tried))
                 return True
-            except:
-                continue
+            except Exception as e:
+                logger.debug(f"Post selector {selector} failed: {e}")
+                tried.append(selector)
+        self.selectors.record("post-button", self.page_version, None, tried)
+        current_span().set_attribute("retries", 2 + len(tried))
         
         # Log available button texts for debugging
-        try:
-            buttons = self.driver.find_elements(By.TAG_NAME, "button")
-            btn_texts = [b.text.strip() for b in buttons if b.text.strip()]
-            logger.info(f"Available buttons: {btn_texts[:10]}")
-        except:
-            pass
+        btn_texts = [text for text in snapshot["buttons"].texts if text]
+        logger.info(f"Available buttons: {btn_texts}")
                 
         return False
     
-    def _wait_for_post_complete(self, timeout: int = 60) -> bool:
+    @traced()
+    def _wait_for_post_complete(self, timeout: Optional[float] = None) -> bool:
         """Wait for post to complete and verify success."""
         logger.info("Waiting for post confirmation...")
         
@@ -611,27 +857,28 @@ class TikTokUploader:
             'text*="posted"'
         ]
         
-        time.sleep(5)  # Initial wait
-        
         # Check for success message or redirect
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            # Check URL change (often redirects after success)
-            current_url = self.driver.current_url
-            if "upload" not in current_url.lower():
+        def posted(snapshot) -> bool:
+            # URL change (often redirects after success) or a success element;
+            # a redirect to login means the session died, not that it posted
+            current_url = snapshot.url or self.driver.current_url
+            if self.login_manager.is_auth_url(current_url):
+                return False
+            return ("upload" not in current_url.lower() or
+                    any(snapshot[selector].found for selector in success_indicators))
+        
+        snapshot = self.waits.until(
+            "post-complete",
+            lambda: self.probe.snapshot({selector: css(selector) for selector in success_indicators}),
+            posted,
+            timeout=timeout,
+        )
+        if snapshot is not None and posted(snapshot):
+            if "upload" not in (snapshot.url or "").lower():
                 logger.success("Post completed (detected URL change)")
-                return True
-                
-            # Check for success elements
-            for selector in success_indicators:
-                try:
-                    self.driver.find_element(By.CSS_SELECTOR, selector)
-                    logger.success("Post completed (found success indicator)")
-                    return True
-                except:
-                    pass
-                    
-            time.sleep(2)
+            else:
+                logger.success("Post completed (found success indicator)")
+            return True
             
         logger.warning("Could not confirm post completion")
-        return True  # Assume success if no error
+        return False
@@ -3,13 +3,20 @@ Utility Functions
 Common helper functions for the Mini TikTok Automation System.
 """
 
+import hashlib
+import json
+import os
 import sys
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterator, Optional
 
 import yaml
 from loguru import logger
 
+from preflight import VIDEO_EXTENSIONS
+
 
 def load_config(config_path: str = "config/config.yaml") -> Dict[str, Any]:
     """
@@ -48,25 +55,138 @@ def get_default_config() -> Dict[str, Any]:
         "browser": {
             "headless": False,
             "window_size": {"width": 1920, "height": 1080},
-            "implicit_wait": 10,
-            "page_load_timeout": 60
+            "implicit_wait": 0,
+            "page_load_timeout": 60,
+            "page_load_strategy": "eager",
+            "prune_on_launch": True,
+            "cache_limits_mb": {"default": 100, "Cache": 200, "CacheStorage": 200},
+            "blocking": {
+                "enabled": True,
+                "profiles": {
+                    "login-check": ["images", "fonts", "media", "analytics"],
+                    "upload": ["images", "fonts", "media", "analytics"]
+                }
+            },
+            "commands": {
+                "enabled": True,
+                "max_per_upload": 500,
+                "max_seconds_per_upload": 60,
+                "max_per_site": 100,
+                "top_sites": 5
+            }
+        },
+        "pool": {
+            "size": 2,
+            "max_uploads_per_driver": 20,
+            "max_rss_mb": 1500
+        },
+        "profiles": {
+            "clone": False,
+            "clone_dir": "./chrome_clones",
+            "tmpfs": False
+        },
+        "engine": {
+            "max_workers": 0,
+            "browser_memory_mb": 800,
+            "reserve_memory_mb": 1024
+        },
+        "jobs": {
+            "db_path": "data/jobs.db",
+            "max_attempts": 3,
+            "lease_seconds": 1800
         },
         "tiktok": {
             "base_url": "https://www.tiktok.com",
             "upload_url": "https://www.tiktok.com/creator-center/upload",
             "login_url": "https://www.tiktok.com/login"
         },
+        "login": {
+            "cache_ttl": 600,
+            "critical_cookies": ["sessionid", "sid_tt", "sid_guard"],
+            "http_check": True,
+            "session_check_url": "https://www.tiktok.com/passport/web/account/info/",
+            "session_check_timeout": 10
+        },
+        "vault": {
+            "index_db": "data/cookies/vault.db",
+            "encrypt": False
+        },
+        "refresh": {
+            "enabled": True,
+            "window_hours": 24,
+            "check_interval": 300
+        },
         "upload": {
             "max_title_length": 150,
             "max_retries": 3,
             "retry_delay": 5,
-            "upload_timeout": 300
+            "upload_timeout": 300,
+            "settle_seconds": 1.5,
+            "progress_log_interval": 15
+        },
+        "preflight": {
+            "enabled": True,
+            "min_duration": 3,
+            "max_duration": 600,
+            "min_short_side": 0,
+            "max_size_mb": 4096,
+            "codecs": ["avc1", "avc3", "hvc1", "hev1"],
+            "workers": 0
+        },
+        "faststart": {
+            "enabled": False,
+            "cache_dir": "data/cache/faststart",
+            "chunk_size_mb": 8,
+            "max_cache_mb": 2048
+        },
+        "transfer": {
+            "mode": "detector",
+            "chunk_size_mb": 8,
+            "cache": True,
+            "cache_max_gb": 20
         },
         "timing": {
             "min_delay": 1,
             "max_delay": 3,
             "typing_delay": 0.05
         },
+        "waits": {
+            "metrics_file": "data/cache/wait_metrics.json",
+            "default": {"timeout": 10, "poll": 0.5},
+            "login-state-known": {"timeout": 30, "poll": 0.25},
+            "file-input-attached": {"timeout": 30, "poll": 0.25},
+            "content-check-popup": {"timeout": 1, "poll": 0.1},
+            "warning-popup": {"timeout": 1.5, "poll": 0.1},
+            "post-button": {"timeout": 5, "poll": 0.2},
+            "post-complete": {"timeout": 60, "poll": 1}
+        },
+        "mock": {
+            "host": "127.0.0.1",
+            "port": 8900,
+            "render_delay": 0.3,
+            "upload_mb_per_s": 20,
+            "processing_delay": 2,
+            "post_delay": 1,
+            "content_check_probability": 0.3,
+            "restricted_probability": 0.2,
+            "auto_login": True,
+            "build": "mock-1",
+            "seed": None
+        },
+        "selector_cache": {
+            "enabled": True,
+            "file": "data/cache/selector_cache.json",
+            "half_life_days": 7,
+            "max_age_days": 30
+        },
+        "tracing": {
+            "enabled": False,
+            "exporter": "file",
+            "file": "logs/traces.jsonl",
+            "format": "otlp",
+            "endpoint": "http://localhost:4318/v1/traces",
+            "service_name": "tiktok-auto"
+        },
         "logging": {
             "level": "INFO",
             "format": "{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
@@ -126,8 +246,6 @@ def validate_video_file(video_path: str) -> bool:
     Returns:
         True if video is valid
     """
-    valid_extensions = {".mp4", ".mov", ".avi", ".webm", ".mkv"}
-    
     path = Path(video_path)
     
     if not path.exists():
@@ -138,9 +256,9 @@ def validate_video_file(video_path: str) -> bool:
         logger.error(f"Path is not a file: {path}")
         return False
         
-    if path.suffix.lower() not in valid_extensions:
+    if path.suffix.lower() not in VIDEO_EXTENSIONS:
         logger.error(f"Invalid video format: {path.suffix}")
-        logger.info(f"Supported formats: {', '.join(valid_extensions)}")
+        logger.info(f"Supported formats: {', '.join(sorted(VIDEO_EXTENSIONS))}")
         return False
         
     # Check file size (TikTok limit is typically 287.6 MB for 60-second videos)
@@ -152,3 +270,191 @@ def validate_video_file(video_path: str) -> bool:
         
     logger.info(f"Video validated: {path.name} ({file_size_mb:.1f} MB)")
     return True
+
+
+def get_process_tree_rss_mb(pid: int) -> Optional[float]:
+    """
+    Sum the resident memory of a process and all its descendants.
+    
+    Reads /proc directly, so it only works on Linux.
+    
+    Args:
+        pid: Root process id
+        
+    Returns:
+        Total RSS in MB, or None if /proc is unavailable
+    """
+    proc = Path("/proc")
+    if not proc.exists():
+        return None
+        
+    children: Dict[int, list] = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+            # Field 4 is the parent pid; the command name may contain spaces
+            ppid = int(stat.rsplit(")", 1)[1].split()[1])
+            children.setdefault(ppid, []).append(int(entry.name))
+        except (OSError, ValueError, IndexError):
+            continue
+            
+    total_kb = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        stack.extend(children.get(current, []))
+        try:
+            for line in (proc / str(current) / "status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total_kb += int(line.split()[1])
+                    break
+        except (OSError, ValueError):
+            continue
+            
+    return total_kb / 1024
+
+
+def get_available_memory_mb() -> Optional[float]:
+    """
+    Get memory available for new processes (MemAvailable from /proc/meminfo).
+    
+    Returns:
+        Available memory in MB, or None if /proc is unavailable
+    """
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """
+    Hold an exclusive cross-process lock on ``<path>.lock`` for the block.
+
+    Uses flock on POSIX and msvcrt.locking on Windows.
+
+    Args:
+        path: File the lock protects
+    """
+    lock_path = Path(f"{path}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as lock:
+        if os.name == "nt":
+            import msvcrt
+            lock.seek(0)
+            # LK_LOCK retries for about 10 seconds before raising OSError
+            msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def update_json(path: Path, update: Callable[[Dict[str, Any]], Dict[str, Any]], indent: Optional[int] = 2) -> Dict[str, Any]:
+    """
+    Read-modify-write a JSON file shared by several processes.
+
+    The read, ``update`` and write happen under file_lock, so concurrent
+    writers merge instead of overwriting each other; the result is written
+    to a unique temp file and renamed into place.
+
+    Args:
+        path: JSON file (a missing or unreadable file counts as {})
+        update: Returns the new content given the current one
+        indent: JSON indentation
+
+    Returns:
+        The content written
+
+    Raises:
+        OSError: If the file cannot be locked or written
+    """
+    path = Path(path)
+    with file_lock(path):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        data = update(data)
+        fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=indent)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+    return data
+
+
+HASH_INDEX_FILE = "data/cache/content_hashes.json"
+_hash_memo: Dict[str, str] = {}
+
+
+def content_hash(file_path: str, index_file: str = HASH_INDEX_FILE) -> str:
+    """
+    Get the SHA-256 of a file, reusing earlier results while it is unchanged.
+    
+    Results are keyed by path, size and mtime and persisted to a small JSON
+    index, so large videos are hashed once rather than on every retry.
+    
+    Args:
+        file_path: Path to file
+        index_file: JSON file used to persist known hashes
+        
+    Returns:
+        Hex-encoded SHA-256 digest
+    """
+    path = Path(file_path).resolve()
+    stat = path.stat()
+    key = f"{path}|{stat.st_size}|{stat.st_mtime_ns}"
+    
+    if key in _hash_memo:
+        return _hash_memo[key]
+        
+    index_path = Path(index_file)
+    index: Dict[str, str] = {}
+    if index_path.exists():
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+            
+    digest = index.get(key)
+    if not digest:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+
+        def merge(current: Dict[str, str]) -> Dict[str, str]:
+            # Drop entries for older versions of the same file
+            current = {k: v for k, v in current.items() if not k.startswith(f"{path}|")}
+            current[key] = digest
+            return current
+
+        try:
+            update_json(index_path, merge, indent=None)
+        except OSError as e:
+            logger.debug(f"Could not persist hash index: {e}")
+            
+    _hash_memo[key] = digest
+    return digest
@@ -0,0 +1,276 @@
+"""
+Cookie Vault Module
+Per-account cookie jars with atomic writes, optional encryption and an expiry index.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+
+KEY_ENV = "COOKIE_VAULT_KEY"
+
+# Fernet tokens are base64 of a version byte 0x80, so they always start like this
+ENCRYPTED_PREFIX = b"gAAAAA"
+
+# Jars are keyed by their resolved path; the account column is only a label,
+# since jars in different directories may share a file name
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jars (
+    path TEXT PRIMARY KEY,
+    account TEXT NOT NULL,
+    saved_at REAL NOT NULL,
+    cookie_count INTEGER NOT NULL,
+    session_expires REAL,
+    encrypted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_jars_expiry ON jars (session_expires);
+"""
+
+
+def account_for(cookie_file: str) -> str:
+    """Display label for a cookie file (its name without extension)."""
+    return Path(cookie_file).name.split(".")[0]
+
+
+def jar_key(cookie_file: str) -> str:
+    """Vault key for a cookie file (its resolved path)."""
+    return str(Path(cookie_file).resolve())
+
+
+class CookieVault:
+    """
+    Stores one cookie jar per account.
+
+    Jars are written to a temp file and renamed into place, so a crash never
+    leaves a half-written jar behind. With ``vault.encrypt`` enabled they are
+    encrypted with Fernet using the key in the COOKIE_VAULT_KEY environment
+    variable (needs the ``cryptography`` package). Every save records the
+    earliest expiry of the account's critical session cookies in a small
+    SQLite index, so expiry queries never open the jars themselves.
+    """
+
+    def __init__(self, config: dict):
+        """
+        Initialize CookieVault.
+
+        Args:
+            config: Application configuration
+        """
+        vault_config = config.get("vault", {})
+        self.index_path = Path(vault_config.get("index_db") or "data/cookies/vault.db")
+        self.encrypt = vault_config.get("encrypt", False)
+        self.critical_cookies = set(
+            config.get("login", {}).get("critical_cookies", ["sessionid", "sid_tt", "sid_guard"])
+        )
+        self._fernet = None
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _cipher(self):
+        """Fernet instance for the configured key (created on first use)."""
+        if self._fernet is None:
+            key = os.environ.get(KEY_ENV)
+            if not key:
+                raise RuntimeError(f"{KEY_ENV} is not set; cannot read or write encrypted cookie jars")
+            try:
+                from cryptography.fernet import Fernet
+            except ImportError:
+                raise RuntimeError("Encrypted cookie jars need the 'cryptography' package")
+            self._fernet = Fernet(key.encode("utf-8"))
+        return self._fernet
+
+    def _db(self) -> sqlite3.Connection:
+        """Open the expiry index (created on first use)."""
+        if self._conn is None:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(
+                str(self.index_path), timeout=30, isolation_level=None, check_same_thread=False
+            )
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def save(self, cookie_file: str, cookies: List[Dict[str, Any]]):
+        """
+        Atomically write a cookie jar and update the expiry index.
+
+        Args:
+            cookie_file: Jar path; the vault key is its resolved path
+            cookies: Cookies as returned by WebDriver.get_cookies
+        """
+        path = Path(cookie_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        data = json.dumps(cookies, separators=(",", ":")).encode("utf-8")
+        if self.encrypt:
+            data = self._cipher().encrypt(data)
+
+        fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+        self._index(path, cookies, os.path.getmtime(path))
+
+    def load(self, cookie_file: str) -> List[Dict[str, Any]]:
+        """
+        Read a cookie jar, decrypting it if needed.
+
+        Plain JSON jars (including pretty-printed ones from older versions)
+        are read as-is, so enabling encryption does not break existing jars.
+
+        Args:
+            cookie_file: Jar path
+
+        Returns:
+            List of cookies
+
+        Raises:
+            FileNotFoundError: If the jar does not exist
+        """
+        data = Path(cookie_file).read_bytes()
+        if data.startswith(ENCRYPTED_PREFIX):
+            data = self._cipher().decrypt(data)
+        return json.loads(data)
+
+    def _index(self, path: Path, cookies: List[Dict[str, Any]], saved_at: float):
+        """Record a jar's critical cookie expiry."""
+        expiries = [
+            c.get("expiry", c.get("expirationDate"))
+            for c in cookies
+            if c.get("name") in self.critical_cookies
+        ]
+        expiries = [e for e in expiries if e is not None]
+        with self._lock:
+            self._db().execute(
+                "INSERT OR REPLACE INTO jars "
+                "(path, account, saved_at, cookie_count, session_expires, encrypted) VALUES (?, ?, ?, ?, ?, ?)",
+                (jar_key(str(path)), account_for(str(path)), saved_at, len(cookies),
+                 min(expiries) if expiries else None, int(self.encrypt))
+            )
+
+    def session_expires(self, cookie_file: str) -> Optional[float]:
+        """
+        Indexed session expiry of one jar, indexing it first if needed.
+
+        Args:
+            cookie_file: Jar path
+
+        Returns:
+            Earliest critical cookie expiry, or None if unknown
+        """
+        with self._lock:
+            row = self._db().execute(
+                "SELECT session_expires FROM jars WHERE path = ?", (jar_key(cookie_file),)
+            ).fetchone()
+        if row is not None:
+            return row["session_expires"]
+
+        path = Path(cookie_file)
+        if not path.exists():
+            return None
+        self._index(path, self.load(cookie_file), path.stat().st_mtime)
+        return self.session_expires(cookie_file)
+
+    def reindex(self, directory: str) -> int:
+        """
+        Rebuild index entries for every jar in a directory.
+
+        Needed once for jars written before the vault existed or copied in by
+        hand.
+
+        Args:
+            directory: Directory holding *.json jars
+
+        Returns:
+            Number of jars indexed
+        """
+        count = 0
+        for path in sorted(Path(directory).glob("*.json")):
+            try:
+                cookies = self.load(str(path))
+            except Exception as e:
+                logger.warning(f"Skipping {path.name}: {e}")
+                continue
+            self._index(path, cookies, path.stat().st_mtime)
+            count += 1
+        return count
+
+    def expiring_within(self, seconds: float) -> List[Dict[str, Any]]:
+        """
+        Accounts whose session expires within the given time (or already has).
+
+        Args:
+            seconds: Look-ahead window
+
+        Returns:
+            Index rows ordered by expiry, soonest first
+        """
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT * FROM jars WHERE session_expires IS NOT NULL AND session_expires < ? "
+                "ORDER BY session_expires",
+                (time.time() + seconds,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """
+        Every indexed jar.
+
+        Returns:
+            Index rows ordered by account, then path
+        """
+        with self._lock:
+            rows = self._db().execute("SELECT * FROM jars ORDER BY account, path").fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        """Close the index database."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+if __name__ == "__main__":
+    from utils import load_config, setup_logging
+
+    parser = argparse.ArgumentParser(description="Inspect the cookie vault")
+    parser.add_argument("--expiring", type=float, default=None, metavar="HOURS",
+                        help="List accounts whose session expires within this many hours")
+    parser.add_argument("--reindex", type=str, default=None, metavar="DIR",
+                        help="Index every cookie jar in this directory")
+    parser.add_argument("-c", "--config", type=str, default="config/config.yaml", help="Path to config file")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    setup_logging(config.get("logging", {}))
+    vault = CookieVault(config)
+
+    if args.reindex:
+        logger.info(f"Indexed {vault.reindex(args.reindex)} cookie jars")
+
+    rows = vault.expiring_within(args.expiring * 3600) if args.expiring is not None else vault.entries()
+    for row in rows:
+        expires = row["session_expires"]
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(expires)) if expires else "session"
+        print(f"{row['account']:<24} expires {when:<16} {row['cookie_count']:>3} cookies  {row['path']}")
+    vault.close()
@@ -0,0 +1,169 @@
+"""
+Wait Policy Module
+Central per-call timeouts and polling intervals, with metrics for every wait.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+
+from tracing import current_span
+from utils import update_json
+
+
+# Seconds to wait and between polls, per named wait. Waits for things that
+# are usually absent (popups) get short budgets so a miss is cheap.
+DEFAULT_WAITS: Dict[str, Dict[str, float]] = {
+    "default": {"timeout": 10, "poll": 0.5},
+    "login-state-known": {"timeout": 30, "poll": 0.25},
+    "profile-icon-present": {"timeout": 30, "poll": 0.25},
+    "file-input-attached": {"timeout": 30, "poll": 0.25},
+    "content-check-popup": {"timeout": 1, "poll": 0.1},
+    "warning-popup": {"timeout": 1.5, "poll": 0.1},
+    "post-button": {"timeout": 5, "poll": 0.2},
+    "post-complete": {"timeout": 60, "poll": 1},
+}
+
+METRICS_FILE = "data/cache/wait_metrics.json"
+
+# Entries of processes that have not exported for this long are dropped
+METRICS_MAX_AGE = 7 * 24 * 3600
+
+# Shared by every policy in the process so one export covers all waits
+_metrics: Dict[str, Dict[str, float]] = {}
+_metrics_lock = threading.Lock()
+
+
+def _record(name: str, seconds: float, polls: int, satisfied: bool):
+    current_span().add_event(f"wait {name}", seconds=round(seconds, 3), polls=polls, satisfied=satisfied)
+    with _metrics_lock:
+        entry = _metrics.setdefault(name, {
+            "calls": 0, "satisfied": 0, "timeouts": 0, "polls": 0, "total_s": 0.0, "max_s": 0.0,
+        })
+        entry["calls"] += 1
+        entry["satisfied" if satisfied else "timeouts"] += 1
+        entry["polls"] += polls
+        entry["total_s"] = round(entry["total_s"] + seconds, 3)
+        entry["max_s"] = round(max(entry["max_s"], seconds), 3)
+
+
+def wait_metrics() -> Dict[str, Dict[str, float]]:
+    """Copy of the wait metrics recorded in this process, with mean wait per call."""
+    with _metrics_lock:
+        return {
+            name: dict(entry, mean_s=round(entry["total_s"] / entry["calls"], 3))
+            for name, entry in _metrics.items()
+        }
+
+
+class WaitPolicy:
+    """
+    Explicit, named waits replacing Selenium's global implicit wait.
+
+    Each wait polls a callable until its result passes a check or the
+    configured timeout runs out, so a selector that is expected to miss
+    costs one probe plus the (short) budget of that wait rather than the
+    implicit wait of every find_element. Timeouts and poll intervals live in
+    the ``waits`` config section; every call is counted in the process-wide
+    metrics, which ``export`` writes to ``waits.metrics_file``.
+    """
+
+    def __init__(self, config: dict):
+        """
+        Initialize WaitPolicy.
+
+        Args:
+            config: Application configuration
+        """
+        waits_config = dict(config.get("waits") or {})
+        self.metrics_file = Path(waits_config.pop("metrics_file", None) or METRICS_FILE)
+        self.waits = {name: dict(values) for name, values in DEFAULT_WAITS.items()}
+        for name, values in waits_config.items():
+            self.waits.setdefault(name, {}).update(values or {})
+
+    def get(self, name: str) -> Tuple[float, float]:
+        """
+        Timeout and poll interval of a named wait.
+
+        Args:
+            name: Wait name (unknown names use "default")
+
+        Returns:
+            (timeout, poll) in seconds
+        """
+        default = self.waits["default"]
+        values = self.waits.get(name, default)
+        return values.get("timeout", default["timeout"]), values.get("poll", default["poll"])
+
+    def until(
+        self,
+        name: str,
+        probe: Callable[[], Any],
+        ready: Callable[[Any], bool] = bool,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        Call ``probe`` until ``ready(result)`` is true or the wait times out.
+
+        Exceptions from the probe count as "not ready yet".
+
+        Args:
+            name: Wait name, selecting the timeout/poll and the metrics entry
+            probe: Reads the page state
+            ready: Decides whether a probe result is good enough
+            timeout: Override the configured timeout for this call
+
+        Returns:
+            The last probe result (None if every probe raised)
+        """
+        configured_timeout, poll = self.get(name)
+        timeout = configured_timeout if timeout is None else timeout
+        start_time = time.time()
+        polls = 0
+        result = None
+        while True:
+            polls += 1
+            try:
+                result = probe()
+                if ready(result):
+                    _record(name, time.time() - start_time, polls, True)
+                    return result
+            except Exception as e:
+                logger.debug(f"Wait '{name}' probe failed: {e}")
+            if time.time() - start_time + poll > timeout:
+                elapsed = time.time() - start_time
+                _record(name, elapsed, polls, False)
+                logger.debug(f"Wait '{name}' timed out after {elapsed:.2f}s ({polls} polls)")
+                return result
+            time.sleep(poll)
+
+    def export(self) -> Dict[str, Dict[str, float]]:
+        """
+        Write this process's wait metrics to the metrics file.
+
+        Each process keeps its own entry (keyed by pid), so parallel workers
+        do not overwrite each other.
+
+        Returns:
+            The exported metrics
+        """
+        metrics = wait_metrics()
+
+        def merge(data: Dict[str, Any]) -> Dict[str, Any]:
+            now = time.time()
+            data = {
+                pid: entry for pid, entry in data.items()
+                if now - entry.get("updated", 0) < METRICS_MAX_AGE
+            }
+            data[str(os.getpid())] = {"updated": now, "waits": metrics}
+            return data
+
+        try:
+            update_json(self.metrics_file, merge)
+        except OSError as e:
+            logger.debug(f"Could not export wait metrics: {e}")
+        return metrics
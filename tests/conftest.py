@@ -0,0 +1,57 @@
+"""Shared fixtures; the modules under test live in src/ and import each other flat."""
+
+import struct
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+
+def box(box_type: bytes, payload: bytes = b"") -> bytes:
+    """One MP4 box with a 32-bit size."""
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def build_moov(duration: float, width: int, height: int, codec: bytes, offsets, co64: bool) -> bytes:
+    """moov with one video track whose chunk offset table holds ``offsets``."""
+    timescale = 1000
+    mvhd = struct.pack(">4xIIII", 0, 0, timescale, int(duration * timescale)).ljust(100, b"\0")
+    tkhd = bytearray(84)
+    struct.pack_into(">II", tkhd, 76, width << 16, height << 16)
+    hdlr = struct.pack(">4x4s4s", b"\0" * 4, b"vide").ljust(24, b"\0")
+    stsd = struct.pack(">4xI", 1) + box(codec, bytes(78))
+    if co64:
+        chunks = box(b"co64", struct.pack(">4xI", len(offsets)) + b"".join(struct.pack(">Q", o) for o in offsets))
+    else:
+        chunks = box(b"stco", struct.pack(">4xI", len(offsets)) + b"".join(struct.pack(">I", o) for o in offsets))
+    stbl = box(b"stbl", box(b"stsd", stsd) + chunks)
+    mdia = box(b"mdia", box(b"hdlr", hdlr) + box(b"minf", stbl))
+    return box(b"moov", box(b"mvhd", mvhd) + box(b"trak", box(b"tkhd", bytes(tkhd)) + mdia))
+
+
+@pytest.fixture
+def make_mp4(tmp_path):
+    """
+    Factory for small but structurally valid MP4 files.
+
+    The media data is ``chunks`` chunks of distinct bytes; the chunk offset
+    table points at each of them, so a remux can be checked by following the
+    offsets.
+    """
+    def make(name="clip.mp4", duration=10.0, width=720, height=1280, codec=b"avc1",
+             faststart=False, co64=False, chunks=4, chunk_size=64):
+        ftyp = box(b"ftyp", b"isom" + struct.pack(">I", 512) + b"isomavc1")
+        media = b"".join(bytes([i + 1]) * chunk_size for i in range(chunks))
+        mdat = box(b"mdat", media)
+
+        moov_size = len(build_moov(duration, width, height, codec, [0] * chunks, co64))
+        mdat_start = len(ftyp) + (moov_size if faststart else 0)
+        offsets = [mdat_start + 8 + i * chunk_size for i in range(chunks)]
+        moov = build_moov(duration, width, height, codec, offsets, co64)
+
+        path = tmp_path / name
+        path.write_bytes(ftyp + moov + mdat if faststart else ftyp + mdat + moov)
+        return path
+    return make
@@ -0,0 +1,79 @@
+"""Tests for the WebDriver command monitor."""
+
+from pathlib import Path
+
+import pytest
+
+import commands
+from commands import CommandMonitor, report_commands, reset_commands
+
+
+class StubDriver:
+    """Just enough of a WebDriver: every command goes through execute."""
+
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.sent = []
+
+    def execute(self, driver_command, params=None):
+        self.sent.append(driver_command)
+        if driver_command == self.fail:
+            raise RuntimeError("no such element")
+        return {"value": None}
+
+
+@pytest.fixture
+def driver(monkeypatch):
+    # Count this test module as project code so it shows up as the call site
+    monkeypatch.setattr(commands, "SRC_DIR", str(Path(__file__).resolve().parent))
+    driver = StubDriver(fail="findElement")
+    driver.command_monitor = CommandMonitor(driver, {"commands": {"max_per_upload": 2, "top_sites": 3}})
+    return driver
+
+
+def find_and_click(driver):
+    driver.execute("getCurrentUrl")
+    try:
+        driver.execute("findElement", {"using": "css selector", "value": "button"})
+    except RuntimeError:
+        pass
+    driver.execute("clickElement")
+
+
+def test_commands_are_passed_through_and_counted(driver):
+    find_and_click(driver)
+    report = driver.command_monitor.report()
+
+    assert driver.sent == ["getCurrentUrl", "findElement", "clickElement"]
+    assert report["commands"] == 3
+    assert set(report["by_command"]) == {"getCurrentUrl", "findElement", "clickElement"}
+    # One site per line that sent a command
+    assert len(report["by_site"]) == 3
+    assert all(site.startswith("test_commands.find_and_click:") for site in report["by_site"])
+
+
+def test_call_site_falls_back_outside_the_project(driver, monkeypatch):
+    monkeypatch.setattr(commands, "SRC_DIR", "/nowhere")
+    driver.command_monitor._site_cache.clear()
+    driver.execute("getTitle")
+    assert list(driver.command_monitor.report()["by_site"]) == ["unknown"]
+
+
+def test_budget_warning_and_reset(driver):
+    warnings = []
+    handler = commands.logger.add(lambda message: warnings.append(message), level="WARNING")
+    try:
+        find_and_click(driver)
+        driver.command_monitor.report("clip.mp4")
+    finally:
+        commands.logger.remove(handler)
+    assert any("Command budget exceeded for clip.mp4: 3 commands" in w for w in warnings)
+
+    reset_commands(driver)
+    assert report_commands(driver)["commands"] == 0
+
+
+def test_helpers_ignore_unmonitored_drivers():
+    driver = StubDriver()
+    reset_commands(driver)
+    assert report_commands(driver) is None
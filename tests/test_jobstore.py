@@ -0,0 +1,144 @@
+"""Tests for the SQLite job queue."""
+
+import json
+
+import pytest
+
+from jobstore import (
+    CAPTION_FILLED, FAILED, POSTED, POSTING, QUEUED, UPLOADING, VERIFIED, JobStore,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore({"jobs": {"max_attempts": 2, "lease_seconds": 1800}}, str(tmp_path / "jobs.db"))
+    yield store
+    store.close()
+
+
+def expire_leases(store):
+    store.conn.execute("UPDATE jobs SET lease_until = 0 WHERE lease_until IS NOT NULL")
+
+
+def test_enqueue_ignores_duplicates(store):
+    assert store.enqueue("a.mp4", "title", ["fyp"])
+    assert not store.enqueue("a.mp4", "title", ["fyp"])
+    assert store.enqueue("a.mp4", "other title", ["fyp"])
+    assert store.enqueue("a.mp4", "title", ["fyp"], account="second")
+    assert store.summary() == {QUEUED: 3}
+
+
+def test_claim_takes_jobs_in_order_and_holds_the_lease(store):
+    store.enqueue("a.mp4")
+    store.enqueue("b.mp4")
+
+    first = store.claim("host:1")
+    second = store.claim("host:2")
+    assert (first["path"], second["path"]) == ("a.mp4", "b.mp4")
+    assert first["attempts"] == 1
+    assert store.claim("host:3") is None
+
+
+def test_claim_filters_by_account(store):
+    store.enqueue("a.mp4", account="main")
+    store.enqueue("b.mp4", account="alt")
+
+    assert store.claim("host:1", account="alt")["path"] == "b.mp4"
+    assert store.claim("host:1", account="alt") is None
+    assert store.pending_counts() == {"main": 1, "alt": 1}
+
+
+def test_expired_lease_is_reclaimed(store):
+    store.enqueue("a.mp4")
+    job = store.claim("host:1")
+    store.set_state(job["id"], CAPTION_FILLED)
+    assert store.claim("host:2") is None
+
+    expire_leases(store)
+    again = store.claim("host:2")
+    assert again["id"] == job["id"]
+    assert again["attempts"] == 2
+
+
+def test_exhausted_attempts_fail_instead_of_being_claimed(store):
+    store.enqueue("a.mp4")
+    for _ in range(store.max_attempts):
+        store.claim("host:1")
+        expire_leases(store)
+
+    assert store.claim("host:1") is None
+    assert store.summary() == {FAILED: 1}
+
+
+@pytest.mark.parametrize("state", [POSTING, POSTED, VERIFIED])
+def test_jobs_past_the_post_click_are_never_reclaimed(store, state):
+    store.enqueue("a.mp4")
+    job = store.claim("host:1")
+    store.set_state(job["id"], state)
+    expire_leases(store)
+
+    assert store.claim("host:2") is None
+
+
+def test_set_state_records_timings_and_rejects_unknown_states(store):
+    store.enqueue("a.mp4")
+    job = store.claim("host:1")
+    store.set_state(job["id"], UPLOADING)
+    store.set_state(job["id"], POSTED)
+
+    row = store.conn.execute("SELECT timings, lease_until FROM jobs").fetchone()
+    assert {"claimed", UPLOADING, POSTED} <= set(json.loads(row["timings"]))
+    assert row["lease_until"] is None
+    with pytest.raises(ValueError):
+        store.set_state(job["id"], "bogus")
+
+
+def test_failed_attempt_is_requeued_until_attempts_run_out(store):
+    store.enqueue("a.mp4")
+    job = store.claim("host:1")
+    store.finish(job["id"], False, "timeout")
+    assert store.summary() == {QUEUED: 1}
+
+    job = store.claim("host:1")
+    store.finish(job["id"], False, "timeout")
+    assert store.summary() == {FAILED: 1}
+
+
+def test_failure_while_posting_is_not_requeued(store):
+    store.enqueue("a.mp4")
+    job = store.claim("host:1")
+    store.set_state(job["id"], POSTING)
+    store.finish(job["id"], False, "browser crashed")
+
+    row = store.conn.execute("SELECT state, error FROM jobs").fetchone()
+    assert row["state"] == FAILED
+    assert "may have been posted" in row["error"]
+
+
+def test_failed_confirmation_keeps_posted_job(store):
+    store.enqueue("a.mp4")
+    job = store.claim("host:1")
+    store.set_state(job["id"], POSTED)
+    store.finish(job["id"], False, "not confirmed")
+    assert store.summary() == {POSTED: 1}
+
+    store.finish(job["id"], True)
+    assert store.summary() == {POSTED: 1}
+
+
+def test_success_marks_job_verified(store):
+    store.enqueue("a.mp4")
+    job = store.claim("host:1")
+    store.finish(job["id"], True)
+    assert store.summary() == {VERIFIED: 1}
+
+
+def test_release_worker_frees_only_restartable_jobs(store):
+    store.enqueue("a.mp4")
+    store.enqueue("b.mp4")
+    first = store.claim("host:1")
+    second = store.claim("host:1")
+    store.set_state(second["id"], POSTING)
+
+    assert store.release_worker("host:1") == 1
+    assert store.claim("host:2")["id"] == first["id"]
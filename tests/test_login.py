@@ -0,0 +1,137 @@
+"""Tests for installing saved cookie jars."""
+
+import json
+import time
+
+import pytest
+
+from login import LoginManager, to_cdp_cookie
+
+
+FUTURE = time.time() + 86400
+
+
+class CdpDriver:
+    """Driver with CDP; Network.setCookies fails if any cookie is named "bad"."""
+
+    def __init__(self):
+        self.calls = []
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.calls.append((cmd, params))
+        cookies = params.get("cookies", [params])
+        if any(c["name"] == "bad" for c in cookies):
+            raise RuntimeError("Invalid cookie fields\nstack")
+        return {}
+
+
+class RemoteDriver:
+    """Driver without CDP, like a remote grid session."""
+
+    def __init__(self):
+        self.visited = []
+        self.added = []
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def add_cookie(self, cookie):
+        if cookie["name"] == "bad":
+            raise RuntimeError("invalid cookie domain")
+        self.added.append(cookie)
+
+
+def manager(driver, tmp_path, cookies):
+    jar = tmp_path / "cookies.json"
+    jar.write_text(json.dumps(cookies))
+    return LoginManager(driver, {"tiktok": {"base_url": "https://www.tiktok.com"}}, cookie_file=str(jar))
+
+
+def test_host_only_cookie_is_set_by_url():
+    param, reason = to_cdp_cookie({"name": "sid", "value": "1", "domain": "www.tiktok.com", "secure": True})
+    assert reason == ""
+    assert param["url"] == "https://www.tiktok.com/"
+    assert "domain" not in param
+
+
+def test_domain_cookie_keeps_its_domain():
+    param, _ = to_cdp_cookie({"name": "sid", "value": "1", "domain": ".tiktok.com", "path": "/api"})
+    assert param["domain"] == ".tiktok.com"
+    assert param["path"] == "/api"
+    assert "url" not in param
+
+
+def test_explicit_host_only_flag_wins():
+    param, _ = to_cdp_cookie({"name": "a", "value": "1", "domain": "tiktok.com", "hostOnly": False})
+    assert param["domain"] == "tiktok.com"
+    param, _ = to_cdp_cookie({"name": "a", "value": "1", "domain": ".tiktok.com", "hostOnly": True})
+    assert param["url"] == "http://tiktok.com/"
+
+
+@pytest.mark.parametrize("key", ["expiry", "expirationDate"])
+def test_expiry_is_read_from_either_spelling(key):
+    param, _ = to_cdp_cookie({"name": "a", "value": "1", "domain": ".tiktok.com", key: FUTURE})
+    assert param["expires"] == FUTURE
+
+    param, reason = to_cdp_cookie({"name": "a", "value": "1", "domain": ".tiktok.com", key: 1})
+    assert (param, reason) == (None, "expired")
+
+
+def test_session_cookie_ignores_expiry():
+    param, _ = to_cdp_cookie({"name": "a", "value": "1", "domain": ".tiktok.com", "expirationDate": 1, "session": True})
+    assert "expires" not in param
+
+
+@pytest.mark.parametrize("cookie, reason", [
+    ({"name": "a", "value": "1"}, "missing domain"),
+    ({"name": "a", "domain": ".tiktok.com"}, "missing name or value"),
+    ({"name": "a", "value": "1", "domain": ".tiktok.com", "sameSite": "no_restriction"}, "sameSite=None requires secure"),
+    ({"name": "__Host-a", "value": "1", "domain": "www.tiktok.com"}, "__Host- prefix requires secure"),
+])
+def test_cookies_the_browser_would_reject(cookie, reason):
+    assert to_cdp_cookie(cookie) == (None, reason)
+
+
+def test_jar_is_installed_in_one_cdp_call(tmp_path):
+    driver = CdpDriver()
+    cookies = [
+        {"name": "sessionid", "value": "1", "domain": ".tiktok.com", "expiry": FUTURE},
+        {"name": "host", "value": "2", "domain": "www.tiktok.com"},
+        {"name": "old", "value": "3", "domain": ".tiktok.com", "expiry": 1},
+    ]
+    assert manager(driver, tmp_path, cookies).load_cookies()
+
+    (call,) = driver.calls
+    assert call[0] == "Network.setCookies"
+    assert [c["name"] for c in call[1]["cookies"]] == ["sessionid", "host"]
+
+
+def test_failed_batch_is_retried_per_cookie(tmp_path):
+    driver = CdpDriver()
+    cookies = [
+        {"name": "sessionid", "value": "1", "domain": ".tiktok.com"},
+        {"name": "bad", "value": "2", "domain": ".tiktok.com"},
+        {"name": "host", "value": "3", "domain": "www.tiktok.com"},
+    ]
+    login = manager(driver, tmp_path, cookies)
+    assert login._set_cookies_cdp(cookies) == 2
+    assert [cmd for cmd, _ in driver.calls] == ["Network.setCookies"] + ["Network.setCookie"] * 3
+
+
+def test_add_cookie_fallback_without_cdp(tmp_path):
+    driver = RemoteDriver()
+    cookies = [
+        {"name": "sessionid", "value": "1", "domain": ".tiktok.com", "expirationDate": FUTURE + 0.5,
+         "sameSite": "lax"},
+        {"name": "host", "value": "2", "domain": "www.tiktok.com"},
+        {"name": "bad", "value": "3", "domain": ".tiktok.com"},
+    ]
+    assert manager(driver, tmp_path, cookies).load_cookies()
+
+    assert driver.visited == ["https://www.tiktok.com"]
+    session, host = driver.added
+    assert session["domain"] == ".tiktok.com"
+    assert session["expiry"] == int(FUTURE + 0.5)
+    assert session["sameSite"] == "Lax"
+    # Host-only: no domain, so the browser scopes it to the page it is on
+    assert "domain" not in host
@@ -0,0 +1,114 @@
+"""Tests for MP4/MOV preflight validation."""
+
+import struct
+
+import pytest
+
+from conftest import box
+from preflight import Preflight, probe_video
+
+
+@pytest.fixture
+def preflight():
+    return Preflight({"preflight": {"workers": 1}})
+
+
+def test_probe_reads_container_details(make_mp4):
+    info = probe_video(str(make_mp4(duration=12.5, width=1080, height=1920, codec=b"hvc1")))
+    assert info.ok
+    assert info.brand == "isom"
+    assert info.duration == pytest.approx(12.5)
+    assert (info.width, info.height) == (1080, 1920)
+    assert info.codec == "hvc1"
+    assert not info.faststart
+
+
+def test_probe_detects_faststart(make_mp4):
+    info = probe_video(str(make_mp4(faststart=True)))
+    assert 0 <= info.moov_offset < info.mdat_offset
+    assert info.faststart
+
+
+def test_valid_video_passes(preflight, make_mp4):
+    assert preflight.check(str(make_mp4())).ok
+
+
+def test_small_resolution_passes_by_default(preflight, make_mp4):
+    assert preflight.check(str(make_mp4(width=320, height=240))).ok
+
+
+@pytest.mark.parametrize("kwargs, error", [
+    ({"duration": 1}, "too short"),
+    ({"duration": 900}, "too long"),
+    ({"codec": b"mp4v"}, "unsupported codec"),
+])
+def test_limits_are_enforced(preflight, make_mp4, kwargs, error):
+    info = preflight.check(str(make_mp4(**kwargs)))
+    assert not info.ok
+    assert error in info.errors[0]
+
+
+def test_min_short_side_when_configured(make_mp4):
+    strict = Preflight({"preflight": {"min_short_side": 360}})
+    info = strict.check(str(make_mp4(width=320, height=240)))
+    assert info.errors == ["resolution 320x240 below 360p"]
+
+
+def test_truncated_file_is_rejected(preflight, make_mp4):
+    path = make_mp4()
+    path.write_bytes(path.read_bytes()[:-20])
+    info = preflight.check(str(path))
+    assert not info.ok
+    assert "truncated" in info.errors[0]
+
+
+def test_missing_moov_is_rejected(preflight, tmp_path):
+    path = tmp_path / "recording.mp4"
+    path.write_bytes(box(b"ftyp", b"isom\0\0\0\0") + box(b"mdat", bytes(64)))
+    info = preflight.check(str(path))
+    assert any("missing moov" in error for error in info.errors)
+
+
+@pytest.mark.parametrize("content, error", [
+    (b"", "file is empty"),
+    (b"<html>not a video</html>", "not an MP4/MOV file"),
+])
+def test_non_video_files_are_rejected(preflight, tmp_path, content, error):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(content)
+    assert preflight.check(str(path)).errors == [error]
+
+
+def test_missing_file_and_unknown_format(preflight, tmp_path):
+    assert preflight.check(str(tmp_path / "gone.mp4")).errors == ["file not found"]
+    other = tmp_path / "clip.flv"
+    other.write_bytes(b"FLV")
+    assert preflight.check(str(other)).errors == ["unsupported format '.flv'"]
+
+
+@pytest.mark.parametrize("suffix", [".webm", ".avi", ".mkv"])
+def test_other_containers_are_only_size_checked(preflight, tmp_path, suffix):
+    path = tmp_path / f"clip{suffix}"
+    path.write_bytes(b"\0" * 64)
+    assert preflight.check(str(path)).ok
+
+
+def test_short_version_1_tkhd_is_not_corrupt(preflight, tmp_path):
+    mvhd = struct.pack(">4xIIII", 0, 0, 1000, 10000).ljust(100, b"\0")
+    tkhd = b"\x01" + bytes(89)  # version 1 needs 96 bytes to hold the size
+    hdlr = struct.pack(">4x4s4s", b"\0" * 4, b"vide").ljust(24, b"\0")
+    stsd = struct.pack(">4xI", 1) + box(b"avc1", struct.pack(">24xHH", 720, 1280).ljust(78, b"\0"))
+    mdia = box(b"mdia", box(b"hdlr", hdlr) + box(b"minf", box(b"stbl", box(b"stsd", stsd))))
+    moov = box(b"moov", box(b"mvhd", mvhd) + box(b"trak", box(b"tkhd", tkhd) + mdia))
+    path = tmp_path / "v1.mp4"
+    path.write_bytes(box(b"ftyp", b"isom\0\0\0\0") + moov + box(b"mdat", bytes(64)))
+
+    info = preflight.check(str(path))
+    assert info.ok
+    assert (info.width, info.height, info.codec) == (720, 1280, "avc1")
+
+
+def test_filter_keeps_passing_files_in_order(preflight, make_mp4):
+    good = str(make_mp4("good.mp4"))
+    short = str(make_mp4("short.mp4", duration=1))
+    assert list(preflight.filter([short, good])) == [good]
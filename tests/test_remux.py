@@ -0,0 +1,113 @@
+"""Tests for the faststart remuxer."""
+
+import os
+import struct
+
+import pytest
+
+from conftest import build_moov
+from preflight import CONTAINER_BOXES, _iter_children, probe_video
+from remux import FaststartRemuxer, _patch_chunk_offsets
+
+
+@pytest.fixture
+def remuxer(tmp_path, monkeypatch):
+    # content_hash keeps its index under data/ relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return FaststartRemuxer({"faststart": {"enabled": True, "cache_dir": str(tmp_path / "cache")}})
+
+
+def chunk_offsets(path):
+    """Chunk offsets from the first stco/co64 box in the file's moov."""
+    data = path.read_bytes()
+    stack = [payload for box_type, payload in _iter_children(data) if box_type == b"moov"]
+    while stack:
+        for box_type, payload in _iter_children(stack.pop()):
+            if box_type in CONTAINER_BOXES:
+                stack.append(payload)
+            elif box_type in (b"stco", b"co64"):
+                count = struct.unpack_from(">I", payload, 4)[0]
+                fmt = ">I" if box_type == b"stco" else ">Q"
+                width = struct.calcsize(fmt)
+                return [struct.unpack_from(fmt, payload, 8 + i * width)[0] for i in range(count)]
+    raise AssertionError("no chunk offset table")
+
+
+def chunks(path, size=64):
+    """The media bytes each chunk offset points at."""
+    data = path.read_bytes()
+    return [data[offset:offset + size] for offset in chunk_offsets(path)]
+
+
+@pytest.mark.parametrize("co64", [False, True])
+def test_remux_moves_moov_and_patches_offsets(remuxer, make_mp4, co64):
+    source = make_mp4(co64=co64)
+    before = chunks(source)
+    _, moov_start, moov_end, _ = remuxer._layout(source)
+
+    target = remuxer.prepare(source)
+
+    assert target != source
+    assert target.name == source.name
+    assert probe_video(str(target)).faststart
+    assert target.stat().st_size == source.stat().st_size
+    shift = moov_end - moov_start
+    assert chunk_offsets(target) == [offset + shift for offset in chunk_offsets(source)]
+    assert chunks(target) == before
+
+
+def test_faststart_file_is_left_alone(remuxer, make_mp4):
+    source = make_mp4(faststart=True)
+    assert remuxer.prepare(source) == source
+
+
+def test_disabled_or_other_formats_are_left_alone(tmp_path, make_mp4):
+    source = make_mp4()
+    assert FaststartRemuxer({"faststart": {"enabled": False}}).prepare(source) == source
+
+    webm = tmp_path / "clip.webm"
+    webm.write_bytes(b"\x1aE\xdf\xa3")
+    assert FaststartRemuxer({"faststart": {"enabled": True}}).prepare(webm) == webm
+
+
+def test_result_is_cached_by_content(remuxer, make_mp4):
+    source = make_mp4()
+    target = remuxer.prepare(source)
+    inode = target.stat().st_ino
+    os.utime(target, (1, 1))
+
+    assert remuxer.prepare(source) == target
+    assert target.stat().st_ino == inode
+    assert target.stat().st_mtime > 1  # a hit counts as recent use
+    assert not list(target.parent.glob(".*.part"))
+
+
+def test_only_offsets_in_the_moved_range_are_patched():
+    moov = bytearray(build_moov(10, 720, 1280, b"avc1", [100, 200, 300], co64=False))
+    _patch_chunk_offsets(moov, 8, len(moov), 50, (150, 300))
+    assert struct.unpack_from(">3I", moov, moov.index(b"stco") + 12) == (100, 250, 300)
+
+
+def test_stco_overflow_is_refused():
+    moov = bytearray(build_moov(10, 720, 1280, b"avc1", [0xFFFFFF00], co64=False))
+    with pytest.raises(ValueError, match="overflows stco"):
+        _patch_chunk_offsets(moov, 8, len(moov), 0x1000, (0, 0xFFFFFFFF))
+
+    wide = bytearray(build_moov(10, 720, 1280, b"avc1", [0xFFFFFF00], co64=True))
+    _patch_chunk_offsets(wide, 8, len(wide), 0x1000, (0, 0xFFFFFFFF))
+    assert struct.unpack_from(">Q", wide, wide.index(b"co64") + 12)[0] == 0x100000F00
+
+
+def test_least_recently_used_copies_are_evicted(tmp_path, monkeypatch, make_mp4):
+    monkeypatch.chdir(tmp_path)
+    cache_dir = tmp_path / "cache"
+    # Room for two copies of the ~1.7 KB test files, not three
+    remuxer = FaststartRemuxer({"faststart": {"enabled": True, "cache_dir": str(cache_dir), "max_cache_mb": 0.004}})
+    first = remuxer.prepare(make_mp4("first.mp4", chunks=20))
+    second = remuxer.prepare(make_mp4("second.mp4", chunks=21))
+    os.utime(second, (1, 1))  # oldest, despite being created later
+
+    third = remuxer.prepare(make_mp4("third.mp4", chunks=22))
+
+    assert first.exists() and third.exists()
+    assert not second.exists() and not second.parent.exists()
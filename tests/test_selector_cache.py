@@ -0,0 +1,112 @@
+"""Tests for the persisted selector hit statistics."""
+
+import json
+import time
+
+import pytest
+
+from selector_cache import PRIOR, SelectorCache
+
+
+DAY = 86400
+
+
+@pytest.fixture
+def config(tmp_path):
+    return {"selector_cache": {"file": str(tmp_path / "selectors.json"), "half_life_days": 7, "max_age_days": 30}}
+
+
+@pytest.fixture
+def cache(config):
+    return SelectorCache(config)
+
+
+def test_order_without_history_keeps_default_order(cache):
+    assert cache.order("caption", ["a", "b", "c"], "v1") == ["a", "b", "c"]
+
+
+def test_hits_move_a_selector_to_the_front(cache):
+    for _ in range(3):
+        cache.record("caption", "v1", hit="c", tried=["a", "b"])
+    assert cache.order("caption", ["a", "b", "c"], "v1") == ["c", "a", "b"]
+    assert cache.score("caption", "a", "v1") < PRIOR < cache.score("caption", "c", "v1")
+
+
+def test_misses_sort_below_untried_selectors(cache):
+    cache.record("caption", "v1", hit="b", tried=["a"])
+    assert cache.order("caption", ["a", "b", "d"], "v1") == ["b", "d", "a"]
+
+
+def test_old_history_decays_towards_the_prior(cache):
+    cache.record("caption", "v1", hit="a", tried=[])
+    now = time.time()
+    fresh = cache.score("caption", "a", "v1", now)
+    aged = cache.score("caption", "a", "v1", now + 7 * DAY)
+    ancient = cache.score("caption", "a", "v1", now + 700 * DAY)
+
+    assert fresh > aged > ancient
+    assert aged - PRIOR == pytest.approx((fresh - PRIOR) / 2, rel=1e-3)
+    assert ancient == pytest.approx(PRIOR)
+
+
+def test_unknown_version_uses_the_most_recent_one(cache):
+    cache.record("caption", "old", hit="a", tried=["b"])
+    cache.data["caption"]["old"]["a"]["seen"] -= DAY
+    cache.data["caption"]["old"]["b"]["seen"] -= DAY
+    cache.record("caption", "new", hit="b", tried=["a"])
+
+    assert cache.order("caption", ["a", "b"], "unseen") == ["b", "a"]
+    assert cache.order("caption", ["a", "b"], "old") == ["a", "b"]
+
+
+def test_save_round_trips_and_merges_other_processes(config, cache):
+    other = SelectorCache(config)
+    cache.record("caption", "v1", hit="a", tried=[])
+    other.record("file-input", "v1", hit="input", tried=[])
+    cache.save()
+    other.save()
+
+    reloaded = SelectorCache(config)
+    assert set(reloaded.data) == {"caption", "file-input"}
+    assert reloaded.order("caption", ["b", "a"], "v1") == ["a", "b"]
+
+
+def test_concurrent_saves_add_up_per_selector(config, cache):
+    other = SelectorCache(config)
+    for _ in range(3):
+        cache.record("caption", "v1", hit="a", tried=["b"], latency=1.0)
+        other.record("caption", "v1", hit="a", tried=["b"], latency=3.0)
+    other.record("caption", "v1", hit="c", tried=[])
+    cache.save()
+    other.save()
+    cache.save()  # nothing new: must not count anything twice
+
+    entries = SelectorCache(config).data["caption"]["v1"]
+    assert entries["a"]["hits"] == pytest.approx(6, abs=0.01)
+    assert entries["a"]["latency_s"] == pytest.approx(2.0, abs=0.01)
+    assert entries["b"]["misses"] == pytest.approx(6, abs=0.01)
+    assert entries["c"]["hits"] == pytest.approx(1, abs=0.01)
+
+
+def test_save_drops_stale_entries_and_old_versions(config, cache):
+    now = time.time()
+    stale = {"x": {"hits": 1, "misses": 0, "latency_s": 0, "seen": now - 60 * DAY}}
+    versions = {f"v{i}": {"a": {"hits": 1, "misses": 0, "latency_s": 0, "seen": now - i}} for i in range(8)}
+    with open(config["selector_cache"]["file"], "w") as f:
+        json.dump({"stale": {"v1": stale}, "caption": versions}, f)
+
+    cache.record("other", "v1", hit="a", tried=[])
+    cache.save()
+
+    assert "stale" not in cache.data
+    assert sorted(cache.data["caption"]) == [f"v{i}" for i in range(SelectorCache.MAX_VERSIONS)]
+
+
+def test_disabled_cache_records_nothing(tmp_path):
+    path = tmp_path / "selectors.json"
+    cache = SelectorCache({"selector_cache": {"enabled": False, "file": str(path)}})
+    cache.record("caption", "v1", hit="b", tried=["a"])
+    cache.save()
+
+    assert cache.order("caption", ["a", "b"], "v1") == ["a", "b"]
+    assert not path.exists()
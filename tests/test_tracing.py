@@ -0,0 +1,134 @@
+"""Tests for span nesting and the OTLP/Chrome exporters."""
+
+import json
+import os
+
+import pytest
+
+import tracing
+from tracing import NOOP_SPAN, current_span, setup_tracing, span, traced
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    yield tmp_path / "traces.jsonl"
+    setup_tracing({"enabled": False})
+
+
+def exported_spans(path):
+    """Spans of every OTLP request written to the file, in export order."""
+    spans = []
+    for line in path.read_text().splitlines():
+        request = json.loads(line)
+        for resource_spans in request["resourceSpans"]:
+            for scope_spans in resource_spans["scopeSpans"]:
+                spans.extend(scope_spans["spans"])
+    return spans
+
+
+def attributes(otlp_span):
+    return {a["key"]: a["value"] for a in otlp_span["attributes"]}
+
+
+def test_disabled_tracing_is_a_noop(trace_file):
+    assert setup_tracing({"enabled": False, "file": str(trace_file)}) is None
+    with span("upload") as current:
+        assert current is NOOP_SPAN
+        current.set_attribute("ignored", 1)
+    assert current_span() is NOOP_SPAN
+    assert not trace_file.exists()
+
+
+def test_nested_spans_share_a_trace(trace_file):
+    setup_tracing({"enabled": True, "file": str(trace_file)})
+    with span("upload", video="a.mp4") as root:
+        with span("caption") as child:
+            assert current_span() is child
+        assert current_span() is root
+
+    caption, upload = exported_spans(trace_file)
+    assert caption["traceId"] == upload["traceId"]
+    assert caption["parentSpanId"] == upload["spanId"]
+    assert "parentSpanId" not in upload
+    assert int(upload["startTimeUnixNano"]) <= int(caption["startTimeUnixNano"])
+    assert int(caption["endTimeUnixNano"]) <= int(upload["endTimeUnixNano"])
+
+
+def test_otlp_attribute_types_and_resource(trace_file):
+    setup_tracing({"enabled": True, "file": str(trace_file), "service_name": "test"})
+    with span("upload", video="a.mp4", size=3, ratio=0.5, ok=True, path=trace_file):
+        pass
+
+    request = json.loads(trace_file.read_text())
+    resource = {a["key"]: a["value"] for a in request["resourceSpans"][0]["resource"]["attributes"]}
+    assert resource["service.name"] == {"stringValue": "test"}
+    assert resource["process.pid"] == {"intValue": str(os.getpid())}
+
+    (upload,) = exported_spans(trace_file)
+    values = attributes(upload)
+    assert values["video"] == {"stringValue": "a.mp4"}
+    assert values["size"] == {"intValue": "3"}
+    assert values["ratio"] == {"doubleValue": 0.5}
+    assert values["ok"] == {"boolValue": True}
+    assert values["path"] == {"stringValue": str(trace_file)}
+    assert upload["status"] == {"code": 1}
+
+
+def test_exceptions_mark_the_span_failed(trace_file):
+    setup_tracing({"enabled": True, "file": str(trace_file)})
+    with pytest.raises(RuntimeError):
+        with span("post_click"):
+            raise RuntimeError("button gone")
+
+    (failed,) = exported_spans(trace_file)
+    assert failed["status"] == {"code": 2, "message": "RuntimeError: button gone"}
+    assert failed["events"][0]["name"] == "exception"
+
+
+def test_traced_records_boolean_results(trace_file):
+    setup_tracing({"enabled": True, "file": str(trace_file)})
+
+    @traced("check")
+    def check():
+        return False
+
+    assert check() is False
+    (checked,) = exported_spans(trace_file)
+    assert checked["name"] == "check"
+    assert attributes(checked)["result"] == {"boolValue": False}
+
+
+def test_child_spans_are_buffered_until_the_root_ends(trace_file):
+    tracer = setup_tracing({"enabled": True, "file": str(trace_file)})
+    with span("upload"):
+        with span("navigation"):
+            pass
+        assert not trace_file.exists()
+        tracer.flush()
+        assert [s["name"] for s in exported_spans(trace_file)] == ["navigation"]
+    assert [s["name"] for s in exported_spans(trace_file)] == ["navigation", "upload"]
+
+
+def test_chrome_format_writes_one_file_per_process(trace_file):
+    tracer = setup_tracing({"enabled": True, "file": str(trace_file), "format": "chrome"})
+    for _ in range(2):
+        with span("upload"):
+            with span("caption"):
+                pass
+
+    path = tracer.chrome_file()
+    assert path.name == f"traces.{os.getpid()}.jsonl"
+    assert not trace_file.exists()
+    text = path.read_text()
+    assert text.startswith("[\n") and text.count("[") == 1
+    events = json.loads(text.rstrip(",\n") + "]")
+    assert [e["name"] for e in events] == ["caption", "upload"] * 2
+    assert all(e["ph"] == "X" and e["pid"] == os.getpid() and e["dur"] >= 1 for e in events)
+
+
+def test_flush_is_registered_once(trace_file, monkeypatch):
+    registered = []
+    monkeypatch.setattr(tracing.atexit, "register", registered.append)
+    setup_tracing({"enabled": True, "file": str(trace_file)})
+    setup_tracing({"enabled": True, "file": str(trace_file)})
+    assert registered == []
@@ -0,0 +1,48 @@
+"""Tests for the shared file helpers."""
+
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import utils
+from utils import content_hash, update_json
+
+
+def test_update_json_merges_concurrent_writers(tmp_path):
+    path = tmp_path / "shared.json"
+
+    def add(i):
+        update_json(path, lambda data: dict(data, **{str(i): i}))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(add, range(32)))
+
+    assert json.loads(path.read_text()) == {str(i): i for i in range(32)}
+
+
+def test_content_hash_is_persisted_by_every_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "_hash_memo", {})
+    index = tmp_path / "hashes.json"
+    files = []
+    for i in range(16):
+        path = tmp_path / f"clip{i}.mp4"
+        path.write_bytes(bytes([i]) * 1024)
+        files.append(path)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        digests = list(executor.map(lambda p: content_hash(str(p), str(index)), files))
+
+    assert digests == [hashlib.sha256(p.read_bytes()).hexdigest() for p in files]
+    assert sorted(json.loads(index.read_text()).values()) == sorted(digests)
+
+
+def test_content_hash_replaces_entries_for_changed_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "_hash_memo", {})
+    index = tmp_path / "hashes.json"
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"first")
+    content_hash(str(path), str(index))
+    path.write_bytes(b"second version")
+
+    assert content_hash(str(path), str(index)) == hashlib.sha256(b"second version").hexdigest()
+    assert list(json.loads(index.read_text()).values()) == [hashlib.sha256(b"second version").hexdigest()]
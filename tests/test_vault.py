@@ -0,0 +1,109 @@
+"""Tests for the cookie vault and its expiry index."""
+
+import json
+import time
+
+import pytest
+
+from vault import ENCRYPTED_PREFIX, KEY_ENV, CookieVault
+
+
+NOW = time.time()
+
+
+def jar(session_expires):
+    """Two critical cookies (spelled both ways) and an earlier-expiring tracker."""
+    return [
+        {"name": "sessionid", "value": "a", "expiry": session_expires},
+        {"name": "sid_guard", "value": "b", "expirationDate": session_expires + 3600},
+        {"name": "tracking", "value": "c", "expiry": session_expires - 86400},
+    ]
+
+
+@pytest.fixture
+def vault(tmp_path):
+    vault = CookieVault({"vault": {"index_db": str(tmp_path / "vault.db")}})
+    yield vault
+    vault.close()
+
+
+def test_plain_round_trip(vault, tmp_path):
+    path = tmp_path / "main.json"
+    vault.save(str(path), jar(NOW + 100))
+
+    assert vault.load(str(path)) == jar(NOW + 100)
+    assert json.loads(path.read_text()) == jar(NOW + 100)
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_encrypted_round_trip(tmp_path, monkeypatch):
+    fernet = pytest.importorskip("cryptography.fernet")
+    monkeypatch.setenv(KEY_ENV, fernet.Fernet.generate_key().decode())
+    vault = CookieVault({"vault": {"encrypt": True, "index_db": str(tmp_path / "vault.db")}})
+    path = tmp_path / "main.json"
+    vault.save(str(path), jar(NOW + 100))
+
+    assert path.read_bytes().startswith(ENCRYPTED_PREFIX)
+    assert vault.load(str(path)) == jar(NOW + 100)
+    assert vault.entries()[0]["encrypted"] == 1
+
+    # Plain jars stay readable after encryption is switched on
+    plain = tmp_path / "old.json"
+    plain.write_text(json.dumps(jar(NOW), indent=2))
+    assert vault.load(str(plain)) == jar(NOW)
+    vault.close()
+
+
+def test_encrypted_jar_without_key_fails(tmp_path, monkeypatch):
+    path = tmp_path / "main.json"
+    path.write_bytes(ENCRYPTED_PREFIX + b"rest")
+    monkeypatch.delenv(KEY_ENV, raising=False)
+    with pytest.raises(RuntimeError, match=KEY_ENV):
+        CookieVault({}).load(str(path))
+
+
+def test_index_keeps_earliest_critical_expiry(vault, tmp_path):
+    path = tmp_path / "main.json"
+    vault.save(str(path), jar(NOW + 100))
+
+    (row,) = vault.entries()
+    # The earlier "tracking" cookie is not critical, so it does not count
+    assert row["session_expires"] == NOW + 100
+    assert row["cookie_count"] == 3
+    assert row["account"] == "main"
+
+
+def test_session_expires_indexes_a_jar_on_a_miss(vault, tmp_path):
+    path = tmp_path / "copied.json"
+    path.write_text(json.dumps(jar(NOW + 500)))
+    assert vault.entries() == []
+
+    assert vault.session_expires(str(path)) == NOW + 500
+    assert len(vault.entries()) == 1
+    assert vault.session_expires(str(tmp_path / "missing.json")) is None
+
+
+def test_jars_with_the_same_name_do_not_collide(vault, tmp_path):
+    vault.save(str(tmp_path / "a" / "cookies.json"), jar(NOW + 100))
+    vault.save(str(tmp_path / "b" / "cookies.json"), jar(NOW + 200))
+
+    assert vault.session_expires(str(tmp_path / "a" / "cookies.json")) == NOW + 100
+    assert vault.session_expires(str(tmp_path / "b" / ".." / "b" / "cookies.json")) == NOW + 200
+
+
+def test_expiring_within_orders_soonest_first(vault, tmp_path):
+    vault.save(str(tmp_path / "later.json"), jar(NOW + 5000))
+    vault.save(str(tmp_path / "expired.json"), jar(NOW - 10))
+    vault.save(str(tmp_path / "soon.json"), jar(NOW + 50))
+    vault.save(str(tmp_path / "session.json"), [{"name": "sessionid", "value": "a"}])
+
+    assert [row["account"] for row in vault.expiring_within(3600)] == ["expired", "soon"]
+    assert [row["account"] for row in vault.expiring_within(86400)] == ["expired", "soon", "later"]
+
+
+def test_reindex_skips_unreadable_jars(vault, tmp_path):
+    (tmp_path / "good.json").write_text(json.dumps(jar(NOW + 100)))
+    (tmp_path / "broken.json").write_text("{not json")
+
+    assert vault.reindex(str(tmp_path)) == 1
+    assert [row["account"] for row in vault.entries()] == ["good"]